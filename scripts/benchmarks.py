@@ -0,0 +1,229 @@
+"""
+Cross-tenant benchmarks from mergeable t-digest sketches.
+
+Every tenant's dimension favorability is streamed into one sketch per
+(industry, year, dimension) plus an all-industries sketch under ``"*"``.
+A sketch holds at most a few times ``compression`` centroids however many
+tenants went into it, so memory is bounded by the number of keys, not by
+the number of tenants.
+
+Sketches are plain dicts of centroid arrays, so they serialize to JSON and
+sketches from separate worker runs merge by concatenating centroids and
+re-compressing:
+
+    python scripts/benchmarks.py merge merged.json run_a.json run_b.json
+    python scripts/benchmarks.py apply merged.json public/data [TENANTS]
+
+Benchmarks are written back as the industry median, with the tenant's
+percentile rank and gap. Industries with fewer than ``MIN_PEERS`` tenants
+fall back to the all-industries sketch, then to the template value.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import payload_codec
+
+COMPRESSION = 100
+BUFFER_SIZE = 500          # values buffered per sketch before compressing
+MIN_PEERS = 3
+ALL_INDUSTRIES = "*"
+SKETCH_FILE = "benchmarks/sketches.json"
+
+
+# ─── t-digest ────────────────────────────────────────────────────────────────
+
+def new_digest(compression=COMPRESSION):
+    return {"compression": compression, "means": np.zeros(0), "weights": np.zeros(0),
+            "min": np.inf, "max": -np.inf, "buffer": []}
+
+
+def _k_scale(q, compression):
+    """k1 scale function: centroids are small near the tails, large in the middle."""
+    return compression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0.0, 1.0) - 1)
+
+
+def compress(digest):
+    """Fold the buffer into the centroids and merge neighbours within one k-unit."""
+    means = np.concatenate([digest["means"], np.asarray(digest["buffer"], dtype=np.float64)])
+    weights = np.concatenate([digest["weights"], np.ones(len(digest["buffer"]))])
+    digest["buffer"] = []
+    if not len(means):
+        return digest
+    order = np.argsort(means, kind="stable")
+    means, weights = means[order], weights[order]
+    total = weights.sum()
+    q_mid = (np.cumsum(weights) - weights / 2) / total
+    # Contiguous bins in k-space; each bin becomes one centroid
+    k = _k_scale(q_mid, digest["compression"])
+    _, group = np.unique(np.floor(k - k[0]).astype(np.int64), return_inverse=True)
+    w = np.bincount(group, weights=weights)
+    digest["means"] = np.bincount(group, weights=means * weights) / w
+    digest["weights"] = w
+    return digest
+
+
+def add(digest, values):
+    values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return digest
+    digest["min"] = min(digest["min"], float(values.min()))
+    digest["max"] = max(digest["max"], float(values.max()))
+    digest["buffer"].extend(values.tolist())
+    if len(digest["buffer"]) >= BUFFER_SIZE:
+        compress(digest)
+    return digest
+
+
+def merge(digests):
+    """Merge digests (e.g. from separate workers) into a new one."""
+    digests = [compress(d) for d in digests]
+    out = new_digest(max(d["compression"] for d in digests))
+    out["means"] = np.concatenate([d["means"] for d in digests])
+    out["weights"] = np.concatenate([d["weights"] for d in digests])
+    out["min"] = min(d["min"] for d in digests)
+    out["max"] = max(d["max"] for d in digests)
+    return compress(out)
+
+
+def count(digest):
+    return float(digest["weights"].sum()) + len(digest["buffer"])
+
+
+def _centers(digest):
+    compress(digest)
+    w = digest["weights"]
+    # Anchor the extremes so quantile(0) / quantile(1) hit the observed min / max
+    pos = np.concatenate([[0.0], np.cumsum(w) - w / 2, [w.sum()]])
+    vals = np.concatenate([[digest["min"]], digest["means"], [digest["max"]]])
+    return pos, vals, w.sum()
+
+
+def quantile(digest, q):
+    pos, vals, total = _centers(digest)
+    return float(np.interp(q * total, pos, vals))
+
+
+def cdf(digest, x):
+    """Share of observations at or below x, in [0, 1]."""
+    pos, vals, total = _centers(digest)
+    if x < digest["min"]:
+        return 0.0
+    if x >= digest["max"]:
+        return 1.0
+    return float(np.interp(x, vals, pos) / total)
+
+
+def digest_to_dict(digest):
+    compress(digest)
+    return {"compression": digest["compression"], "min": digest["min"], "max": digest["max"],
+            "means": digest["means"].round(4).tolist(), "weights": digest["weights"].tolist()}
+
+
+def digest_from_dict(raw):
+    return {"compression": raw["compression"], "means": np.asarray(raw["means"], dtype=np.float64),
+            "weights": np.asarray(raw["weights"], dtype=np.float64),
+            "min": raw["min"], "max": raw["max"], "buffer": []}
+
+
+# ─── Benchmark sketches ──────────────────────────────────────────────────────
+
+def sketch_key(industry, year, dimension_code):
+    return f"{industry}|{year}|{dimension_code}"
+
+
+def tenant_values(industry, clima_data):
+    """(sketch key, favorability) pairs for one tenant, small enough to ship from a worker."""
+    return [
+        (sketch_key(scope, year, dim["dimension_code"]), dim["favorability_pct"])
+        for year, year_data in clima_data["years"].items()
+        for dim in year_data["dimensions"]
+        for scope in (industry, ALL_INDUSTRIES)
+    ]
+
+
+def observe_values(sketches, values):
+    for key, value in values:
+        add(sketches.setdefault(key, new_digest()), value)
+    return sketches
+
+
+def observe_tenant(sketches, industry, clima_data):
+    """Stream one tenant's favorability into its industry and the all-industries sketches."""
+    return observe_values(sketches, tenant_values(industry, clima_data))
+
+
+def merge_sketches(sketch_sets):
+    keys = sorted({k for s in sketch_sets for k in s})
+    return {k: merge([s[k] for s in sketch_sets if k in s]) for k in keys}
+
+
+def save_sketches(path, sketches):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({k: digest_to_dict(d) for k, d in sorted(sketches.items())}, f,
+                  ensure_ascii=False, separators=(",", ":"))
+
+
+def load_sketches(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return {k: digest_from_dict(raw) for k, raw in json.load(f).items()}
+
+
+def apply_benchmarks(clima_data, industry, sketches, min_peers=MIN_PEERS):
+    """Rewrite benchmark, gap_vs_benchmark and percentile_rank on every dimension."""
+    for year, year_data in clima_data["years"].items():
+        for dim in year_data["dimensions"]:
+            for scope in (industry, ALL_INDUSTRIES):
+                digest = sketches.get(sketch_key(scope, year, dim["dimension_code"]))
+                if digest is not None and count(digest) >= min_peers:
+                    break
+            else:
+                # Too few peers anywhere: keep the template benchmark
+                dim["benchmark_scope"] = "template"
+                continue
+            dim["benchmark"] = round(quantile(digest, 0.5), 1)
+            dim["gap_vs_benchmark"] = round(dim["favorability_pct"] - dim["benchmark"], 1)
+            dim["percentile_rank"] = round(cdf(digest, dim["favorability_pct"]) * 100, 1)
+            dim["benchmark_scope"] = "industry" if scope == industry else "all"
+            dim["benchmark_peers"] = int(count(digest))
+    return clima_data
+
+
+def apply_to_tree(sketches, root, industries, clima_file="clima_v2_data.json"):
+    """Apply benchmarks to <root>/<company_id>/clima_v2_data.json, one tenant in memory at a time."""
+    for company_id, industry in industries.items():
+        path = Path(root) / company_id / clima_file
+        with open(path, "r", encoding="utf-8") as f:
+            clima = json.load(f)
+        encoded = payload_codec.is_encoded(clima)
+        apply_benchmarks(payload_codec.decode_document(clima), industry, sketches)
+        if encoded:
+            clima = payload_codec.encode_document(clima_file, clima)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(clima, f, ensure_ascii=False, indent=2)
+
+
+def main(argv):
+    if len(argv) >= 3 and argv[0] == "merge":
+        merged = merge_sketches([load_sketches(Path(p)) for p in argv[2:]])
+        save_sketches(Path(argv[1]), merged)
+        print(f"Merged {len(argv) - 2} sketch files into {argv[1]} ({len(merged)} sketches)")
+        return 0
+    if len(argv) in (3, 4) and argv[0] == "apply":
+        from tenant_config import TENANTS_PATH, iter_tenants
+        tenants = argv[3] if len(argv) == 4 else TENANTS_PATH
+        industries = {cid: c["industry"] for cid, c in iter_tenants(tenants)}
+        apply_to_tree(load_sketches(Path(argv[1])), argv[2], industries)
+        print(f"Applied benchmarks to {len(industries)} tenants under {argv[2]}")
+        return 0
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,89 @@
+"""
+Inverted indexes over text_analysis comments.
+
+Builds posting lists of comment ordinals (position in the full comment list,
+across all shards) keyed by department, theme, sentiment, dimension and month,
+plus a term index over comment tokens. Posting lists are stored delta-encoded
+so the sidecar stays small. The client (src/lib/comment-index.ts) resolves a
+filter combination by intersecting decoded lists, then maps the ordinals to
+the comment pages that hold them, so only those pages are fetched.
+"""
+
+import re
+
+INDEX_VERSION = 1
+INDEX_FIELDS = ("department", "themes", "sentiment", "dimension", "month")
+
+TOKEN_RE = re.compile(r"[a-záéíóúüñ]+")
+MIN_TOKEN_LEN = 3
+STOPWORDS = {
+    "que", "los", "las", "del", "con", "por", "para", "una", "uno", "unos", "unas",
+    "pero", "más", "mas", "muy", "como", "sus", "ser", "son", "esta", "este", "esto",
+    "estos", "estas", "hay", "sin", "sobre", "entre", "todo", "todos", "también",
+    "tambien", "nos", "les", "fue", "han", "hace", "cada", "vez", "porque", "cuando",
+    "donde", "desde", "hasta", "the", "and",
+}
+
+
+def tokenize(text):
+    """Lowercase word tokens, minus stopwords and very short words."""
+    return {
+        tok for tok in TOKEN_RE.findall(text.lower())
+        if len(tok) >= MIN_TOKEN_LEN and tok not in STOPWORDS
+    }
+
+
+def delta_encode(ordinals):
+    """[3, 7, 8, 20] -> [3, 4, 1, 12]. Input must be sorted ascending."""
+    out = []
+    prev = 0
+    for o in ordinals:
+        out.append(o - prev)
+        prev = o
+    return out
+
+
+def delta_decode(gaps):
+    """[3, 4, 1, 12] -> [3, 7, 8, 20]."""
+    out = []
+    acc = 0
+    for g in gaps:
+        acc += g
+        out.append(acc)
+    return out
+
+
+def _comment_keys(comment, field):
+    if field == "themes":
+        return comment.get("themes", [])
+    if field == "month":
+        date = comment.get("date", "")
+        return [date[:7]] if date else []
+    value = comment.get(field)
+    return [value] if value else []
+
+
+def build_comment_index(comments):
+    """Build the delta-encoded index sidecar for a tenant's comments."""
+    fields = {field: {} for field in INDEX_FIELDS}
+    terms = {}
+
+    # Ordinals are visited in increasing order, so every list stays sorted
+    for ordinal, comment in enumerate(comments):
+        for field in INDEX_FIELDS:
+            for key in set(_comment_keys(comment, field)):
+                fields[field].setdefault(key, []).append(ordinal)
+        for tok in tokenize(comment.get("text", "")):
+            terms.setdefault(tok, []).append(ordinal)
+
+    return {
+        "version": INDEX_VERSION,
+        "encoding": "delta",
+        "total": len(comments),
+        "fields": {
+            field: {key: delta_encode(postings) for key, postings in sorted(keys.items())}
+            for field, keys in fields.items()
+        },
+        "terms": {tok: delta_encode(postings) for tok, postings in sorted(terms.items())},
+    }
+
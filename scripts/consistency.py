@@ -0,0 +1,410 @@
+"""
+Cross-file consistency checks across every tenant.
+
+The nine documents restate the same numbers: segmentation's global_score is
+the clima engagement score, department counts in demographics,
+segmentation and recognition partition sample_n, clustering's
+distributions count its own participant nodes, the org-tree levels roll
+up to the segmentation departments, unified_analysis repeats the clima
+history, and so on. validation.py checks each document on its
+own; this checks them against each other.
+
+Each tenant is reduced (in a pool of workers) to facts: (quantity, key,
+value) rows such as ("demo.departments", "Finance", 34). Only the top-level
+fields an extractor reads are decoded (clustering edges and the
+correlation series, most of the bytes, are skipped). The parent
+concatenates them into flat arrays (tenant index, interned key, value)
+per quantity, and every invariant is one vectorized comparison over all
+tenants at once:
+
+    equal   keyed values agree (within a tolerance), and neither side has keys the other lacks
+    sum     keyed values sum to a per-tenant scalar
+    subset  keys of one quantity all appear in another (values ignored)
+
+    python scripts/consistency.py public/data
+    python scripts/consistency.py out --packs out/packs --workers 8 --json consistency.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+import payload_codec
+import tenant_pack
+from org_tree import DEFAULT_LEVEL_NAMES
+
+DOCUMENTS = [
+    "clima_v2_data.json", "clima_demographics.json", "segmentation_data.json", "predictions_data.json",
+    "correlations_data.json", "clustering_data.json", "recognition_data.json", "text_analysis_data.json",
+    "unified_analysis.json",
+] + [f"segmentation/org_level_{level}.json" for level in range(len(DEFAULT_LEVEL_NAMES))]
+ENGAGEMENT_AGGREGATE = "engagement_global"   # stands for the clima engagement score, not a dimension
+SCORE_TOL = 0.006          # scores are rounded to 2 decimals
+PCT_TOL = 0.06             # percentages are rounded to 1 decimal
+EXAMPLES = 3               # failing rows shown per invariant
+
+# (name, kind, lhs quantity, rhs quantity, tolerance)
+INVARIANTS = [
+    ("global_score", "equal", "seg.global_score", "clima.latest_engagement_score", SCORE_TOL),
+    ("global_engagement", "equal", "seg.global_engagement", "clima.latest_engagement_pct", PCT_TOL),
+    ("respondents_by_year", "equal", "clima.respondents", "demo.sample_n", 0),
+    ("engagement_respondents", "equal", "clima.engagement_respondents", "clima.respondents", 0),
+    ("engagement_profiles", "sum", "clima.latest_profiles", "demo.latest_sample_n", 0),
+    ("demographic_departments", "sum", "demo.departments", "demo.latest_sample_n", 0),
+    ("demographic_genders", "sum", "demo.genders", "demo.latest_sample_n", 0),
+    ("demographic_tenures", "sum", "demo.tenures", "demo.latest_sample_n", 0),
+    ("segmentation_total", "equal", "seg.total_respondents", "demo.latest_sample_n", 0),
+    ("segmentation_departments", "equal", "seg.departments", "demo.departments", 0),
+    ("segmentation_genders", "equal", "seg.genders", "demo.genders", 0),
+    ("org_root", "equal", "org.root_respondents", "seg.total_respondents", 0),
+    ("org_departments", "equal", "org.departments", "seg.departments", 0),
+    ("org_department_scores", "equal", "org.department_scores", "seg.department_scores", SCORE_TOL),
+    ("recognition_respondents", "equal", "recog.respondents", "demo.departments", 0),
+    ("clustering_departments", "equal", "clust.department_distribution", "clust.participants_by_department", 0),
+    ("clustering_department_names", "subset", "clust.department_distribution", "demo.departments", None),
+    ("clustering_profiles", "equal", "clust.profile_distribution", "clust.participants_by_profile", 0),
+    ("prediction_areas", "subset", "pred.areas", "demo.departments", None),
+    ("correlation_dimensions", "subset", "corr.dimensions", "clima.dimensions", None),
+    ("theme_dimensions", "subset", "text.theme_dimensions", "clima.dimensions", None),
+    ("unified_engagement", "equal", "unified.engagement_score", "clima.engagement_score", SCORE_TOL),
+    ("unified_respondents", "equal", "unified.respondents", "clima.respondents", 0),
+    ("unified_dimension_scores", "equal", "unified.dimension_score", "clima.dimension_score", SCORE_TOL),
+    ("year_comparison_scores", "equal", "unified.comparison_score", "clima.dimension_score", SCORE_TOL),
+    ("year_comparison_favorability", "equal", "unified.comparison_favorability", "clima.dimension_favorability",
+     PCT_TOL),
+]
+
+
+# ─── Extraction (per tenant) ─────────────────────────────────────────────────
+
+def _clima_facts(clima):
+    years = clima["years"]
+    for year, yd in years.items():
+        yield "clima.respondents", year, yd["respondent_count"]
+        for d in yd["dimensions"]:
+            yield "clima.dimension_score", f"{d['dimension_code']}/{year}", d["avg_score"]
+            yield "clima.dimension_favorability", f"{d['dimension_code']}/{year}", d["favorability_pct"]
+        eng = yd.get("engagement")
+        if eng:
+            yield "clima.engagement_respondents", year, eng["respondent_count"]
+            yield "clima.engagement_score", year, eng["engagement_score"]
+    latest = years[max(years)]
+    for d in latest["dimensions"]:
+        yield "clima.dimensions", d["dimension_code"], 1
+    eng = latest.get("engagement")
+    if eng:
+        yield "clima.latest_engagement_score", "", eng["engagement_score"]
+        yield "clima.latest_engagement_pct", "", eng["engagement_pct"]
+        for profile, p in eng["profiles"].items():
+            yield "clima.latest_profiles", profile, p["n"]
+
+
+def _demographics_facts(demo):
+    years = demo["years"]
+    for year, yd in years.items():
+        yield "demo.sample_n", year, yd["ficha_tecnica"]["sample_n"]
+    latest = years[max(years)]
+    yield "demo.latest_sample_n", "", latest["ficha_tecnica"]["sample_n"]
+    for category in ("departments", "genders", "tenures"):
+        for name, n in latest["demographics"][category].items():
+            yield f"demo.{category}", name, n
+
+
+def _segmentation_facts(seg):
+    yield "seg.global_score", "", seg["global_score"]
+    yield "seg.global_engagement", "", seg["global_engagement"]
+    yield "seg.total_respondents", "", seg["total_respondents"]
+    min_n = seg["org_tree"]["min_n"] if seg.get("org_tree") else None
+    for s in seg["by_department"]:
+        yield "seg.departments", s["segment_name"], s["respondent_count"]
+        if min_n is not None and s["respondent_count"] >= min_n:   # the org tree suppresses smaller ones
+            for d in s["dimensions"]:
+                yield "seg.department_scores", f"{s['segment_name']}/{d['dimension_code']}", d["avg_score"]
+    for s in seg["by_gender"]:
+        yield "seg.genders", s["segment_name"], s["respondent_count"]
+
+
+def _org_level_facts(level):
+    for node in level["nodes"]:
+        if node["parent_id"] is None:
+            yield "org.root_respondents", "", node["respondent_count"]
+        if level["name"] == "department":
+            yield "org.departments", node["name"], node["respondent_count"]
+            if not node["suppressed"]:
+                for code, score in zip(level["dimension_codes"], node["scores"]):
+                    yield "org.department_scores", f"{node['name']}/{code}", score
+
+
+def _predictions_facts(pred):
+    for area in pred["rotation_risk"]["high_risk_areas"]:
+        yield "pred.areas", area["area"], 1
+    for name in pred["projections"].get("by_department", {}).get("departments", []):
+        yield "pred.areas", name, 1
+
+
+def _correlations_facts(corr):
+    for d in corr["dimensions"]:
+        code = d.get("internal_code", d["code"])
+        if code != ENGAGEMENT_AGGREGATE:
+            yield "corr.dimensions", code, 1
+
+
+def _clustering_facts(clust):
+    metrics = clust["metrics"]
+    for row in metrics["department_distribution"]:
+        yield "clust.department_distribution", row["department"], row["count"]
+    for row in metrics["profile_distribution"]:
+        yield "clust.profile_distribution", row["profile"], row["count"]
+    by_department, by_profile = {}, {}
+    for node in clust["nodes"]:
+        if node["type"] == "participant":
+            by_department[node["department_name"]] = by_department.get(node["department_name"], 0) + 1
+            by_profile[node["profile"]] = by_profile.get(node["profile"], 0) + 1
+    for name, n in by_department.items():
+        yield "clust.participants_by_department", name, n
+    for name, n in by_profile.items():
+        yield "clust.participants_by_profile", name, n
+
+
+def _recognition_facts(recog):
+    for r in recog["rankings"]:
+        yield "recog.respondents", r["area"], r["respondents"]
+
+
+def _text_facts(text):
+    for theme in text["themes"]:
+        for code in theme["dimensions"]:
+            if code != ENGAGEMENT_AGGREGATE:
+                yield "text.theme_dimensions", code, 1
+
+
+def _unified_facts(unified):
+    trends = unified["historical_trends"]
+    for entry in trends["global_engagement"]:
+        yield "unified.engagement_score", str(entry["year"]), entry["engagement_score"]
+        yield "unified.respondents", str(entry["year"]), entry["respondent_count"]
+    for code, series in trends["by_dimension"].items():
+        for point in series["data"]:
+            yield "unified.dimension_score", f"{code}/{point['year']}", point["score"]
+    for row in unified["year_comparison"]:
+        for field, value in row.items():
+            if field.startswith("score_"):
+                yield "unified.comparison_score", f"{row['dimension_code']}/{field[6:]}", value
+            elif field.startswith("favorability_"):
+                yield "unified.comparison_favorability", f"{row['dimension_code']}/{field[13:]}", value
+
+
+# Top-level fields each extractor reads
+FIELDS = {
+    "clima_v2_data.json": ["years"],
+    "clima_demographics.json": ["years"],
+    "segmentation_data.json": ["global_score", "global_engagement", "total_respondents", "by_department",
+                               "by_gender", "org_tree"],
+    "predictions_data.json": ["rotation_risk", "projections"],
+    "correlations_data.json": ["dimensions"],
+    "clustering_data.json": ["metrics", "nodes"],
+    "recognition_data.json": ["rankings"],
+    "text_analysis_data.json": ["themes"],
+    "unified_analysis.json": ["historical_trends", "year_comparison"],
+    **{name: ["name", "dimension_codes", "nodes"] for name in DOCUMENTS if name.startswith("segmentation/")},
+}
+EXTRACTORS = {
+    "clima_v2_data.json": _clima_facts,
+    "clima_demographics.json": _demographics_facts,
+    "segmentation_data.json": _segmentation_facts,
+    "predictions_data.json": _predictions_facts,
+    "correlations_data.json": _correlations_facts,
+    "clustering_data.json": _clustering_facts,
+    "recognition_data.json": _recognition_facts,
+    "text_analysis_data.json": _text_facts,
+    "unified_analysis.json": _unified_facts,
+    **{name: _org_level_facts for name in DOCUMENTS if name.startswith("segmentation/")},
+}
+
+
+_decoder = json.JSONDecoder()
+
+
+def top_level_fields(data, fields):
+    """{field: value} for named top-level fields of a JSON object, decoding only those values.
+
+    In the 2-space indented layout the generators write, a newline followed
+    by exactly two spaces and a key only occurs at the top level (string
+    values cannot hold raw newlines). Other layouts, and documents written
+    with a string table (see payload_codec.py), fall back to a full parse.
+    """
+    text = data.decode("utf-8")
+    if f'\n  "{payload_codec.HEADER_KEY}": ' in text:
+        doc = payload_codec.loads(text)
+        return {f: doc[f] for f in fields if f in doc}
+    out = {}
+    for field in fields:
+        marker = f'\n  "{field}": '
+        start = text.find(marker)
+        if start < 0:
+            doc = payload_codec.loads(text)
+            return {f: doc[f] for f in fields if f in doc}
+        out[field], _ = _decoder.raw_decode(text, start + len(marker))
+    return out
+
+
+def tenant_facts(job):
+    """(company_id, [(quantity, key, value)]) for one tenant; a missing document contributes nothing."""
+    company_id, source = job
+    index = tenant_pack.read_index(source) if source.suffix == tenant_pack.PACK_SUFFIX else None
+
+    def read(name):
+        if index is not None:
+            return tenant_pack.read_document(source, name, index) if name in index else None
+        return (source / name).read_bytes() if (source / name).is_file() else None
+
+    facts = []
+    for name in DOCUMENTS:
+        data = read(name)
+        if data is not None:
+            facts.extend(EXTRACTORS[name](top_level_fields(data, FIELDS[name])))
+    return company_id, facts
+
+
+def find_tenants(root, packs=None):
+    """(company_id, tenant dir or pack path) for every tenant under a data root or pack fan-out."""
+    if packs is not None:
+        return list(tenant_pack.iter_packs(packs))
+    return [(d.name, d) for d in sorted(Path(root).iterdir()) if (d / DOCUMENTS[0]).is_file()]
+
+
+# ─── Vectorized checks ───────────────────────────────────────────────────────
+
+def collect(results):
+    """Flat arrays per quantity: {quantity: (tenant index, key id, value)}, plus tenant ids and keys."""
+    tenant_ids, keys, key_ids, rows = [], [], {}, {}
+    for t, (company_id, facts) in enumerate(results):
+        tenant_ids.append(company_id)
+        for quantity, key, value in facts:
+            k = key_ids.get(key)
+            if k is None:
+                k = key_ids[key] = len(keys)
+                keys.append(key)
+            rows.setdefault(quantity, ([], [], []))
+            rows[quantity][0].append(t)
+            rows[quantity][1].append(k)
+            rows[quantity][2].append(value)
+    arrays = {q: (np.asarray(t, dtype=np.int64), np.asarray(k, dtype=np.int64), np.asarray(v, dtype=np.float64))
+              for q, (t, k, v) in rows.items()}
+    return arrays, tenant_ids, keys
+
+
+_EMPTY = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+
+
+def _lookup(codes, table_codes, table_values):
+    """(found mask, matched values) for each code in a (not necessarily sorted) table."""
+    order = np.argsort(table_codes, kind="stable")
+    sorted_codes = table_codes[order]
+    pos = np.minimum(np.searchsorted(sorted_codes, codes), max(len(sorted_codes) - 1, 0))
+    if not len(sorted_codes):
+        return np.zeros(len(codes), dtype=bool), np.full(len(codes), np.nan)
+    found = sorted_codes[pos] == codes
+    return found, np.where(found, table_values[order][pos], np.nan)
+
+
+def check_invariant(kind, lhs, rhs, tol, n_tenants, n_keys):
+    """(bad tenant index, key id, lhs value, rhs value) arrays, one row per violation."""
+    (ta, ka, va), (tb, kb, vb) = lhs, rhs
+    codes_a, codes_b = ta * n_keys + ka, tb * n_keys + kb
+    if kind == "subset":
+        bad = ~np.isin(codes_a, codes_b)
+        return ta[bad], ka[bad], va[bad], np.full(int(bad.sum()), np.nan)
+    if kind == "sum":
+        present = np.bincount(ta, minlength=n_tenants) > 0
+        sums = np.bincount(ta, weights=va, minlength=n_tenants)
+        target = np.full(n_tenants, np.nan)
+        target[tb] = vb
+        bad = np.flatnonzero(present & ~(np.abs(sums - target) <= tol))
+        return bad, np.full(len(bad), -1), sums[bad], target[bad]
+    # equal: rows of either side without a match, and matched rows that differ
+    found, matched = _lookup(codes_a, codes_b, vb)
+    bad_a = ~found | (np.abs(va - matched) > tol)
+    extra_b = ~np.isin(codes_b, codes_a)
+    return (np.concatenate([ta[bad_a], tb[extra_b]]), np.concatenate([ka[bad_a], kb[extra_b]]),
+            np.concatenate([va[bad_a], np.full(int(extra_b.sum()), np.nan)]),
+            np.concatenate([matched[bad_a], vb[extra_b]]))
+
+
+def run_checks(arrays, tenant_ids, keys):
+    """One report entry per invariant, plus {company_id: [failed invariant names]}."""
+    n_tenants, n_keys = len(tenant_ids), max(len(keys), 1)
+    report, failing = [], {}
+    for name, kind, lhs, rhs, tol in INVARIANTS:
+        left, right = arrays.get(lhs, _EMPTY), arrays.get(rhs, _EMPTY)
+        checked = np.union1d(left[0], right[0])
+        bad_t, bad_k, bad_l, bad_r = check_invariant(kind, left, right, tol or 0, n_tenants, n_keys)
+        tenants = np.unique(bad_t)
+        for t in tenants:
+            failing.setdefault(tenant_ids[t], []).append(name)
+        report.append({
+            "invariant": name, "kind": kind, "lhs": lhs, "rhs": rhs,
+            "tenants_checked": int(len(checked)), "tenants_failing": int(len(tenants)),
+            "rows_failing": int(len(bad_t)),
+            "examples": [{"tenant": tenant_ids[t], "key": keys[k] if k >= 0 else None,
+                          "lhs": None if np.isnan(l) else float(l), "rhs": None if np.isnan(r) else float(r)}
+                         for t, k, l, r in zip(bad_t[:EXAMPLES], bad_k[:EXAMPLES], bad_l[:EXAMPLES],
+                                               bad_r[:EXAMPLES])],
+        })
+    return report, failing
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:g}"
+
+
+def print_report(report, n_tenants, failing, seconds):
+    print(f"{n_tenants} tenants, {len(failing)} with inconsistencies "
+          f"(extract {seconds['extract']:.2f}s, check {seconds['check']:.3f}s)\n")
+    print(f"{'invariant':<28} {'kind':<7} {'checked':>8} {'failing':>8}  example")
+    for entry in report:
+        example = ""
+        if entry["examples"]:
+            ex = entry["examples"][0]
+            key = f" {ex['key']!r}" if ex["key"] not in (None, "") else ""
+            example = f"{ex['tenant']}{key}: {_fmt(ex['lhs'])} vs {_fmt(ex['rhs'])}"
+        print(f"{entry['invariant']:<28} {entry['kind']:<7} {entry['tenants_checked']:>8} "
+              f"{entry['tenants_failing']:>8}  {example}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Check cross-file invariants across every tenant.")
+    parser.add_argument("root", type=Path, help="data root with one directory per tenant")
+    parser.add_argument("--packs", type=Path, default=None, help="read tenant packs from this fan-out root instead")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    parser.add_argument("--json", type=Path, default=None, metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    jobs = find_tenants(args.root, args.packs)
+    if args.workers > 1 and len(jobs) > 1:
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(tenant_facts, jobs, chunksize=max(1, len(jobs) // (args.workers * 8)))
+    else:
+        results = [tenant_facts(job) for job in jobs]
+    arrays, tenant_ids, keys = collect(results)
+    extracted = time.perf_counter()
+    report, failing = run_checks(arrays, tenant_ids, keys)
+    seconds = {"extract": extracted - started, "check": time.perf_counter() - extracted}
+
+    print_report(report, len(tenant_ids), failing, seconds)
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"tenants": len(tenant_ids), "seconds": seconds, "invariants": report,
+                       "failing_tenants": failing}, f, ensure_ascii=False, indent=2)
+    return 1 if failing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
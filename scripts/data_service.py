@@ -0,0 +1,447 @@
+"""
+Local on-demand data service: tenant documents generated on first request.
+
+Serves the same paths the frontend fetches statically, ``/data/{companyId}/{name}``,
+so pointing the app (or a load test) at it needs no client changes. The first
+request for a tenant generates all of its documents in a worker process,
+exactly like regenerate_all_data.py would, and every later request is a
+cache hit:
+
+- a size-bounded LRU of (company, name) → document bytes, with an optional
+  disk spill: evicted entries are written to a per-run directory under
+  ``--spill`` and read back on the next miss instead of regenerating the
+  tenant; a restarted service never sees an earlier run's spilled bytes
+- concurrent requests for a tenant that is still generating await the same
+  future, so a cold tenant costs exactly one generation
+- responses carry a strong ETag (``If-None-Match`` → 304) and are gzipped
+  when the client accepts it; the gzip body is cached next to the raw one
+- ``/export/{companyId}/{scope}.{csv|json}?year=&dimension=`` streams an
+  export with chunked transfer encoding (see exports.py), including the
+  ``cells`` scope over the tenant's OLAP cube
+
+If ``benchmarks/sketches.json`` exists under ``--output`` (written by a batch
+run), clima benchmarks are applied from it; otherwise template values stay.
+
+    python scripts/data_service.py --port 8765 --cache-mb 256 --spill /tmp/pulse-spill
+
+Only stdlib asyncio is used; the HTTP handling below is the small subset the
+app needs (GET/HEAD, keep-alive, no request bodies) and is shared with
+stats_service.py.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import benchmarks
+import exports
+import olap_cube
+import payload_codec
+import regenerate_all_data as generator
+from tenant_config import TENANTS_PATH, iter_tenants
+
+DEFAULT_PORT = 8765
+CACHE_BYTES = 256 * 1024 * 1024
+GZIP_MIN_BYTES = 1024      # smaller bodies are sent as-is
+GZIP_LEVEL = 6
+MAX_HEADER_BYTES = 16 * 1024
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+# ─── HTTP ────────────────────────────────────────────────────────────────────
+
+async def read_request(reader):
+    """(method, path, query, headers) for the next request, or None when the client is done."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        return None
+    if len(head) > MAX_HEADER_BYTES:
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        return None
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+    path, query = parse_target(target)
+    return method.upper(), path, query, headers
+
+
+def accepts_gzip(headers):
+    return "gzip" in headers.get("accept-encoding", "")
+
+
+def response_head(status, length, headers=None):
+    """Status line and headers; length None means the body is sent chunked."""
+    out = [f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}",
+           f"Date: {formatdate(usegmt=True)}",
+           f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked"]
+    out += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    return ("\r\n".join(out) + "\r\n\r\n").encode("latin-1")
+
+
+def parse_target(target):
+    """(path, query dict) from a request target such as /a/b?x=1."""
+    url = urlsplit(target)
+    return unquote(url.path), {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+
+async def send_response(writer, status, body=b"", headers=None, head_only=False):
+    writer.write(response_head(status, len(body), headers))
+    if body and not head_only and status != 304:
+        writer.write(body)
+    await writer.drain()
+
+
+async def send_chunked(writer, status, chunks, headers=None):
+    """Stream an iterable of byte chunks with chunked transfer encoding.
+
+    Each chunk is drained before the next is produced, so a slow client
+    applies backpressure to the generator instead of growing a buffer.
+    """
+    writer.write(response_head(status, None, headers))
+    for chunk in chunks:
+        if chunk:
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def send_json(writer, status, data, headers=None):
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    await send_response(writer, status, body, {"Content-Type": "application/json; charset=utf-8",
+                                               **(headers or {})})
+
+
+async def serve_connection(handler, reader, writer):
+    """Keep-alive loop: handler(method, path, query, headers, writer) answers one request."""
+    try:
+        while True:
+            request = await read_request(reader)
+            if request is None:
+                break
+            await handler(*request, writer)
+            if request[3].get("connection", "").lower() == "close":
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def run_server(handler, host, port, banner):
+    server = await asyncio.start_server(lambda r, w: serve_connection(handler, r, w), host, port,
+                                        limit=MAX_HEADER_BYTES)
+    print(f"{banner} on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+# ─── Cache ───────────────────────────────────────────────────────────────────
+
+def new_entry(data):
+    return {"data": data, "etag": '"' + hashlib.sha1(data).hexdigest() + '"', "gzip": None}
+
+
+def gzip_body(entry):
+    if entry["gzip"] is None:
+        entry["gzip"] = gzip.compress(entry["data"], GZIP_LEVEL, mtime=0)
+    return entry["gzip"]
+
+
+def new_cache(max_bytes=CACHE_BYTES, spill_dir=None):
+    if spill_dir:
+        # One directory per run: documents spilled by an earlier process may predate a regeneration
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+        spill_dir = Path(tempfile.mkdtemp(prefix="run-", dir=spill_dir))
+    return {"entries": OrderedDict(), "bytes": 0, "max_bytes": max_bytes,
+            "spill_dir": spill_dir or None,
+            "hits": 0, "spill_hits": 0, "misses": 0, "evictions": 0}
+
+
+def _entry_size(entry):
+    return len(entry["data"]) + len(entry["gzip"] or b"")
+
+
+def _spill_path(cache, key):
+    company_id, name = key
+    return cache["spill_dir"] / company_id / name
+
+
+def cache_get(cache, key):
+    entry = cache["entries"].get(key)
+    if entry is not None:
+        cache["entries"].move_to_end(key)
+        cache["hits"] += 1
+        return entry
+    if cache["spill_dir"] is not None:
+        path = _spill_path(cache, key)
+        if path.is_file():
+            cache["spill_hits"] += 1
+            return cache_put(cache, key, path.read_bytes())
+    cache["misses"] += 1
+    return None
+
+
+def cache_put(cache, key, data):
+    old = cache["entries"].pop(key, None)
+    if old is not None:
+        cache["bytes"] -= _entry_size(old)
+    entry = new_entry(data)
+    cache["entries"][key] = entry
+    cache["bytes"] += len(data)
+    _evict(cache)
+    return entry
+
+
+def cache_account(cache, before, entry):
+    """Re-count an entry whose gzip body was just added."""
+    cache["bytes"] += _entry_size(entry) - before
+    _evict(cache)
+
+
+def _evict(cache):
+    entries = cache["entries"]
+    while cache["bytes"] > cache["max_bytes"] and len(entries) > 1:
+        key, entry = entries.popitem(last=False)
+        cache["bytes"] -= _entry_size(entry)
+        cache["evictions"] += 1
+        if cache["spill_dir"] is not None:
+            path = _spill_path(cache, key)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(entry["data"])
+
+
+# ─── Generation ──────────────────────────────────────────────────────────────
+
+_sketches = None
+
+
+def init_render_worker(template_dir, output_base, sketch_path, wordcloud_cache=None):
+    global _sketches
+    generator.init_worker(template_dir, output_base, False, "memory", wordcloud_cache=wordcloud_cache)
+    if sketch_path is not None and Path(sketch_path).is_file():
+        _sketches = benchmarks.load_sketches(Path(sketch_path))
+
+
+def render_tenant(job):
+    """Every document of one tenant as {name: bytes}; runs in a worker process."""
+    company_id, company = job
+    *_, failures, _, _ = generator.generate_tenant((company_id, company, 0))
+    if failures:
+        name, errors = next(iter(failures.items()))
+        raise ValueError(f"{company_id}/{name} failed validation: {errors[0]}")
+    generator.finalize_tenant(company_id, company["industry"], _sketches or {})
+    return generator.take_memory_documents(company_id)
+
+
+def new_service(tenants, cache, executor):
+    # names: document names per generated tenant, so unknown names 404 without regenerating
+    return {"tenants": tenants, "cache": cache, "executor": executor, "inflight": {}, "names": {},
+            "generated": 0, "generate_seconds": 0.0, "started": time.time()}
+
+
+async def ensure_tenant(service, company_id):
+    """Generate a tenant once and return its documents; concurrent callers share the in-flight task."""
+    inflight = service["inflight"]
+    if company_id not in inflight:
+        loop = asyncio.get_running_loop()
+        inflight[company_id] = loop.create_task(_generate(service, company_id))
+    try:
+        return await asyncio.shield(inflight[company_id])
+    finally:
+        task = inflight.get(company_id)
+        if task is not None and task.done():
+            inflight.pop(company_id, None)
+
+
+async def _generate(service, company_id):
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    documents = await loop.run_in_executor(service["executor"], render_tenant,
+                                           (company_id, service["tenants"][company_id]))
+    for name, data in documents.items():
+        cache_put(service["cache"], (company_id, name), data)
+    service["names"][company_id] = frozenset(documents)
+    service["generated"] += 1
+    service["generate_seconds"] += time.perf_counter() - started
+    return documents
+
+
+async def get_document(service, company_id, name):
+    """Cache entry for one document, generating the tenant on a cold miss."""
+    key = (company_id, name)
+    names = service["names"].get(company_id)
+    if names is not None and name not in names:
+        return None
+    entry = cache_get(service["cache"], key)
+    if entry is None:
+        documents = await ensure_tenant(service, company_id)
+        entry = cache_get(service["cache"], key)
+        if entry is None and name in documents:
+            # Cache smaller than one tenant: serve straight from the generation result
+            entry = new_entry(documents[name])
+    return entry
+
+
+def service_stats(service):
+    cache = service["cache"]
+    return {"tenants": len(service["tenants"]), "generated": service["generated"],
+            "generate_seconds": round(service["generate_seconds"], 3),
+            "inflight": len(service["inflight"]), "cache_entries": len(cache["entries"]),
+            "cache_bytes": cache["bytes"], "cache_max_bytes": cache["max_bytes"],
+            **{k: cache[k] for k in ("hits", "spill_hits", "misses", "evictions")},
+            "uptime_seconds": round(time.time() - service["started"], 1)}
+
+
+# ─── Handler ─────────────────────────────────────────────────────────────────
+
+async def export_source(service, writer, company_id, name):
+    """Bytes of a document an export reads, or None once a 404/500 has been sent (as for /data/)."""
+    try:
+        entry = await get_document(service, company_id, name)
+    except Exception as exc:  # generation failed: report it, keep serving other tenants
+        await send_json(writer, 500, {"detail": f"{type(exc).__name__}: {exc}"})
+        return None
+    if entry is None:
+        await send_json(writer, 404, {"detail": f"{company_id} has no document {name!r}"})
+        return None
+    return entry["data"]
+
+
+async def stream_export(service, writer, company_id, scope, fmt, query):
+    """/export/{company}/{scope}.{csv|json}?year=&dimension= as a chunked stream."""
+    data = await export_source(service, writer, company_id, "clima_v2_data.json")
+    if data is None:
+        return
+    clima = payload_codec.loads(data)
+    year, dimension = query.get("year"), query.get("dimension")
+    codes = {d["dimension_code"] for y in clima["years"].values() for d in y["dimensions"]}
+    if year is not None and year not in clima["years"]:
+        await send_json(writer, 400, {"detail": f"no survey year {year!r}"})
+        return
+    if dimension is not None and dimension not in codes:
+        await send_json(writer, 400, {"detail": f"unknown dimension {dimension!r}"})
+        return
+    cube = None
+    if scope == "cells":
+        data = await export_source(service, writer, company_id, olap_cube.HEADER_FILE)
+        if data is None:
+            return
+        header = json.loads(data)
+        blob = await export_source(service, writer, company_id, header["data_file"])
+        if blob is None:
+            return
+        cube = olap_cube.decode_cube(header, blob)
+    rows = exports.scope_rows(clima, scope, year, dimension, cube)
+    filename = f"{company_id}_{scope}_{year or 'all'}.{fmt}"
+    await send_chunked(writer, 200, exports.iter_export(rows, fmt), {
+        "Content-Type": exports.CONTENT_TYPES[fmt],
+        "Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+async def send_entry(writer, entry, headers, method, content_type="application/json; charset=utf-8"):
+    """200 / 304 with ETag, gzipped when the client accepts it."""
+    base = {"ETag": entry["etag"], "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if headers.get("if-none-match") == entry["etag"]:
+        await send_response(writer, 304, headers=base)
+        return
+    body = entry["data"]
+    if accepts_gzip(headers) and len(body) >= GZIP_MIN_BYTES:
+        body = gzip_body(entry)
+        base["Content-Encoding"] = "gzip"
+    await send_response(writer, 200, body, {"Content-Type": content_type, **base}, head_only=method == "HEAD")
+
+
+def make_handler(service):
+    async def handle(method, path, query, headers, writer):
+        if method not in ("GET", "HEAD"):
+            await send_json(writer, 405, {"detail": "method not allowed"})
+            return
+        if path in ("/healthz", "/health"):
+            await send_json(writer, 200, {"status": "ok", **service_stats(service)})
+            return
+        parts = path.strip("/").split("/", 2)
+        if len(parts) == 3 and parts[0] == "export":
+            scope, _, fmt = parts[2].rpartition(".")
+            if parts[1] not in service["tenants"] or scope not in exports.STREAM_SCOPES or fmt not in exports.FORMATS:
+                await send_json(writer, 404, {"detail": "not found"})
+                return
+            await stream_export(service, writer, parts[1], scope, fmt, query)
+            return
+        if len(parts) != 3 or parts[0] != "data" or ".." in parts[2].split("/"):
+            await send_json(writer, 404, {"detail": "not found"})
+            return
+        _, company_id, name = parts
+        if company_id not in service["tenants"]:
+            await send_json(writer, 404, {"detail": f"unknown tenant {company_id!r}"})
+            return
+        try:
+            entry = await get_document(service, company_id, name)
+        except Exception as exc:  # generation failed: report it, keep serving other tenants
+            await send_json(writer, 500, {"detail": f"{type(exc).__name__}: {exc}"})
+            return
+        if entry is None:
+            await send_json(writer, 404, {"detail": f"{company_id} has no document {name!r}"})
+            return
+        before = _entry_size(entry)
+        await send_entry(writer, entry, headers, method)
+        if (company_id, name) in service["cache"]["entries"]:
+            cache_account(service["cache"], before, entry)
+    return handle
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Serve tenant documents, generated on demand.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--tenants", type=Path, default=TENANTS_PATH)
+    parser.add_argument("--templates", type=Path, default=generator.TEMPLATE_DIR)
+    parser.add_argument("--output", type=Path, default=generator.OUTPUT_BASE,
+                        help="batch output root, only read for benchmarks/sketches.json")
+    parser.add_argument("--cache-mb", type=float, default=CACHE_BYTES / 2**20)
+    parser.add_argument("--spill", type=Path, default=None, help="spill evicted documents to this directory")
+    parser.add_argument("--wordcloud-cache", type=Path, default=None, metavar="DIR",
+                        help="cache rendered word clouds in this directory (default: no disk cache)")
+    parser.add_argument("--workers", type=int, default=1, help="generation worker processes")
+    args = parser.parse_args(argv)
+
+    tenants = dict(iter_tenants(args.tenants))
+    executor = concurrent.futures.ProcessPoolExecutor(
+        args.workers, initializer=init_render_worker,
+        initargs=(args.templates, args.output, args.output / benchmarks.SKETCH_FILE, args.wordcloud_cache))
+    cache = new_cache(int(args.cache_mb * 2**20), args.spill)
+    service = new_service(tenants, cache, executor)
+    try:
+        asyncio.run(run_server(make_handler(service), args.host, args.port,
+                               f"Serving {len(tenants)} tenants"))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if cache["spill_dir"] is not None:
+            shutil.rmtree(cache["spill_dir"], ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,146 @@
+"""
+Vectorized early-alert detection over dimension × area score series.
+
+Series are rows of an (S × T) array (NaN for unmeasured periods), one per
+(dimension, area) pair. Three detectors run over all rows at once:
+
+- consecutive declines: length of the trailing run of period-over-period drops
+- sudden drop: last change at or beyond ``drop_threshold``
+- CUSUM: one-sided lower CUSUM against each series' own baseline
+
+Severity follows the size of the drop. Alerts are emitted one per dimension,
+in the EarlyAlert schema from src/types/predictions.ts, listing every area
+whose series triggered.
+"""
+
+import numpy as np
+
+DECLINE_EPS = 0.01         # smaller moves count as flat
+DROP_THRESHOLD = 0.15      # sudden drop between consecutive periods
+CUSUM_K = 0.5              # allowance, in baseline standard deviations
+CUSUM_H = 2.0              # decision threshold, in baseline standard deviations
+SEVERITY_BINS = [0.15, 0.30]   # |drop| below -> low, between -> medium, above -> high
+MIN_RUN = 2                # declines needed before the run alone raises an alert
+
+RECOMMENDATIONS = {
+    "high": "Intervención prioritaria: revisar {name} con los líderes de {areas} este mes",
+    "medium": "Planificar acciones sobre {name} en {areas} y medir en el próximo pulso",
+    "low": "Monitorear {name} en {areas} en los próximos pulsos",
+}
+
+
+def _ffill(Y):
+    """Forward-fill NaNs along time so gaps do not read as drops."""
+    idx = np.where(~np.isnan(Y), np.arange(Y.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return Y[np.arange(Y.shape[0])[:, None], idx]
+
+
+def detect(Y, drop_threshold=DROP_THRESHOLD, cusum_k=CUSUM_K, cusum_h=CUSUM_H):
+    """Run all detectors over every row of Y; returns a dict of per-series arrays."""
+    Y = _ffill(np.asarray(Y, dtype=np.float64))
+    diffs = np.diff(Y, axis=1)
+    declining = np.nan_to_num(diffs, nan=0.0) < -DECLINE_EPS
+
+    # Trailing run length: cumulative product of the reversed decline mask
+    run = np.cumprod(declining[:, ::-1], axis=1).sum(axis=1)
+    last_change = np.nan_to_num(diffs[:, -1]) if diffs.shape[1] else np.zeros(len(Y))
+    sudden = last_change <= -drop_threshold
+
+    # CUSUM against the mean / spread of the first half of each series
+    # (rows with nothing measured in the first half get no baseline and never accumulate)
+    half = max(1, Y.shape[1] // 2)
+    seen = ~np.isnan(Y[:, :half]).all(axis=1)
+    baseline = np.full(len(Y), np.nan)
+    spread = np.full(len(Y), np.nan)
+    baseline[seen] = np.nanmean(Y[seen, :half], axis=1)
+    spread[seen] = np.nanstd(Y[seen], axis=1)
+    spread = np.where(np.isnan(spread) | (spread < 0.05), 0.05, spread)
+    cusum = np.zeros(len(Y))
+    cusum_max = np.zeros(len(Y))
+    for t in range(Y.shape[1]):
+        z = np.nan_to_num((baseline - Y[:, t]) / spread)
+        cusum = np.maximum(0.0, cusum + z - cusum_k)
+        cusum_max = np.maximum(cusum_max, cusum)
+    change_point = cusum_max > cusum_h
+
+    # Drop size: from the start of the decline run (or the previous period) to now
+    cols = np.arange(len(Y))
+    start = Y.shape[1] - 1 - np.maximum(run, 1)
+    current = Y[:, -1]
+    previous = Y[cols, np.maximum(start, 0)]
+    change = np.nan_to_num(current - previous)
+
+    triggered = (run >= MIN_RUN) | sudden | (change_point & (change < -DECLINE_EPS))
+    severity = np.asarray(["low", "medium", "high"])[np.digitize(-change, SEVERITY_BINS)]
+    return {
+        "triggered": triggered,
+        "run": run,
+        "sudden": sudden,
+        "change_point": change_point,
+        "current": current,
+        "previous": previous,
+        "change": change,
+        "severity": severity,
+    }
+
+
+def _velocity(change, months):
+    per_month = abs(change) / max(months, 1)
+    if per_month >= 0.05:
+        return "rapid"
+    if per_month >= 0.02:
+        return "moderate"
+    return "slow"
+
+
+def build_alerts(Y, series_keys, periods, dim_names, created_at, period_months=1):
+    """Detect over Y and group triggered series into one alert per dimension.
+
+    series_keys is a list of (dimension_code, area) aligned with the rows of
+    Y; area None means the company-level series. periods are "YYYY-MM"
+    labels for the columns. period_months converts decline runs to months
+    (12 for annual surveys).
+    """
+    found = detect(Y)
+    severity_rank = {"low": 0, "medium": 1, "high": 2}
+
+    by_dim = {}
+    for i in np.flatnonzero(found["triggered"]):
+        code, area = series_keys[i]
+        by_dim.setdefault(code, []).append(i)
+
+    alerts = []
+    for code, rows in by_dim.items():
+        # Lead with the most severe series (the company-level one on ties, then the steepest
+        # drop); severity, scores and change all describe that one series
+        lead = min(rows, key=lambda i: (-severity_rank[found["severity"][i]], series_keys[i][1] is not None,
+                                        found["change"][i]))
+        severity = found["severity"][lead]
+        areas = sorted({series_keys[i][1] for i in rows if series_keys[i][1] is not None})
+        months = int(max(found["run"][lead], 1)) * period_months
+        change = float(found["change"][lead])
+        name = dim_names.get(code, code)
+        area_text = ", ".join(areas[:3]) if areas else "toda la organización"
+        alerts.append({
+            "id": f"alert_{code}",
+            "dimension": code,
+            "label": name,
+            "severity": str(severity),
+            "current_score": round(float(found["current"][lead]), 2),
+            "previous_score": round(float(found["previous"][lead]), 2),
+            "change": round(change, 2),
+            "change_velocity": _velocity(change, months),
+            "months_declining": months,
+            "trend_data": [
+                {"month": p, "score": round(float(v), 2)}
+                for p, v in zip(periods, Y[lead]) if not np.isnan(v)
+            ],
+            "recommendation": RECOMMENDATIONS[str(severity)].format(name=name.lower(), areas=area_text),
+            "affected_areas": areas,
+            "created_at": created_at,
+            "is_new": bool(found["sudden"][lead] or found["run"][lead] <= 1),
+        })
+
+    alerts.sort(key=lambda a: (-severity_rank[a["severity"]], a["change"]))
+    return alerts
@@ -0,0 +1,242 @@
+"""
+Export artifacts and streaming CSV / JSON export.
+
+The export page used to build CSV in the browser from the whole clima
+dataset. The pipeline now writes the page's exports ahead of time, one file
+per scope × year × format under ``exports/`` (plus ``exports/manifest.json``),
+with the same columns the page produced, so a download is a static fetch.
+They are built from the benchmarked clima in the pooled finalize step of
+regenerate_all_data.py, one tenant per job.
+
+Everything is written through generators: rows are produced one at a time
+and encoded into ~64 KB byte chunks, so memory is bounded by the chunk size
+no matter how many rows a table has. The same generators back the chunked
+``/export/...`` route in data_service.py, including the ``cells`` scope (one
+row per non-empty OLAP cube cell: year × department × tenure × gender ×
+generation × dimension), which is too large to precompute for big tenants.
+Cell figures come from the synthetic cube, so they only approximate the
+clima_v2 scores the other scopes export (see olap_cube.py).
+
+    python scripts/exports.py public/data/novatech dimensions csv --year 2026 > dims.csv
+    python scripts/exports.py public/data/novatech cells json > cells.json
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import olap_cube
+import payload_codec
+
+SCOPES = ("dimensions", "engagement", "all")   # precomputed, as on the export page
+STREAM_SCOPES = SCOPES + ("cells",)
+FORMATS = ("csv", "json")
+CHUNK_BYTES = 64 * 1024
+CELL_CHUNK = 50_000        # cube cells decoded per step in cell_rows
+EXPORT_DIR = "exports"
+MANIFEST_FILE = f"{EXPORT_DIR}/manifest.json"
+ENGAGEMENT_PROFILES = [
+    ("Embajadores", "embajadores"),
+    ("Comprometidos Pragmáticos", "comprometidos_pragmaticos"),
+    ("Neutrales", "neutrales"),
+    ("Desvinculados", "desvinculados"),
+]
+CONTENT_TYPES = {"csv": "text/csv; charset=utf-8", "json": "application/json; charset=utf-8"}
+
+
+def export_path(scope, year, fmt):
+    return f"{EXPORT_DIR}/{scope}_{year or 'all'}.{fmt}"
+
+
+# ─── Rows ────────────────────────────────────────────────────────────────────
+
+def _years(clima, year):
+    return [str(year)] if year is not None else sorted(clima["years"])
+
+
+def dimension_rows(clima, year=None, dimension=None):
+    for y in _years(clima, year):
+        for d in clima["years"].get(y, {}).get("dimensions", []):
+            if dimension is None or d["dimension_code"] == dimension:
+                yield {
+                    "year": y,
+                    "dimension_code": d["dimension_code"],
+                    "dimension_name": d["dimension_name"],
+                    "avg_score": d["avg_score"],
+                    "favorability_pct": d["favorability_pct"],
+                    "benchmark": d.get("benchmark"),
+                    "gap_vs_benchmark": d.get("gap_vs_benchmark"),
+                    "segment": d["segment"],
+                    "rank": d.get("rank"),
+                    "item_count": d.get("item_count"),
+                }
+
+
+def engagement_rows(clima, year=None):
+    for y in _years(clima, year):
+        eng = clima["years"].get(y, {}).get("engagement")
+        if not eng:
+            continue
+        row = {"year": y, "type": "engagement_summary", "engagement_score": eng["engagement_score"],
+               "engagement_pct": eng["engagement_pct"], "respondent_count": eng["respondent_count"]}
+        for label, key in ENGAGEMENT_PROFILES:
+            profile = eng.get("profiles", {}).get(label, {})
+            row[f"{key}_n"] = profile.get("n", 0)
+            row[f"{key}_pct"] = profile.get("pct", 0)
+        yield row
+
+
+def cell_rows(cube, year=None, dimension=None, chunk=CELL_CHUNK):
+    """One row per non-empty cube cell, decoded CELL_CHUNK flat indices at a time."""
+    axes = [cube["axes"][a] for a in olap_cube.AXES]
+    counts = cube["counts"].reshape(-1)
+    sums = cube["sums"].reshape(-1)
+    favorable = cube["favorable"].reshape(-1)
+    shape = cube["counts"].shape
+    year_idx = axes[0].index(str(year)) if year is not None else None
+    dim_idx = axes[-1].index(dimension) if dimension is not None else None
+    for start in range(0, counts.size, chunk):
+        n = counts[start:start + chunk]
+        flat = np.flatnonzero(n) + start
+        if not len(flat):
+            continue
+        coords = np.unravel_index(flat, shape)
+        keep = np.ones(len(flat), dtype=bool)
+        if year_idx is not None:
+            keep &= coords[0] == year_idx
+        if dim_idx is not None:
+            keep &= coords[-1] == dim_idx
+        flat = flat[keep]
+        coords = [c[keep] for c in coords]
+        cell_n = counts[flat].astype(np.float64)
+        avg = (sums[flat] / cell_n).round(2)
+        fav = (favorable[flat] / cell_n * 100).round(1)
+        for i in range(len(flat)):
+            row = {a: axes[k][coords[k][i]] for k, a in enumerate(olap_cube.AXES)}
+            row["n"] = int(cell_n[i])
+            row["avg_score"] = float(avg[i])
+            row["favorability_pct"] = float(fav[i])
+            yield row
+
+
+def scope_rows(clima, scope, year=None, dimension=None, cube=None):
+    if scope == "dimensions":
+        return dimension_rows(clima, year, dimension)
+    if scope == "engagement":
+        return engagement_rows(clima, year)
+    if scope == "all":
+        # Same order as the page: dimension rows, then engagement rows
+        return _chain(dimension_rows(clima, year, dimension), engagement_rows(clima, year))
+    if scope == "cells":
+        if cube is None:
+            raise ValueError("the cells scope needs the tenant's OLAP cube")
+        return cell_rows(cube, year, dimension)
+    raise ValueError(f"unknown export scope {scope!r}")
+
+
+def _chain(*iterables):
+    for rows in iterables:
+        yield from rows
+
+
+# ─── Encoding ────────────────────────────────────────────────────────────────
+
+def iter_csv(rows, chunk_bytes=CHUNK_BYTES):
+    """CSV byte chunks (UTF-8 with BOM for Excel), quoted by the csv module.
+
+    A row whose keys differ from the previous row's starts a new header line,
+    so scope "all" is a dimensions block followed by an engagement block.
+    """
+    buf = io.StringIO()
+    writer = None
+    fields = None
+    buf.write("\ufeff")
+    for row in rows:
+        if fields is None or list(row) != fields:
+            fields = list(row)
+            writer = csv.DictWriter(buf, fieldnames=fields, lineterminator="\n")
+            writer.writeheader()
+        writer.writerow(row)
+        if buf.tell() >= chunk_bytes:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def iter_json(rows, chunk_bytes=CHUNK_BYTES):
+    """A JSON array as byte chunks, one element per line."""
+    parts = ["["]
+    size = 1
+    first = True
+    for row in rows:
+        text = ("\n" if first else ",\n") + json.dumps(row, ensure_ascii=False)
+        first = False
+        parts.append(text)
+        size += len(text)
+        if size >= chunk_bytes:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    parts.append("\n]\n")
+    yield "".join(parts).encode("utf-8")
+
+
+def iter_export(rows, fmt, chunk_bytes=CHUNK_BYTES):
+    if fmt == "csv":
+        return iter_csv(rows, chunk_bytes)
+    if fmt == "json":
+        return iter_json(rows, chunk_bytes)
+    raise ValueError(f"unknown export format {fmt!r}")
+
+
+def write_stream(path, chunks):
+    """Write byte chunks to a file; returns bytes written."""
+    written = 0
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+# ─── Artifacts ───────────────────────────────────────────────────────────────
+
+def export_documents(clima):
+    """(path, bytes) for every precomputed export of one tenant, manifest last."""
+    years = sorted(clima["years"])
+    manifest = {"scopes": list(SCOPES), "formats": list(FORMATS), "years": years, "files": []}
+    for scope in SCOPES:
+        for year in years + [None]:
+            for fmt in FORMATS:
+                path = export_path(scope, year, fmt)
+                data = b"".join(iter_export(scope_rows(clima, scope, year), fmt))
+                manifest["files"].append({"scope": scope, "year": year or "all", "format": fmt,
+                                          "path": path, "bytes": len(data)})
+                yield path, data
+    yield MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Stream one tenant's export to stdout.")
+    parser.add_argument("tenant_dir", type=Path, help="tenant directory, e.g. public/data/novatech")
+    parser.add_argument("scope", choices=STREAM_SCOPES)
+    parser.add_argument("format", choices=FORMATS)
+    parser.add_argument("--year", default=None)
+    parser.add_argument("--dimension", default=None)
+    args = parser.parse_args(argv)
+    clima = payload_codec.loads((args.tenant_dir / "clima_v2_data.json").read_bytes())
+    cube = olap_cube.read_cube(args.tenant_dir) if args.scope == "cells" else None
+    out = sys.stdout.buffer
+    for chunk in iter_export(scope_rows(clima, args.scope, args.year, args.dimension, cube), args.format):
+        out.write(chunk)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
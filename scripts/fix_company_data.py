@@ -3,37 +3,31 @@
 Fix company data JSON files by replacing all Towerbank references
 (including Tower Securities, Gente Tower, and all case variants)
 with the appropriate company name for each company directory.
+
+--profile DIR profiles the replacement and the JSON rewrite of each file
+(see profiling.py), optionally for one company or one file only.
 """
 
+import argparse
 import json
 import os
 import re
+import sys
+
+import profiling
+from tenant_config import TENANTS_PATH, iter_tenants
 
 BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "public", "data")
 
-# Company configuration
-COMPANIES = {
-    "novatech": {
-        "full_name": "NovaTech Solutions",
-        "short_name": "NovaTech",
-        "lowercase": "novatech",
-    },
-    "meridian": {
-        "full_name": "Meridian Stores",
-        "short_name": "Meridian",
-        "lowercase": "meridian",
-    },
-    "atlas": {
-        "full_name": "Atlas Capital Group",
-        "short_name": "Atlas Capital",
-        "lowercase": "atlas",
-    },
-    "vitacore": {
-        "full_name": "VitaCore Health",
-        "short_name": "VitaCore",
-        "lowercase": "vitacore",
-    },
-}
+
+def company_names(company_id: str, tenant: dict) -> dict:
+    """Replacement names for a tenant from the tenant config (see tenant_config.py)."""
+    return {
+        "full_name": tenant["name"],
+        "short_name": tenant["short_name"],
+        "lowercase": company_id,
+    }
+
 
 JSON_FILES = [
     "clima_demographics.json",
@@ -149,17 +143,19 @@ def process_company(company_dir: str, company: dict) -> int:
             continue
 
         # Do replacements on the string
-        new_content = replace_tower_references(original_content, company)
+        with profiling.stage(company_dir, "replace_tower_references", json_file):
+            new_content = replace_tower_references(original_content, company)
 
         # Validate JSON
         try:
-            parsed = json.loads(new_content)
+            with profiling.stage(company_dir, "parse_json", json_file):
+                parsed = json.loads(new_content)
         except json.JSONDecodeError as e:
             print(f"  ERROR: {json_file} - Invalid JSON after replacement: {e}")
             continue
 
         # Write back with proper formatting
-        with open(file_path, "w", encoding="utf-8") as f:
+        with profiling.stage(company_dir, "write_json", json_file), open(file_path, "w", encoding="utf-8") as f:
             json.dump(parsed, f, indent=2, ensure_ascii=False)
             f.write("\n")  # trailing newline
 
@@ -176,14 +172,27 @@ def process_company(company_dir: str, company: dict) -> int:
     return total_replacements
 
 
-def main():
+def main(argv=()):
+    parser = argparse.ArgumentParser(description="Replace Towerbank references in company data files.")
+    parser.add_argument("--profile", default=None, metavar="DIR",
+                        help="cProfile each step; write <step>.prof and flamegraph-ready <step>.collapsed "
+                             "files to DIR (see profiling.py)")
+    parser.add_argument("--profile-company", default=None, metavar="ID", help="with --profile, only this company")
+    parser.add_argument("--profile-file", default=None, metavar="NAME", help="with --profile, only this file")
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.enable(args.profile_company, args.profile_file)
+
     print("=" * 60)
     print("Fixing ALL Tower references in company data JSON files")
     print("=" * 60)
 
     grand_total = 0
 
-    for company_dir, company_info in COMPANIES.items():
+    processed = []
+    for company_dir, tenant in iter_tenants(TENANTS_PATH):
+        company_info = company_names(company_dir, tenant)
+        processed.append(company_dir)
         print(f"\nProcessing: {company_dir} -> {company_info['short_name']}")
         print("-" * 40)
         count = process_company(company_dir, company_info)
@@ -199,7 +208,7 @@ def main():
     remaining_total = 0
     tower_pattern = re.compile(r'tower', re.IGNORECASE)
 
-    for company_dir in COMPANIES:
+    for company_dir in processed:
         company_path = os.path.join(BASE_DIR, company_dir)
         for json_file in JSON_FILES:
             file_path = os.path.join(company_path, json_file)
@@ -216,6 +225,17 @@ def main():
     else:
         print(f"  WARNING: {remaining_total} 'tower' references still remaining!")
 
+    if args.profile:
+        profiles = profiling.drain()
+        print("\nProfile:")
+        if profiles:
+            profiling.write_profiles(args.profile, profiles)
+            print(profiling.format_hot_functions(profiles))
+            print(f"  {len(profiles)} steps written to {args.profile}")
+        else:
+            print("  nothing profiled (no matching company / file with Tower references)")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Enterprise-size fixture tenants for frontend load testing.
+
+The bundled tenants are small (clustering_data.json covers ~100
+participants), so the dashboard hooks have never parsed or rendered a
+realistic enterprise. This writes schema-valid tenants at chosen sizes:
+
+    python fixture_tenants.py --output /tmp/fixtures                    # 10k, 50k and 200k respondents
+    python fixture_tenants.py --output ../public/data --respondents 50000 --id atlas
+                                                # render it as Atlas (git checkout public/data to undo)
+
+Each fixture is a normal tenant from regenerate_all_data.py (a bundled
+tenant resized with tenant_config.resize_tenant), whose respondent-scaled
+documents are then replaced with streamed ones:
+
+    clustering_data.json     one participant node per respondent, participant→theme
+                             edges for each respondent's themes, participant↔participant
+                             edges to recent same-department peers sharing
+                             MIN_COMMON_THEMES themes, per-theme clusters listing
+                             every member, and metrics computed from what was written
+    text_analysis/           --comments comments in COMMENT_SHARD_SIZE pages (the
+                             template's comments repeated, departments drawn from
+                             the tenant), the delta-encoded comment_index.json, and
+                             the text_analysis_data.json summary and page manifest
+
+Nothing document-sized is held in memory: respondents live in numpy arrays
+(about 30 bytes each), comment postings in uint32 arrays, and documents are
+written item by item, every item checked against its validation.py schema
+as it goes. Peak RSS is checked against --memory-budget after each fixture.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+import benchmarks
+import regenerate_all_data as pipeline
+import validation
+from comment_index import INDEX_FIELDS, INDEX_VERSION, tokenize
+from tenant_config import TENANTS_PATH, iter_tenants, resize_tenant
+
+RESPONDENTS = [10_000, 50_000, 200_000]
+DEPARTMENTS = 500
+COMMENTS_PER_RESPONDENT = 5       # default --comments: 1M at 200k respondents
+MEMORY_BUDGET_MB = 1024
+
+# ─── Clustering shape (matches the template's) ───────────────────────────────
+THEME_COUNT = (3, 9)              # themes per participant, [low, high)
+COMMENT_COUNT = (2, 13)           # comment ids per participant, [low, high)
+CONNECTION_WEIGHT = (1, 10)       # participant→theme edge weight, [low, high)
+PEERS = 4                         # earlier same-department participants each one may link to
+MIN_COMMON_THEMES = 4             # use-clustering.ts hides peer edges with fewer by default
+WEIGHT_FRACTIONS = (0.0, 0.3, 0.5, 0.8)
+TOP_INFLUENCERS = 10
+TOP_BRIDGES = 8
+PROFILE_SENTIMENT = {             # P(positive, neutral, negative) per engagement profile
+    "Embajadores": (0.8, 0.2, 0.0),
+    "Comprometidos Pragmáticos": (0.6, 0.35, 0.05),
+    "Neutrales": (0.3, 0.55, 0.15),
+    "Desvinculados": (0.1, 0.4, 0.5),
+}
+SENTIMENTS = ("positive", "neutral", "negative")
+SENTIMENT_SCORE = {"positive": (0.3, 0.9), "neutral": (-0.2, 0.3), "negative": (-0.9, -0.3)}
+
+CHUNK = 8192                      # respondents / comments converted to Python objects at a time
+INT_CHUNK = 65536                 # posting-list integers per write
+
+
+# ─── Streaming JSON ──────────────────────────────────────────────────────────
+# Documents are dicts whose values may be lazy: iterators (written item by
+# item as arrays), callables (evaluated when their key is reached, so metrics
+# can follow the lists they count) or 1-D integer ndarrays.
+
+def _is_lazy(value):
+    if isinstance(value, dict):
+        return any(_is_lazy(v) for v in value.values())
+    return callable(value) or isinstance(value, np.ndarray) or hasattr(value, "__next__")
+
+
+def _write(out, value, indent, structured=False):
+    if callable(value):
+        value = value()
+    if isinstance(value, np.ndarray):
+        out.write("[")
+        for start in range(0, len(value), INT_CHUNK):
+            out.write(("," if start else "") + ",".join(map(str, value[start:start + INT_CHUNK].tolist())))
+        out.write("]")
+    elif hasattr(value, "__next__"):
+        pad, empty = "\n" + " " * (indent + 2), True
+        out.write("[")
+        for item in value:
+            out.write(pad if empty else "," + pad)
+            _write(out, item, indent + 2)
+            empty = False
+        out.write("]" if empty else "\n" + " " * indent + "]")
+    elif isinstance(value, dict) and (structured or _is_lazy(value)):
+        pad = "\n" + " " * (indent + 2)
+        for i, (key, v) in enumerate(value.items()):
+            out.write(("{" if i == 0 else ",") + pad + json.dumps(key, ensure_ascii=False) + ": ")
+            _write(out, v, indent + 2)
+        out.write("\n" + " " * indent + "}" if value else "{}")
+    else:
+        out.write(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+
+
+def write_streamed(path, doc):
+    """Write doc (top-level keys one per line, as consistency.py expects) to path; returns bytes written."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", buffering=1 << 20) as out:
+            _write(out, doc, 0, structured=True)
+            out.write("\n")
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def checked(items, check, path, errors):
+    """Yield items, schema-checking each; stops the write once MAX_ERRORS errors are collected."""
+    for i, item in enumerate(items):
+        check(item, f"{path}[{i}]", errors)
+        if len(errors) >= validation.MAX_ERRORS:
+            raise ValueError(f"{errors[0]} (+{len(errors) - 1} more)")
+        yield item
+
+
+# ─── Respondents ─────────────────────────────────────────────────────────────
+
+def respondent_arrays(rng, n, company, themes, profiles):
+    """Per-respondent attributes as arrays; themes are a bitmask over the theme nodes."""
+    weights = np.asarray([company["engagement_profile"].get(p, 0) for p in profiles], dtype=np.float64)
+    profile = rng.choice(len(profiles), n, p=weights / weights.sum()).astype(np.int8)
+    dept = rng.integers(0, len(company["departments"]), n, dtype=np.int32)
+
+    # Theme picks weighted by theme frequency, without replacement (Gumbel top-k); the
+    # first three picks are the participant's listed themes
+    freq = np.asarray([max(t["frequency"], 1) for t in themes], dtype=np.float64)
+    order = np.argsort(-(np.log(freq) + rng.gumbel(size=(n, len(themes)))), axis=1).astype(np.int8)
+    theme_count = rng.integers(*THEME_COUNT, n).clip(max=len(themes)).astype(np.int8)
+    picked = np.arange(len(themes)) < theme_count[:, None]
+    mask = np.zeros(n, dtype=np.int64)
+    for k in range(len(themes)):
+        mask |= np.where(picked[:, k], np.int64(1) << order[:, k].astype(np.int64), 0)
+
+    cumulative = np.cumsum([PROFILE_SENTIMENT[p] for p in profiles], axis=1)
+    u = rng.random(n)
+    sentiment = ((u > cumulative[profile, 0]).astype(np.int8) + (u > cumulative[profile, 1]))
+    lo = np.asarray([SENTIMENT_SCORE[s][0] for s in SENTIMENTS])[sentiment]
+    hi = np.asarray([SENTIMENT_SCORE[s][1] for s in SENTIMENTS])[sentiment]
+    return {
+        "n": n, "dept": dept, "profile": profile, "mask": mask, "top": order[:, :3], "theme_count": theme_count,
+        "sentiment": sentiment, "score": np.round(rng.uniform(lo, hi), 2),
+        "comment_count": rng.integers(*COMMENT_COUNT, n).astype(np.int8),
+        "weight": rng.integers(*CONNECTION_WEIGHT, (n, len(themes))).astype(np.int8),
+    }
+
+
+def _chunks(n):
+    for start in range(0, n, CHUNK):
+        yield start, min(n, start + CHUNK)
+
+
+# ─── clustering_data.json ────────────────────────────────────────────────────
+
+def clustering_document(base, company, people, n_comments, errors):
+    """Lazy clustering document for people; metrics are filled in while edges are written."""
+    n = people["n"]
+    depts = company["departments"]
+    theme_nodes = [node for node in base["nodes"] if node["type"] == "theme"]
+    theme_ids = [node["id"] for node in theme_nodes]
+    short_ids = [node["theme_id"] for node in theme_nodes]
+    profiles = [p["id"] for p in base["filters"]["profiles"]]
+    profile_colors = [p["color"] for p in base["filters"]["profiles"]]
+    sentiment_colors = {s["id"]: s["color"] for s in base["filters"]["sentiments"]}
+    border_colors = sorted({node["border_color"] for node in base["nodes"] if node["type"] == "participant"})
+    samples = [node["sample_comment"] for node in base["nodes"] if node.get("sample_comment")] or [""]
+    degree = np.zeros(n, dtype=np.int32)
+    peer_degree = np.zeros(n, dtype=np.int32)
+    theme_degree = np.zeros(len(theme_nodes), dtype=np.int64)
+    members = [np.flatnonzero(people["mask"] & (1 << t)) for t in range(len(theme_nodes))]
+    counts = {"participant_theme": 0, "participant_participant": 0}
+    node_check = validation.compile_schema(validation.CLUSTERING["nodes"][0])
+    edge_check = validation.compile_schema(validation.CLUSTERING["edges"][0])
+
+    def participant(i, dept, profile, top, count, sentiment, score, cc):
+        return {
+            "id": f"P{i + 1:06d}", "type": "participant", "label": f"Participante {i + 1}",
+            "department": depts[dept][0], "department_name": depts[dept][1], "profile": profiles[profile],
+            "comment_count": cc, "themes": [short_ids[t] for t in top], "theme_count": count,
+            "sentiment": SENTIMENTS[sentiment], "sentiment_score": score,
+            "color": profile_colors[profile], "border_color": border_colors[dept % len(border_colors)],
+            "size": min(30, 10 + 3 * cc),
+            "comment_ids": [f"c{(i * 7919 + k * 104729) % n_comments + 1:07d}" for k in range(cc)],
+            "sample_comment": samples[i % len(samples)],
+        }
+
+    def nodes():
+        for start, stop in _chunks(n):
+            rows = zip(range(start, stop), *(people[key][start:stop].tolist() for key in
+                       ("dept", "profile", "top", "theme_count", "sentiment", "score", "comment_count")))
+            for row in rows:
+                yield participant(*row)
+        for node, member in zip(theme_nodes, members):
+            yield {**node, "participant_count": len(member),
+                   "frequency": round(node["frequency"] * n_comments / max(base["total_comments_processed"], 1))}
+
+    def edge(source, target, kind, weight, sentiment, width, common=None):
+        counts[kind] += 1
+        out = {"id": f"E{counts['participant_theme'] + counts['participant_participant']:07d}",
+               "source": source, "target": target, "type": kind, "weight": weight}
+        if common is not None:
+            out["common_themes"] = common
+        out.update(sentiment=sentiment, color=sentiment_colors[sentiment], width=width)
+        return out
+
+    def edges():
+        recent = [deque(maxlen=PEERS) for _ in depts]
+        for start, stop in _chunks(n):
+            rows = zip(range(start, stop), *(people[key][start:stop].tolist() for key in
+                       ("dept", "mask", "sentiment", "weight")))
+            for i, dept, mask, sentiment, weights in rows:
+                pid, feeling = f"P{i + 1:06d}", SENTIMENTS[sentiment]
+                for t in range(len(theme_ids)):
+                    if mask >> t & 1:
+                        w = weights[t]
+                        degree[i] += 1
+                        theme_degree[t] += 1
+                        yield edge(pid, theme_ids[t], "participant_theme", w, feeling, min(5, 1 + 0.5 * w))
+                for j, other_mask, other_sentiment in recent[dept]:
+                    shared = mask & other_mask
+                    common = shared.bit_count()
+                    if common < MIN_COMMON_THEMES:
+                        continue
+                    degree[i] += 1
+                    degree[j] += 1
+                    peer_degree[i] += 1
+                    peer_degree[j] += 1
+                    pair = (sentiment, other_sentiment)
+                    feeling = "positive" if pair == (0, 0) else "negative" if pair == (2, 2) else "neutral"
+                    weight = round(common + WEIGHT_FRACTIONS[(i + j) % len(WEIGHT_FRACTIONS)], 1)
+                    yield edge(f"P{j + 1:06d}", pid, "participant_participant", weight, feeling,
+                               min(5, 0.5 + 0.5 * common),
+                               [theme_ids[t] for t in range(len(theme_ids)) if shared >> t & 1])
+                recent[dept].append((i, mask, sentiment))
+
+    def summary_row(i):
+        return {"id": f"P{i + 1:06d}", "label": f"Participante {i + 1}",
+                "department": depts[people["dept"][i]][1], "profile": profiles[people["profile"][i]]}
+
+    def distributions(index):
+        by_dept = np.bincount(people["dept"][index], minlength=len(depts))
+        by_profile = np.bincount(people["profile"][index], minlength=len(profiles))
+        return ([{"department": depts[d][1], "count": int(by_dept[d])}
+                 for d in np.argsort(-by_dept, kind="stable") if by_dept[d]],
+                [{"profile": p, "count": int(c), "color": color}
+                 for p, c, color in zip(profiles, by_profile, profile_colors)])
+
+    computed = {}
+
+    def metrics():
+        total_nodes = n + len(theme_nodes)
+        total_edges = counts["participant_theme"] + counts["participant_participant"]
+        isolated = np.flatnonzero(peer_degree == 0)
+        department_distribution, profile_distribution = distributions(slice(None))
+        theme_count = people["theme_count"]
+        bridges = np.lexsort((-degree, -theme_count))[:TOP_BRIDGES]
+        computed["metrics"] = {
+            "total_nodes": total_nodes, "participant_count": n, "theme_count": len(theme_nodes),
+            "total_edges": total_edges, "participant_edges": counts["participant_participant"],
+            "theme_edges": counts["participant_theme"],
+            "density": round(2 * total_edges / (total_nodes * (total_nodes - 1)), 6),
+            "avg_degree": round(2 * total_edges / total_nodes, 2),
+            "max_degree": int(max(degree.max(initial=0), theme_degree.max(initial=0))),
+            "influencers": [{**summary_row(i), "connections": int(degree[i]),
+                             "themes": [short_ids[t] for t in people["top"][i]]}
+                            for i in np.argsort(-degree, kind="stable")[:TOP_INFLUENCERS].tolist()],
+            "bridges": [{**summary_row(i), "theme_diversity": int(theme_count[i]),
+                         "themes": [theme_ids[t] for t in range(len(theme_ids)) if people["mask"][i] >> t & 1]}
+                        for i in bridges.tolist()],
+            "isolated_count": len(isolated),
+            "isolated_participants": ({"id": f"P{i + 1:06d}", "label": f"Participante {i + 1}",
+                                       "department": depts[d][1]}
+                                      for i, d in zip(isolated.tolist(), people["dept"][isolated].tolist())),
+            "department_distribution": department_distribution,
+            "profile_distribution": profile_distribution,
+        }
+        return computed["metrics"]
+
+    def cluster_members(t, index):
+        # Strongest connections first, as in the template
+        index = index[np.argsort(-people["weight"][index, t], kind="stable")]
+        for start, stop in _chunks(len(index)):
+            chunk = index[start:stop]
+            for i, dept, profile, sentiment, w in zip(chunk.tolist(), *(people[key][chunk].tolist() for key in
+                                                      ("dept", "profile", "sentiment")),
+                                                      people["weight"][chunk, t].tolist()):
+                yield {"id": f"P{i + 1:06d}", "label": f"Participante {i + 1}", "department": depts[dept][1],
+                       "profile": profiles[profile], "sentiment": SENTIMENTS[sentiment], "connection_weight": w}
+
+    def clusters():
+        for cluster in base["clusters"]:
+            if cluster["id"] not in theme_ids:
+                continue
+            t = theme_ids.index(cluster["id"])
+            department_distribution, profile_distribution = distributions(members[t])
+            yield {**cluster, "participant_count": len(members[t]), "participants": cluster_members(t, members[t]),
+                   "department_distribution": department_distribution,
+                   "profile_distribution": profile_distribution}
+
+    doc = {
+        "generated_at": base["generated_at"], "source": base["source"], "total_comments_processed": n_comments,
+        "nodes": checked(nodes(), node_check, "$.nodes", errors),
+        "edges": checked(edges(), edge_check, "$.edges", errors),
+        "metrics": metrics,
+        "clusters": clusters(),
+        "filters": {**base["filters"], "departments": [{"id": d, "name": name} for d, name in depts]},
+    }
+
+    def skeleton():
+        """The document minus its streamed lists, for the top-level schema check."""
+        return {**doc, "nodes": [], "edges": [], "clusters": [
+            {**c, "participants": []} for c in base["clusters"] if c["id"] in theme_ids],
+            "metrics": {**computed["metrics"], "isolated_participants": []}}
+
+    return doc, skeleton
+
+
+# ─── Comments ────────────────────────────────────────────────────────────────
+
+def write_comments(company_id, company, template_comments, n_comments, rng, tenant_dir, errors):
+    """Comment pages plus comment_index.json; returns (shard manifest pages, sentiment counts)."""
+    shard_dir = tenant_dir / pipeline.COMMENT_SHARD_DIR
+    if shard_dir.is_dir():
+        shutil.rmtree(shard_dir)
+    sources = [{**c, "text": pipeline.replace_company_refs(c.get("text", ""), company["name"], company_id)}
+               for c in template_comments]
+    tokens = [sorted(tokenize(c["text"])) for c in sources]
+    dept_ids = [d for d, _ in company["departments"]]
+    fields = {field: {} for field in INDEX_FIELDS}
+    terms = {}
+    sentiments = {s: 0 for s in SENTIMENTS}
+    comment_check = validation.compile_schema(validation.COMMENT)
+    pages, page = [], []
+
+    def flush():
+        index, offset = len(pages), len(pages) * pipeline.COMMENT_SHARD_SIZE
+        path = f"{pipeline.COMMENT_SHARD_DIR}/comments_{index:04d}.json"
+        pages.append({"index": index, "path": path, "offset": offset, "count": len(page),
+                      "first_id": page[0]["id"], "last_id": page[-1]["id"]})
+        pipeline.save_json(company_id, path, {"page": index, "offset": offset, "comments": page})
+        page.clear()
+
+    for start, stop in _chunks(n_comments):
+        departments = rng.integers(0, len(dept_ids), stop - start).tolist()
+        for ordinal, dept in zip(range(start, stop), departments):
+            source = ordinal % len(sources)
+            comment = {**sources[source], "id": f"c{ordinal + 1:07d}", "department": dept_ids[dept]}
+            comment_check(comment, f"$.comments[{ordinal}]", errors)
+            if errors:
+                raise ValueError(errors[0])
+            sentiments[comment["sentiment"]] += 1
+            keys = {"department": [comment["department"]], "themes": comment["themes"],
+                    "sentiment": [comment["sentiment"]], "dimension": [comment["dimension"]],
+                    "month": [comment["date"][:7]] if comment["date"] else []}
+            for field, values in keys.items():
+                for key in set(values):
+                    fields[field].setdefault(key, array("I")).append(ordinal)
+            for tok in tokens[source]:
+                terms.setdefault(tok, array("I")).append(ordinal)
+            page.append(comment)
+            if len(page) == pipeline.COMMENT_SHARD_SIZE:
+                flush()
+    if page:
+        flush()
+
+    def deltas(postings):
+        return lambda: np.diff(np.frombuffer(postings, dtype=np.uint32).astype(np.int64), prepend=0)
+
+    write_streamed(tenant_dir / pipeline.COMMENT_INDEX_FILE, {
+        "version": INDEX_VERSION, "encoding": "delta", "total": n_comments,
+        "fields": {field: {key: deltas(p) for key, p in sorted(keys.items())} for field, keys in fields.items()},
+        "terms": {tok: deltas(p) for tok, p in sorted(terms.items())},
+    })
+    return pages, sentiments
+
+
+# ─── One fixture ─────────────────────────────────────────────────────────────
+
+def generate_fixture(company_id, company, n_comments, output):
+    """Write one fixture tenant under output/company_id; returns {document: bytes} for the streamed files."""
+    pipeline.init_worker(pipeline.TEMPLATE_DIR, output, False, "tree")
+    *_, values, _, failures, _, _ = pipeline.generate_tenant((company_id, company, 0))
+    if failures:
+        name, errors = next(iter(failures.items()))
+        raise ValueError(f"{company_id}/{name} failed validation: {errors[0]}")
+    sketches = {}
+    benchmarks.observe_values(sketches, values)
+    pipeline.finalize_tenant(company_id, company["industry"], sketches)
+
+    tenant_dir = Path(output) / company_id
+    rng = np.random.default_rng(pipeline.tenant_seed(company_id))
+    sizes = {}
+    try:
+        errors = []
+        pages, sentiments = write_comments(company_id, company, pipeline._templates["text_analysis_data.json"]["comments"],
+                                           n_comments, rng, tenant_dir, errors)
+        text = json.loads((tenant_dir / "text_analysis_data.json").read_text(encoding="utf-8"))
+        text["total_comments"] = max(text["total_comments"], n_comments)
+        text["sentiment_summary"] = {**sentiments, "total": n_comments}
+        text["comment_shards"] = {"page_size": pipeline.COMMENT_SHARD_SIZE, "total": n_comments, "pages": pages,
+                                  "index": pipeline.COMMENT_INDEX_FILE}
+        failures = validation.validate_tenant({"text_analysis_data.json": text})
+        if failures:
+            raise ValueError(failures["text_analysis_data.json"][0])
+        pipeline.save_json(company_id, "text_analysis_data.json", text)
+        sizes["text_analysis/"] = sum(f.stat().st_size for f in (tenant_dir / pipeline.COMMENT_SHARD_DIR).iterdir())
+
+        base = json.loads((tenant_dir / "clustering_data.json").read_text(encoding="utf-8"))
+        people = respondent_arrays(rng, company["employee_count"], company,
+                                   [node for node in base["nodes"] if node["type"] == "theme"],
+                                   [p["id"] for p in base["filters"]["profiles"]])
+        doc, skeleton = clustering_document(base, company, people, n_comments, errors)
+        sizes["clustering_data.json"] = write_streamed(tenant_dir / "clustering_data.json", doc)
+        errors = validation.validate_document("clustering_data.json", skeleton())
+        if errors:
+            raise ValueError(errors[0])
+    except ValueError as e:
+        shutil.rmtree(tenant_dir, ignore_errors=True)
+        raise ValueError(f"{company_id}: {e}") from None
+    return sizes
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KiB on Linux
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Write enterprise-size fixture tenants for frontend load testing.")
+    parser.add_argument("--output", type=Path, required=True, help="data directory to write fixture tenants into")
+    parser.add_argument("--respondents", type=int, nargs="+", default=RESPONDENTS,
+                        help="respondents per fixture, one fixture each (default: %(default)s)")
+    parser.add_argument("--departments", type=int, default=DEPARTMENTS, help="departments per fixture")
+    parser.add_argument("--comments", type=int, default=None,
+                        help=f"comments per fixture (default: {COMMENTS_PER_RESPONDENT} per respondent)")
+    parser.add_argument("--id", default=None,
+                        help="tenant id for a single fixture, e.g. a bundled company so the dashboard shows it "
+                             "(default: fixture_<respondents>)")
+    parser.add_argument("--tenants", type=Path, default=TENANTS_PATH,
+                        help="tenant config; its first tenant is resized for every fixture")
+    parser.add_argument("--memory-budget", type=int, default=MEMORY_BUDGET_MB, metavar="MB",
+                        help="fail if peak RSS exceeds this")
+    args = parser.parse_args(argv)
+    if args.id is not None and len(args.respondents) != 1:
+        parser.error("--id needs exactly one --respondents size")
+
+    pipeline.VERBOSE = False
+    _, base_company = next(iter_tenants(args.tenants))
+    for n in args.respondents:
+        company_id = args.id or (f"fixture_{n // 1000}k" if n % 1000 == 0 else f"fixture_{n}")
+        n_comments = args.comments if args.comments is not None else COMMENTS_PER_RESPONDENT * n
+        company = resize_tenant(base_company, n, args.departments)
+        started = time.perf_counter()
+        sizes = generate_fixture(company_id, company, n_comments, args.output)
+        rss = peak_rss_mb()
+        print(f"{company_id}: {n} respondents, {args.departments} departments, {n_comments} comments "
+              f"in {time.perf_counter() - started:.1f}s, peak RSS {rss:.0f} MB")
+        for name, size in sizes.items():
+            print(f"  {name:<24} {size / 2 ** 20:9.1f} MB")
+        if rss > args.memory_budget:
+            print(f"  peak RSS {rss:.0f} MB exceeds the {args.memory_budget} MB budget", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
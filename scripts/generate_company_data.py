@@ -11,56 +11,28 @@ import random
 import re
 from pathlib import Path
 
+import numpy as np
+
+from tenant_config import TENANTS_PATH, iter_tenants
+
 random.seed(42)
 
 BASE_DIR = Path(__file__).parent.parent / "public" / "data"
 
-COMPANIES = {
-    "novatech": {
-        "name": "NovaTech Solutions",
-        "industry": "Tech / SaaS",
-        "employees": 450,
-        "departments": [
-            "Engineering", "Product", "Design", "DevOps", "Data Science",
-            "Sales", "Customer Success", "Marketing", "People Ops", "Finance"
-        ],
-        "score_offset": 0.05,   # strong innovation
-        "narrative": "strong_innovation",
-    },
-    "meridian": {
-        "name": "Meridian Stores",
-        "industry": "Retail",
-        "employees": 1200,
-        "departments": [
-            "Ventas Tienda", "Logística", "E-Commerce", "Marketing", "RRHH",
-            "Finanzas", "Compras", "Atención al Cliente", "IT", "Operaciones"
-        ],
-        "score_offset": -0.05,
-        "narrative": "good_cohesion",
-    },
-    "atlas": {
-        "name": "Atlas Capital Group",
-        "industry": "Finanzas",
-        "employees": 350,
-        "departments": [
-            "Banca Privada", "Cumplimiento", "Riesgos", "Tesorería", "Operaciones",
-            "Tecnología", "Legal", "Auditoría", "RRHH", "Marketing"
-        ],
-        "score_offset": 0.1,
-        "narrative": "conservative_culture",
-    },
-    "vitacore": {
-        "name": "VitaCore Health",
-        "industry": "Salud",
-        "employees": 800,
-        "departments": [
-            "Medicina General", "Enfermería", "Farmacia", "Laboratorio", "Administración",
-            "TI Salud", "Recursos Humanos", "Calidad", "Urgencias", "Investigación"
-        ],
-        "score_offset": 0.0,
-        "narrative": "strong_purpose",
-    },
-}
+# Also emit heatmap.cells (one dict per segment × dimension) next to the matrix
+HEATMAP_LEGACY_CELLS = False
+
+
+def legacy_company(company: dict) -> dict:
+    """Adapt a tenant config (see tenant_config.py) to the fields these transforms use."""
+    return {
+        "name": company["name"],
+        "industry": company["industry"],
+        "employees": company["employee_count"],
+        "departments": [name for _, name in company["departments"]],
+        "score_offset": company.get("score_offset", 0.0),
+        "narrative": company.get("narrative", ""),
+    }
 
 
 def jitter(base_offset: float, magnitude: float = 0.15) -> float:
@@ -208,7 +180,7 @@ def transform_demographics(data: dict, company: dict) -> dict:
 # ============================================================
 # segmentation_data.json
 # ============================================================
-def transform_segmentation(data: dict, company: dict) -> dict:
+def transform_segmentation(data: dict, company: dict, include_cells: bool = HEATMAP_LEGACY_CELLS) -> dict:
     out = copy.deepcopy(data)
     new_depts = company["departments"]
     emp = company["employees"]
@@ -259,39 +231,48 @@ def transform_segmentation(data: dict, company: dict) -> dict:
         for dim in seg.get("dimensions", []):
             dim["avg_score"] = round(clamp(dim["avg_score"] + jitter(offset, 0.1)), 2)
 
-    # Rebuild heatmap
+    # Rebuild heatmap as dense segment × dimension matrices
     heatmap = out.get("heatmap", {})
-    if heatmap:
-        heatmap["segments"] = [d["segment_name"] for d in new_by_dept]
-        heatmap["segment_keys"] = [d["segment_id"] for d in new_by_dept]
-        new_cells = []
-        for dept in new_by_dept:
-            for dim in dept.get("dimensions", []):
-                new_cells.append({
-                    "segment": dept["segment_id"],
-                    "segment_name": dept["segment_name"],
-                    "dimension": dim["dimension_code"],
-                    "dimension_name": dim["dimension_name"],
-                    "score": dim["avg_score"],
-                    "favorability": dim["favorability_pct"],
-                    "color": _score_to_color(dim["avg_score"]),
-                })
-        heatmap["cells"] = new_cells
+    if heatmap and new_by_dept:
+        dims = new_by_dept[0].get("dimensions", [])
+        scores = np.array([[d["avg_score"] for d in dept["dimensions"]] for dept in new_by_dept])
+        favorability = np.array([[d["favorability_pct"] for d in dept["dimensions"]] for dept in new_by_dept])
+        heatmap.clear()
+        heatmap.update({
+            "segments": [d["segment_name"] for d in new_by_dept],
+            "segment_keys": [d["segment_id"] for d in new_by_dept],
+            "dimensions": [d["dimension_name"] for d in dims],
+            "dimension_keys": [d["dimension_code"] for d in dims],
+            "scores": scores.tolist(),
+            "favorability": favorability.tolist(),
+            "color_bins": {"thresholds": COLOR_THRESHOLDS, "colors": COLOR_BINS},
+        })
+        if include_cells:
+            colors = _scores_to_colors(scores)
+            heatmap["cells"] = [
+                {
+                    "segment": seg_key,
+                    "segment_name": seg_name,
+                    "dimension": dim_key,
+                    "dimension_name": dim_name,
+                    "score": float(scores[i, j]),
+                    "favorability": float(favorability[i, j]),
+                    "color": str(colors[i, j]),
+                }
+                for i, (seg_key, seg_name) in enumerate(zip(heatmap["segment_keys"], heatmap["segments"]))
+                for j, (dim_key, dim_name) in enumerate(zip(heatmap["dimension_keys"], heatmap["dimensions"]))
+            ]
 
     return out
 
 
-def _score_to_color(score: float) -> str:
-    if score >= 4.5:
-        return "#22c55e"
-    elif score >= 4.0:
-        return "#3b82f6"
-    elif score >= 3.5:
-        return "#f59e0b"
-    elif score >= 3.0:
-        return "#f97316"
-    else:
-        return "#ef4444"
+# Heatmap color bins, lowest first: <3.0, 3.0-3.5, 3.5-4.0, 4.0-4.5, >=4.5
+COLOR_THRESHOLDS = [3.0, 3.5, 4.0, 4.5]
+COLOR_BINS = ["#ef4444", "#f97316", "#f59e0b", "#3b82f6", "#22c55e"]
+
+
+def _scores_to_colors(scores: np.ndarray) -> np.ndarray:
+    return np.asarray(COLOR_BINS)[np.digitize(scores, COLOR_THRESHOLDS)]
 
 
 # ============================================================
@@ -622,7 +603,9 @@ def main():
         print(f"Loaded {filename}")
 
     # Generate for each company
-    for company_id, company_info in COMPANIES.items():
+    generated = 0
+    for company_id, tenant in iter_tenants(TENANTS_PATH):
+        company_info = legacy_company(tenant)
         company_dir = BASE_DIR / company_id
         company_dir.mkdir(parents=True, exist_ok=True)
 
@@ -634,9 +617,10 @@ def main():
             with open(output_path, "w", encoding="utf-8") as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
 
+        generated += 1
         print(f"Generated {len(TRANSFORMS)} files for {company_info['name']} -> {company_dir}")
 
-    print(f"\nDone! Generated {len(COMPANIES) * len(TRANSFORMS)} total files.")
+    print(f"\nDone! Generated {generated * len(TRANSFORMS)} total files.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+"""
+Per-stage instrumentation for the generation pipeline.
+
+Each measured stage records, for one (company, stage, file):
+
+    wall_s, cpu_s   perf_counter / process_time deltas
+    peak_bytes      tracemalloc peak inside the stage, above what was live at its start
+                    (None unless trace_memory)
+    blocks          net change in allocated memory blocks (sys.getallocatedblocks), a cheap object count
+    bytes           bytes encoded or written by the stage
+    calls           1, or the number of calls folded into a helper record
+
+Stages nest: "generate_clustering" includes the "deepcopy" and
+"deep_replace_refs" helper records made inside it, so totals are
+inclusive. Recording is per process and off until enable(); workers return
+drain() to the parent with their results, and the parent writes the run
+report (JSON), a Prometheus textfile and the slowest-stages table.
+
+tracemalloc makes allocation-heavy code several times slower; wall times
+from a --trace-memory run are only good for comparing stages with each other.
+"""
+
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+RECORD_FIELDS = ("company", "stage", "file", "wall_s", "cpu_s", "peak_bytes", "blocks", "bytes", "calls")
+PROM_PREFIX = "mri_pipeline"
+TOP_STAGES = 15            # rows in the slowest-stages table
+
+_state = {"enabled": False, "trace_memory": False, "records": [], "active": [], "helpers": {}}
+
+
+def enable(trace_memory=False):
+    _state["enabled"], _state["trace_memory"] = True, trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def enabled():
+    return _state["enabled"]
+
+
+# ─── Recording ───────────────────────────────────────────────────────────────
+
+def _carry_peak(peak):
+    """tracemalloc has one global peak: before it is reset, hand it to the enclosing stage."""
+    if _state["active"]:
+        outer = _state["active"][-1]
+        outer["_peak"] = max(outer.get("_peak", 0), peak)
+
+
+@contextmanager
+def _measure(company, name, file):
+    record = {"company": company, "stage": name, "file": file, "bytes": 0, "peak_bytes": None}
+    trace = _state["trace_memory"]
+    if trace:
+        start_bytes, peak = tracemalloc.get_traced_memory()
+        _carry_peak(peak)
+        tracemalloc.reset_peak()
+    _state["active"].append(record)
+    blocks = sys.getallocatedblocks()
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["wall_s"] = time.perf_counter() - wall
+        record["cpu_s"] = time.process_time() - cpu
+        record["blocks"] = sys.getallocatedblocks() - blocks
+        record["calls"] = 1
+        _state["active"].pop()
+        if trace:
+            peak = max(tracemalloc.get_traced_memory()[1], record.get("_peak", 0))
+            record["peak_bytes"] = peak - start_bytes   # above what was live when the stage started
+            _carry_peak(peak)
+        _state["records"].append(tuple(record[f] for f in RECORD_FIELDS))
+
+
+def stage(company, name, file=None):
+    """Context manager measuring one stage; a no-op unless enable() was called."""
+    if not _state["enabled"]:
+        return nullcontext()
+    return _measure(company, name, file)
+
+
+def add_bytes(n):
+    """Credit n encoded/written bytes to the innermost active stage."""
+    for record in reversed(_state["active"]):
+        if "helper" not in record:
+            record["bytes"] += n
+            return
+
+
+def timed(name):
+    """Decorator folding every call of a helper into one record per (company, name).
+
+    Recursive calls are not double-counted, and calls outside any stage are
+    not recorded.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            active = _state["active"]
+            if not _state["enabled"] or not active or active[-1].get("helper") == name:
+                return fn(*args, **kwargs)
+            company = active[-1]["company"]
+            marker = {"company": company, "helper": name, "bytes": 0}
+            active.append(marker)
+            cpu = time.process_time()
+            wall = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                totals = _state["helpers"].setdefault((company, name), [0.0, 0.0, 0])
+                totals[0] += time.perf_counter() - wall
+                totals[1] += time.process_time() - cpu
+                totals[2] += 1
+                active.pop()
+        return wrapper
+    return decorate
+
+
+def drain():
+    """Records made since the last drain (helper totals folded in), as tuples in RECORD_FIELDS order."""
+    records = _state["records"]
+    for (company, name), (wall, cpu, calls) in _state["helpers"].items():
+        records.append((company, name, None, wall, cpu, None, 0, 0, calls))
+    _state["records"], _state["helpers"] = [], {}
+    return records
+
+
+# ─── Summaries ───────────────────────────────────────────────────────────────
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(records):
+    """Per-stage aggregates, slowest (by total wall time) first."""
+    by_stage = {}
+    for rec in records:
+        by_stage.setdefault(rec[1], []).append(rec)
+    summary = []
+    for name, recs in by_stage.items():
+        walls = [r[3] for r in recs]
+        peaks = [r[5] for r in recs if r[5] is not None]
+        summary.append({
+            "stage": name,
+            "calls": sum(r[8] for r in recs),
+            "records": len(recs),
+            "wall_s": sum(walls),
+            "cpu_s": sum(r[4] for r in recs),
+            "wall_p50_s": _percentile(walls, 0.5),
+            "wall_p95_s": _percentile(walls, 0.95),
+            "wall_max_s": max(walls),
+            "peak_bytes_max": max(peaks) if peaks else None,
+            "blocks": sum(r[6] for r in recs),
+            "bytes": sum(r[7] for r in recs),
+        })
+    summary.sort(key=lambda s: -s["wall_s"])
+    return summary
+
+
+def format_table(summary, top=TOP_STAGES):
+    lines = [f"{'stage':<28} {'calls':>7} {'total s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+             f"{'cpu s':>8} {'peak MB':>8} {'out MB':>8}"]
+    for s in summary[:top]:
+        peak = f"{s['peak_bytes_max'] / 2 ** 20:8.1f}" if s["peak_bytes_max"] is not None else f"{'-':>8}"
+        lines.append(f"{s['stage']:<28} {s['calls']:>7} {s['wall_s']:>9.2f} {s['wall_p50_s'] * 1000:>8.1f} "
+                     f"{s['wall_p95_s'] * 1000:>8.1f} {s['wall_max_s'] * 1000:>8.1f} {s['cpu_s']:>8.2f} "
+                     f"{peak} {s['bytes'] / 2 ** 20:>8.2f}")
+    return "\n".join(lines)
+
+
+def _atomic_write(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_report(path, records, summary, run):
+    """JSON run report: run info, per-stage summary and every (company, stage, file) record."""
+    _atomic_write(path, json.dumps({
+        "run": run,
+        "stages": summary,
+        "fields": list(RECORD_FIELDS),
+        "records": records,
+    }, ensure_ascii=False, separators=(",", ":")))
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_prometheus(path, records, summary, run):
+    """Prometheus textfile (node_exporter textfile collector format), aggregated by stage and by file."""
+    p = PROM_PREFIX
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {p}_{name} {help_text}")
+        lines.append(f"# TYPE {p}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            lines.append(f"{p}_{name}{{{label_text}}} {value:.6g}" if label_text else f"{p}_{name} {value:.6g}")
+
+    metric("stage_seconds_total", "counter", "Wall time spent in a stage, summed over tenants.",
+           [({"stage": s["stage"]}, s["wall_s"]) for s in summary])
+    metric("stage_cpu_seconds_total", "counter", "CPU time spent in a stage, summed over tenants.",
+           [({"stage": s["stage"]}, s["cpu_s"]) for s in summary])
+    metric("stage_calls_total", "counter", "Calls of a stage.",
+           [({"stage": s["stage"]}, s["calls"]) for s in summary])
+    metric("stage_seconds_p95", "gauge", "95th percentile wall time of one stage call.",
+           [({"stage": s["stage"]}, s["wall_p95_s"]) for s in summary])
+    metric("stage_peak_bytes", "gauge", "Largest tracemalloc peak seen in a stage.",
+           [({"stage": s["stage"]}, s["peak_bytes_max"]) for s in summary if s["peak_bytes_max"] is not None])
+    by_file = {}
+    for rec in records:
+        if rec[2] is not None and rec[1] == "write":
+            by_file[rec[2]] = by_file.get(rec[2], 0) + rec[7]
+    metric("file_bytes_written_total", "counter", "Bytes written per document name, summed over tenants.",
+           [({"file": f}, n) for f, n in sorted(by_file.items())])
+    metric("run_tenants", "gauge", "Tenants generated in the last run.", [({}, run["tenants"])])
+    metric("run_seconds", "gauge", "Wall time of the last run.", [({}, run["seconds"])])
+    metric("run_timestamp_seconds", "gauge", "Unix time the last run finished.", [({}, run["finished_at"])])
+    _atomic_write(path, "\n".join(lines) + "\n")
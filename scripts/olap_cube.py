@@ -0,0 +1,202 @@
+"""
+Precomputed OLAP cube: year × department × tenure × gender × generation × dimension.
+
+Synthetic respondents are drawn per year so that every demographic marginal
+matches clima_demographics.json and every dimension is centered on the
+clima_v2 score for that year. Their scores are then aggregated into dense
+sums / counts / favorable-counts with a single ``np.bincount`` over combined
+cell codes.
+
+On disk the cube is a tiny JSON header (axis labels, shape, dtypes, byte
+offsets) plus one little-endian binary blob with the typed arrays, so a
+drill-down such as "2025, Logística, 1-3 años" is an array reduction over
+the loaded cube, never a new pipeline run.
+
+The cube is a non-authoritative synthetic view. Its respondents are drawn
+around clima_v2 (clipped to [1, 5], favorable at >= 4.0), so its year ×
+dimension margins only approximate the clima_v2 scores and favorability.
+Headline figures, year_comparison included, come from clima_v2 itself, and
+the header says so with ``"synthetic": true``.
+"""
+
+import json
+
+import numpy as np
+
+AXES = ("year", "department", "tenure", "gender", "generation", "dimension")
+FAVORABLE_THRESHOLD = 4.0
+HEADER_FILE = "cube/olap_cube.json"
+DATA_FILE = "cube/olap_cube.bin"
+
+
+def _categorical(counts, n, rng):
+    """n category codes whose histogram follows ``counts`` (exactly when they sum to n)."""
+    counts = np.asarray(counts, dtype=np.int64)
+    codes = np.repeat(np.arange(len(counts)), counts)
+    if len(codes) < n:
+        probs = counts / counts.sum()
+        codes = np.concatenate([codes, rng.choice(len(counts), n - len(codes), p=probs)])
+    return rng.permutation(codes)[:n]
+
+
+def synthesize_respondents(clima_data, demographics_data, dim_codes, rng, dept_spread=0.15):
+    """Draw respondent-level category codes and dimension scores for every year.
+
+    Returns (labels, codes, scores): labels maps each non-dimension axis to
+    its label list, codes is an (N × 5) int array over year / department /
+    tenure / gender / generation, scores is an (N × K) float array with NaN
+    for dimensions not surveyed that year.
+    """
+    years = sorted(demographics_data["years"])
+    first = demographics_data["years"][years[0]]["demographics"]
+    labels = {
+        "year": years,
+        "department": list(first["departments"]),
+        "tenure": list(first["tenures"]),
+        "gender": list(first["genders"]),
+        "generation": list(first["generations"]),
+    }
+
+    # Department effects are fixed across years so trends stay coherent
+    dept_effect = rng.normal(0, dept_spread, (len(labels["department"]), len(dim_codes)))
+    dept_effect -= dept_effect.mean(axis=0)
+
+    code_blocks, score_blocks = [], []
+    for y, year in enumerate(years):
+        demo = demographics_data["years"][year]["demographics"]
+        n = int(demographics_data["years"][year]["ficha_tecnica"]["sample_n"])
+        clima_dims = {d["dimension_code"]: d for d in clima_data["years"][year]["dimensions"]}
+        mu = np.array([clima_dims[c]["avg_score"] if c in clima_dims else np.nan for c in dim_codes])
+        sd = np.array([clima_dims[c].get("std_score", 0.6) if c in clima_dims else 0.0 for c in dim_codes])
+
+        codes = np.column_stack([
+            np.full(n, y),
+            _categorical([demo["departments"].get(l, 0) for l in labels["department"]], n, rng),
+            _categorical([demo["tenures"].get(l, 0) for l in labels["tenure"]], n, rng),
+            _categorical([demo["genders"].get(l, 0) for l in labels["gender"]], n, rng),
+            _categorical([demo["generations"].get(l, 0) for l in labels["generation"]], n, rng),
+        ])
+        scores = mu + dept_effect[codes[:, 1]] + rng.normal(0, 1, (n, len(dim_codes))) * sd
+        code_blocks.append(codes)
+        score_blocks.append(np.clip(scores, 1.0, 5.0))
+
+    return labels, np.concatenate(code_blocks), np.concatenate(score_blocks)
+
+
+def build_cube(labels, codes, scores, dim_codes):
+    """Aggregate respondents into dense cube arrays with one bincount per measure."""
+    shape = tuple(len(labels[a]) for a in AXES[:-1])
+    n_dims = len(dim_codes)
+    cell = np.ravel_multi_index(codes.T, shape)
+    n_cells = int(np.prod(shape))
+
+    # Combined (cell, dimension) code so all 17 dimensions reduce in one pass;
+    # counts are per dimension because not every year surveyed every dimension
+    cell_dim = (cell[:, None] * n_dims + np.arange(n_dims)).ravel()
+    answered = ~np.isnan(scores)
+    size = n_cells * n_dims
+    sums = np.bincount(cell_dim, weights=np.where(answered, scores, 0.0).ravel(), minlength=size)
+    favorable = np.bincount(cell_dim, weights=(answered & (np.nan_to_num(scores) >= FAVORABLE_THRESHOLD)).ravel(),
+                            minlength=size)
+    counts = np.bincount(cell_dim, weights=answered.ravel(), minlength=size)
+
+    count_dtype = np.min_scalar_type(max(1, int(counts.max())))
+    full_shape = shape + (n_dims,)
+    return {
+        "axes": {**labels, "dimension": list(dim_codes)},
+        "sums": sums.reshape(full_shape).astype(np.float32),
+        "favorable": favorable.reshape(full_shape).astype(count_dtype),
+        "counts": counts.reshape(full_shape).astype(count_dtype),
+    }
+
+
+def encode_cube(cube):
+    """Serialize to (header, blob). Arrays are little-endian and C-ordered."""
+    header = {"axes": [{"name": a, "labels": cube["axes"][a]} for a in AXES],
+              "data_file": DATA_FILE, "synthetic": True, "arrays": {}}
+    chunks = []
+    offset = 0
+    for name in ("sums", "favorable", "counts"):
+        arr = np.ascontiguousarray(cube[name], dtype=cube[name].dtype.newbyteorder("<"))
+        raw = arr.tobytes()
+        header["arrays"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape),
+                                  "offset": offset, "nbytes": len(raw)}
+        chunks.append(raw)
+        offset += len(raw)
+    return header, b"".join(chunks)
+
+
+def decode_cube(header, blob):
+    """Inverse of encode_cube; arrays are zero-copy views over the blob."""
+    cube = {"axes": {a["name"]: a["labels"] for a in header["axes"]}}
+    for name, spec in header["arrays"].items():
+        arr = np.frombuffer(blob, dtype=np.dtype(spec["dtype"]), count=int(np.prod(spec["shape"])),
+                            offset=spec["offset"])
+        cube[name] = arr.reshape(spec["shape"])
+    return cube
+
+
+def write_cube(cube, outdir):
+    """Write header + blob under outdir; returns the header."""
+    header, blob = encode_cube(cube)
+    (outdir / DATA_FILE).parent.mkdir(parents=True, exist_ok=True)
+    with open(outdir / DATA_FILE, "wb") as f:
+        f.write(blob)
+    with open(outdir / HEADER_FILE, "w", encoding="utf-8") as f:
+        json.dump(header, f, ensure_ascii=False, separators=(",", ":"))
+    return header
+
+
+def read_cube(outdir):
+    with open(outdir / HEADER_FILE, "r", encoding="utf-8") as f:
+        header = json.load(f)
+    with open(outdir / header["data_file"], "rb") as f:
+        return decode_cube(header, f.read())
+
+
+def slice_cube(cube, **selection):
+    """Fix axes to one label or a list of labels, e.g. slice_cube(c, year="2025", tenure=["1-3 años"]).
+
+    A single label drops the axis; a list keeps it with just those labels.
+    """
+    axes = {}
+    arrays = {name: cube[name] for name in ("sums", "favorable", "counts")}
+    pos = 0
+    for a in (a for a in AXES if a in cube["axes"]):
+        labels = cube["axes"][a]
+        sel = selection.get(a)
+        if sel is None:
+            axes[a] = labels
+            pos += 1
+            continue
+        if isinstance(sel, (list, tuple)):
+            idx, axes[a] = [labels.index(s) for s in sel], list(sel)
+        else:
+            idx = labels.index(sel)
+        for name, arr in arrays.items():
+            arrays[name] = np.take(arr, idx, axis=pos)
+        if a in axes:
+            pos += 1
+    return {"axes": axes, **arrays}
+
+
+def rollup(cube, keep):
+    """Sum out every axis not in ``keep`` (dimension is always kept)."""
+    kept = [a for a in AXES if a in cube["axes"]]
+    drop = tuple(i for i, a in enumerate(kept) if a not in keep and a != "dimension")
+    return {
+        "axes": {a: cube["axes"][a] for a in kept if a in keep or a == "dimension"},
+        "sums": cube["sums"].sum(axis=drop, dtype=np.float64),
+        "favorable": cube["favorable"].sum(axis=drop, dtype=np.int64),
+        "counts": cube["counts"].sum(axis=drop, dtype=np.int64),
+    }
+
+
+def cube_scores(cube):
+    """(avg_score, favorability_pct, n) arrays; NaN where a cell is empty."""
+    n = cube["counts"].astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = cube["sums"] / n
+        fav = cube["favorable"] / n * 100
+    return avg, fav, cube["counts"]
+
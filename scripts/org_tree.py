@@ -0,0 +1,205 @@
+"""
+Hierarchical org-tree segmentation.
+
+A company may define an ``org_tree`` (division → department → team, any
+depth) in its config. The tree is flattened into parent-index arrays, leaf
+teams get respondent counts and 17 dimension scores, and every ancestor is
+filled in with one respondent-weighted roll-up over (leaf, ancestor) pairs.
+Nodes under the minimum-n threshold are suppressed in the output, but still
+count towards their ancestors.
+
+Tree node shape in the company config:
+
+    {"id": "ops", "name": "Operaciones", "respondents": 40, "children": [...]}
+
+``respondents`` is only read on leaves; when missing, the company's
+respondents are spread across leaves at random.
+
+Nodes whose figures are already fixed elsewhere (the segmentation
+departments) are passed in as anchors. Their leaves share the anchor's
+respondents and scatter around its scores with a zero weighted mean, so the
+roll-up reproduces the anchor exactly.
+"""
+
+import numpy as np
+
+MIN_N = 5
+DEFAULT_LEVEL_NAMES = ["company", "division", "department", "team"]
+
+
+def default_org_tree(company_id, company):
+    """Two-level tree (company → departments) for companies without an org_tree."""
+    return {
+        "id": company_id,
+        "name": company["name"],
+        "children": [{"id": dept_id, "name": dept_name} for dept_id, dept_name in company["departments"]],
+    }
+
+
+def flatten_tree(root):
+    """Breadth-first flatten, so every parent precedes its children.
+
+    Returns (ids, names, parent, level, leaf_respondents) where parent is an
+    int array (-1 for the root) and leaf_respondents holds the configured
+    count for leaves (-1 where unset, 0 for inner nodes).
+    """
+    ids, names, parent, level, leaf_resp = [], [], [], [], []
+    queue = [(root, -1, 0)]
+    head = 0
+    while head < len(queue):
+        node, parent_idx, depth = queue[head]
+        idx = head
+        head += 1
+        children = node.get("children") or []
+        ids.append(node["id"])
+        names.append(node.get("name", node["id"]))
+        parent.append(parent_idx)
+        level.append(depth)
+        leaf_resp.append(0 if children else node.get("respondents", -1))
+        queue.extend((child, idx, depth + 1) for child in children)
+    return ids, names, np.array(parent), np.array(level), np.array(leaf_resp)
+
+
+def ancestor_pairs(parent, leaves):
+    """(leaf, ancestor) index pairs, including each leaf paired with itself."""
+    leaf_idx, anc_idx = [], []
+    cur = leaves.copy()
+    owner = leaves.copy()
+    while cur.size:
+        leaf_idx.append(owner)
+        anc_idx.append(cur)
+        cur = parent[cur]
+        keep = cur >= 0
+        cur, owner = cur[keep], owner[keep]
+    return np.concatenate(leaf_idx), np.concatenate(anc_idx)
+
+
+def nearest_anchor(ids, parent, anchors):
+    """Index of the closest anchored node at or above each node (-1 where none)."""
+    anchor = np.full(len(ids), -1)
+    for i, node_id in enumerate(ids):  # breadth-first: parents are set first
+        if node_id in anchors:
+            anchor[i] = i
+        elif parent[i] >= 0:
+            anchor[i] = anchor[parent[i]]
+    return anchor
+
+
+def rollup_org_tree(root, global_scores, total_respondents, rng, min_n=MIN_N, anchors=None):
+    """Compute respondent-weighted dimension scores for every node.
+
+    global_scores is a length-D array (one per dimension). anchors maps node
+    id to (respondents, length-D scores); leaves under an anchor take their
+    counts and scores from it (configured leaf counts are ignored there), the
+    other leaves split what is left of total_respondents. Returns a dict of
+    flat arrays: ids, names, parent, level, respondents (int), scores (N × D)
+    and suppressed (bool).
+    """
+    anchors = anchors or {}
+    ids, names, parent, level, leaf_resp = flatten_tree(root)
+    n_nodes = len(ids)
+    is_leaf = np.ones(n_nodes, dtype=bool)
+    is_leaf[parent[parent >= 0]] = False
+    leaves = np.flatnonzero(is_leaf)
+    group = nearest_anchor(ids, parent, anchors)[leaves]
+    anchored = group >= 0
+    groups = np.unique(group[anchored])
+    anchor_n = np.array([anchors[ids[g]][0] for g in groups], dtype=np.int64)
+    anchor_scores = np.array([anchors[ids[g]][1] for g in groups], dtype=float).reshape(len(groups), len(global_scores))
+    slot = np.searchsorted(groups, group[anchored])
+
+    # Leaf respondents: anchors are split across their leaves; elsewhere configured
+    # counts win and the remainder is spread at random
+    counts = leaf_resp[leaves].astype(np.int64)
+    weights = rng.uniform(0.6, 1.4, len(leaves))
+    for g, n in enumerate(anchor_n):
+        members = np.flatnonzero(anchored)[slot == g]
+        counts[members] = rng.multinomial(n, weights[members] / weights[members].sum())
+    unset = (counts < 0) & ~anchored
+    if unset.any():
+        remaining = max(0, total_respondents - anchor_n.sum() - counts[~unset & ~anchored].sum())
+        counts[unset] = rng.multinomial(remaining, weights[unset] / weights[unset].sum())
+
+    # Leaf scores: global profile plus a per-team lean and per-dimension noise
+    n_dims = len(global_scores)
+    lean = rng.uniform(-0.3, 0.3, (len(leaves), 1))
+    noise = rng.uniform(-0.15, 0.15, (len(leaves), n_dims))
+    leaf_scores = np.clip(global_scores + lean + noise, 1.0, 5.0)
+    if len(groups):
+        # Anchored leaves: deviations re-centred to a zero weighted mean per anchor,
+        # then shrunk where needed so every score stays inside [1, 5]
+        dev = (lean + noise)[anchored]
+        w = counts[anchored].astype(float)
+        total_w = np.bincount(slot, weights=w, minlength=len(groups))
+        mean = np.zeros((len(groups), n_dims))
+        np.add.at(mean, slot, dev * w[:, None])
+        dev -= (mean / np.maximum(total_w, 1)[:, None])[slot]
+        base = anchor_scores[slot]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            room = np.where(dev > 0, (5.0 - base) / dev, np.where(dev < 0, (1.0 - base) / dev, np.inf))
+        shrink = np.ones((len(groups), n_dims))
+        np.minimum.at(shrink, slot, room)
+        leaf_scores[anchored] = base + dev * shrink[slot]
+
+    # Single bottom-up roll-up: scatter each leaf's weighted sum onto all ancestors
+    leaf_pos = np.full(n_nodes, -1)
+    leaf_pos[leaves] = np.arange(len(leaves))
+    pair_leaf, pair_anc = ancestor_pairs(parent, leaves)
+    pos = leaf_pos[pair_leaf]
+    respondents = np.bincount(pair_anc, weights=counts[pos], minlength=n_nodes).astype(np.int64)
+    sums = np.zeros((n_nodes, n_dims))
+    np.add.at(sums, pair_anc, leaf_scores[pos] * counts[pos, None])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.where(respondents[:, None] > 0, sums / respondents[:, None], np.nan)
+
+    return {
+        "ids": ids,
+        "names": names,
+        "parent": parent,
+        "level": level,
+        "respondents": respondents,
+        "scores": scores.round(2),
+        "suppressed": respondents < min_n,
+        "min_n": min_n,
+    }
+
+
+def org_level_documents(tree, dim_codes, global_scores, level_names=None, path_template=None):
+    """Split a rolled-up tree into one document per level.
+
+    Returns (manifest, [(path, document), ...]). Suppressed nodes keep their
+    place in the tree but carry no scores.
+    """
+    level_names = level_names or DEFAULT_LEVEL_NAMES
+    path_template = path_template or "segmentation/org_level_{level}.json"
+    ids = tree["ids"]
+    parent = tree["parent"]
+    gaps = tree["scores"] - np.asarray(global_scores)
+
+    manifest = {"min_n": tree["min_n"], "dimension_codes": dim_codes, "levels": []}
+    documents = []
+    for depth in range(int(tree["level"].max()) + 1):
+        members = np.flatnonzero(tree["level"] == depth)
+        name = level_names[depth] if depth < len(level_names) else f"level_{depth}"
+        nodes = []
+        for i in members:
+            suppressed = bool(tree["suppressed"][i])
+            nodes.append({
+                "node_id": ids[i],
+                "name": tree["names"][i],
+                "parent_id": ids[parent[i]] if parent[i] >= 0 else None,
+                "respondent_count": int(tree["respondents"][i]),
+                "suppressed": suppressed,
+                "scores": None if suppressed else tree["scores"][i].tolist(),
+                "gap_vs_global": None if suppressed else gaps[i].round(2).tolist(),
+            })
+        path = path_template.format(level=depth)
+        manifest["levels"].append({
+            "level": depth,
+            "name": name,
+            "path": path,
+            "node_count": len(nodes),
+            "suppressed_count": int(tree["suppressed"][members].sum()),
+        })
+        documents.append((path, {"level": depth, "name": name, "dimension_codes": dim_codes, "nodes": nodes}))
+    return manifest, documents
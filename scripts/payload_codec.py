@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Structural payload optimization for tenant documents.
+
+Generated documents carry a lot the client can derive: clustering edges
+carry a color and width computed from their sentiment and weight, nodes a
+color, border color and size, and segment cells repeat dimension names and
+score bins. encode_document() drops a field wherever a rule from the
+declarative list in payload_fields.json gives it back exactly, then
+replaces repeated strings with indexes into one string table per file.
+decode_document() (and src/lib/payload-codec.ts on the client) restores the
+current shape; documents without the header pass through unchanged, so
+consumers can move over one at a time.
+
+An encoded document starts with its header:
+
+    "_payload": {
+      "version": 1,
+      "derived": [{"path": "edges[]", "field": "color", "rule": "lookup", "key": "sentiment",
+                   "table": {"positive": "#22c55e", ...}}, ...],
+      "strings": ["positive", "P001", ...],     most frequent first
+      "string_keys": ["sentiment", "source", ...]
+    }
+
+Under a key in string_keys, every string (also inside a list of strings)
+is an index into strings; only keys whose values are all strings, lists of
+strings or null are listed. Rules apply to the objects reached by path
+("a.b" follows keys, "[]" walks list items, "*" walks dict values) that
+match their optional "where" fields:
+
+    lookup   field = table[object[key]]; the table maps each key to its most common value
+    affine   field = min(max, offset + scale * object[of]), rounded half up to "digits" if given
+    bins     field = labels[number of thresholds <= object[of]]
+
+A rule is only used when every object it covers has the field, and the
+field is only dropped where the rule reproduces it, so decode(encode(doc))
+== doc for any document (derived fields come back as the last keys of their
+object); decoding fills a field only where it is missing.
+A rule that drifts from the generator (say, the bins rules and
+regenerate_all_data.SEGMENT_THRESHOLDS) costs bytes, never correctness.
+
+    python scripts/payload_codec.py public/data                # bytes saved per file, nothing written
+    python scripts/payload_codec.py public/data --write        # encode the documents in place
+    python scripts/payload_codec.py public/data --decode       # restore the plain shape
+
+regenerate_all_data.py --optimize-payloads writes encoded documents directly.
+"""
+
+import argparse
+import bisect
+import json
+import math
+import sys
+from collections import Counter
+from fnmatch import fnmatch
+from pathlib import Path
+
+HEADER_KEY = "_payload"
+CODEC_VERSION = 1
+FIELDS_PATH = Path(__file__).parent / "payload_fields.json"
+TABLE_ENTRY_BYTES = 10            # quotes, comma and indentation around each string-table entry
+
+_fields = {}                      # path -> {document pattern: [rule]}, loaded on first use
+
+
+def load_fields(path=FIELDS_PATH):
+    """{document name or glob: [rule]} from a derivable-fields file."""
+    path = Path(path)
+    if path not in _fields:
+        with open(path, "r", encoding="utf-8") as f:
+            _fields[path] = json.load(f)
+    return _fields[path]
+
+
+def document_rules(name, fields=None):
+    """Rules for one document, or None if the document is not optimized at all."""
+    fields = load_fields() if fields is None else fields
+    for pattern, rules in fields.items():
+        if fnmatch(name, pattern):
+            return rules
+    return None
+
+
+def is_encoded(doc):
+    return isinstance(doc, dict) and HEADER_KEY in doc
+
+
+# ─── Rules ───────────────────────────────────────────────────────────────────
+
+def _steps(path):
+    steps = []
+    for part in path.split("."):
+        name = part[:-2] if part.endswith("[]") else part
+        if name:
+            steps.append(name)
+        if part.endswith("[]"):
+            steps.append("[]")
+    return steps
+
+
+def iter_objects(doc, path):
+    """The dicts reached by a rule path."""
+    nodes = [doc]
+    for step in _steps(path):
+        reached = []
+        for node in nodes:
+            if step == "[]":
+                if isinstance(node, list):
+                    reached.extend(node)
+            elif step == "*":
+                if isinstance(node, dict):
+                    reached.extend(v for k, v in node.items() if k != HEADER_KEY)
+            elif isinstance(node, dict) and step in node:
+                reached.append(node[step])
+        nodes = reached
+    return [node for node in nodes if isinstance(node, dict)]
+
+
+def _covered(doc, rule):
+    where = rule.get("where", {})
+    return [obj for obj in iter_objects(doc, rule["path"]) if all(obj.get(k) == v for k, v in where.items())]
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _round_half_up(x):
+    """Math.round in src/lib/payload-codec.ts: nearest integer, ties toward +infinity."""
+    r = math.floor(x)
+    return r + 1 if x - r >= 0.5 else r
+
+
+def derive(rule, obj):
+    """The value a rule gives for obj, or None if obj lacks what the rule reads."""
+    kind = rule["rule"]
+    if kind == "lookup":
+        return rule["table"].get(obj.get(rule["key"])) if isinstance(obj.get(rule["key"]), str) else None
+    source = obj.get(rule["of"])
+    if not _number(source):
+        return None
+    if kind == "bins":
+        return rule["labels"][bisect.bisect_right(rule["thresholds"], source)]
+    if kind == "affine":
+        value = min(rule["max"], rule["offset"] + rule["scale"] * source) if "max" in rule \
+            else rule["offset"] + rule["scale"] * source
+        if "digits" in rule:
+            scale = 10 ** rule["digits"]
+            value = _round_half_up(value * scale) / scale
+        return int(value) if float(value).is_integer() else value
+    raise ValueError(f"unknown payload rule {kind!r}")
+
+
+def _reproduces(value, stored):
+    if _number(value) and _number(stored):
+        return value == stored
+    return value is not None and type(value) is type(stored) and value == stored
+
+
+def _plan(doc, rules):
+    """(header rules, {id(obj): fields to drop}) for the rules that apply to doc."""
+    derived, drops = [], {}
+    for rule in rules:
+        covered = _covered(doc, rule)
+        field = rule["field"]
+        if not covered or any(field not in obj for obj in covered):
+            continue
+        rule = dict(rule)
+        if rule["rule"] == "lookup":
+            counts = {}
+            for obj in covered:
+                key = obj.get(rule["key"])
+                if isinstance(key, str) and isinstance(obj[field], (str, int, float)):
+                    counts.setdefault(key, Counter())[json.dumps(obj[field])] += 1
+            rule["table"] = {key: json.loads(c.most_common(1)[0][0]) for key, c in counts.items()}
+        dropped = [obj for obj in covered if _reproduces(derive(rule, obj), obj[field])]
+        if dropped:
+            derived.append(rule)
+            for obj in dropped:
+                drops.setdefault(id(obj), set()).add(field)
+    return derived, drops
+
+
+# ─── String table ────────────────────────────────────────────────────────────
+
+def _tally(value, drops, counts, bad):
+    """Count the strings under each key, skipping dropped fields; keys holding anything else go to bad."""
+    if isinstance(value, dict):
+        dropped = drops.get(id(value), ())
+        for key, v in value.items():
+            if key in dropped or key == HEADER_KEY:
+                continue
+            if isinstance(v, str):
+                counts.setdefault(key, Counter())[v] += 1
+            elif isinstance(v, list) and all(isinstance(s, str) for s in v):
+                counts.setdefault(key, Counter()).update(v)
+            elif v is not None:
+                bad.add(key)
+                _tally(v, drops, counts, bad)
+    elif isinstance(value, list):
+        for v in value:
+            _tally(v, drops, counts, bad)
+
+
+def _string_table(doc, drops):
+    """(strings, string keys): keys with repeated strings, kept where the indexes save more than the table costs."""
+    counts, bad = {}, set()
+    _tally(doc, drops, counts, bad)
+    candidates = {key: c for key, c in counts.items()
+                  if key not in bad and sum(c.values()) > len(c)}
+    sharing = Counter(s for c in candidates.values() for s in c)
+    total = Counter()
+    for c in candidates.values():
+        total.update(c)
+    index = {s: i for i, (s, _) in enumerate(total.most_common())}
+    keys = []
+    for key, c in candidates.items():
+        saved = sum(n * (len(s.encode("utf-8")) + 2 - len(str(index[s]))) for s, n in c.items())
+        table_cost = sum((len(s.encode("utf-8")) + TABLE_ENTRY_BYTES) / sharing[s] for s in c)
+        if saved > table_cost:
+            keys.append(key)
+    total = Counter()
+    for key in keys:
+        total.update(candidates[key])
+    return [s for s, _ in total.most_common()], keys
+
+
+def _rebuild(value, drops, index, keys):
+    if isinstance(value, dict):
+        dropped = drops.get(id(value), ())
+        out = {}
+        for key, v in value.items():
+            if key in dropped:
+                continue
+            if key in keys and isinstance(v, str):
+                out[key] = index[v]
+            elif key in keys and isinstance(v, list):
+                out[key] = [index[s] for s in v]
+            else:
+                out[key] = _rebuild(v, drops, index, keys)
+        return out
+    if isinstance(value, list):
+        return [_rebuild(v, drops, index, keys) for v in value]
+    return value
+
+
+# ─── Encode / decode ─────────────────────────────────────────────────────────
+
+def encode_document(name, doc, fields=None):
+    """Encoded copy of doc (doc itself is not modified); doc unchanged if there is nothing to optimize."""
+    rules = document_rules(name, fields)
+    if rules is None or not isinstance(doc, dict) or is_encoded(doc):
+        return doc
+    derived, drops = _plan(doc, rules)
+    strings, keys = _string_table(doc, drops)
+    if not derived and not keys:
+        return doc
+    index = {s: i for i, s in enumerate(strings)}
+    header = {"version": CODEC_VERSION, "derived": derived, "strings": strings, "string_keys": keys}
+    return {HEADER_KEY: header, **_rebuild(doc, drops, index, set(keys))}
+
+
+def _expand(value, strings, keys):
+    if isinstance(value, dict):
+        for key, v in value.items():
+            if key in keys and isinstance(v, int):
+                value[key] = strings[v]
+            elif key in keys and isinstance(v, list):
+                value[key] = [strings[i] for i in v]
+            else:
+                _expand(v, strings, keys)
+    elif isinstance(value, list):
+        for v in value:
+            _expand(v, strings, keys)
+
+
+def decode_document(doc):
+    """Restore an encoded document in place (and return it); plain documents are returned as they are."""
+    if not is_encoded(doc):
+        return doc
+    header = doc.pop(HEADER_KEY)
+    if header["version"] > CODEC_VERSION:
+        raise ValueError(f"payload version {header['version']} is newer than this decoder ({CODEC_VERSION})")
+    _expand(doc, header["strings"], set(header["string_keys"]))
+    for rule in header["derived"]:
+        for obj in _covered(doc, rule):
+            if rule["field"] not in obj and (value := derive(rule, obj)) is not None:
+                obj[rule["field"]] = value
+    return doc
+
+
+def loads(data):
+    """json.loads plus decode_document, for readers of documents that may be encoded."""
+    return decode_document(json.loads(data))
+
+
+# ─── CLI ─────────────────────────────────────────────────────────────────────
+
+def dumps(doc):
+    """Bytes as regenerate_all_data.save_json writes them (2-space indent)."""
+    return json.dumps(doc, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def tenant_documents(root, fields):
+    """(company_id, name, path) for every optimizable document under a data root."""
+    for tenant in sorted(p for p in Path(root).iterdir() if (p / "clima_v2_data.json").is_file()):
+        for path in sorted(tenant.rglob("*.json")):
+            name = path.relative_to(tenant).as_posix()
+            if document_rules(name, fields) is not None:
+                yield tenant.name, name, path
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Drop derivable fields and share repeated strings in tenant "
+                                                 "documents; report the bytes saved per file.")
+    parser.add_argument("root", type=Path, help="data directory with one subdirectory per tenant")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--write", action="store_true", help="write the encoded documents in place")
+    action.add_argument("--decode", action="store_true", help="write the documents back in their plain shape")
+    parser.add_argument("--fields", type=Path, default=FIELDS_PATH, help="derivable-fields file")
+    args = parser.parse_args(argv)
+    fields = load_fields(args.fields)
+
+    totals = {}                   # report name -> [files, plain bytes, encoded bytes, derived fields, strings]
+    tenants = set()
+    for company_id, name, path in tenant_documents(args.root, fields):
+        tenants.add(company_id)
+        data = path.read_bytes()
+        plain = loads(data)
+        plain_bytes = dumps(plain)
+        encoded = encode_document(name, plain, fields)
+        encoded_bytes = dumps(encoded)
+        if decode_document(json.loads(encoded_bytes)) != plain:
+            raise ValueError(f"{company_id}/{name}: encoding does not round-trip")
+        if args.write or args.decode:
+            out = plain_bytes if args.decode else encoded_bytes
+            if out != data:
+                path.write_bytes(out)
+        header = encoded.get(HEADER_KEY, {"derived": [], "strings": []})
+        row = totals.setdefault(next(p for p in fields if fnmatch(name, p)), [0, 0, 0, 0, 0])
+        row[0] += 1
+        row[1] += len(plain_bytes)
+        row[2] += len(encoded_bytes)
+        row[3] = max(row[3], len(header["derived"]))
+        row[4] = max(row[4], len(header["strings"]))
+
+    print(f"{'document':<32} {'files':>6} {'plain KB':>10} {'encoded KB':>11} {'saved KB':>9} {'saved':>6} "
+          f"{'rules':>5} {'strings':>7}")
+    for name, (files, plain, encoded, rules, strings) in sorted(totals.items(), key=lambda kv: kv[1][2] - kv[1][1]):
+        print(f"{name:<32} {files:>6} {plain / 1024:>10.1f} {encoded / 1024:>11.1f} {(plain - encoded) / 1024:>9.1f} "
+              f"{(plain - encoded) / max(plain, 1):>6.1%} {rules:>5} {strings:>7}")
+    plain = sum(row[1] for row in totals.values())
+    encoded = sum(row[2] for row in totals.values())
+    print(f"{len(tenants)} tenants: {plain / 2 ** 20:.2f} MB → {encoded / 2 ** 20:.2f} MB "
+          f"({(plain - encoded) / max(plain, 1):.1%} saved)"
+          + (", written" if args.write else ", decoded" if args.decode else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Benchmark the data pipeline over tenant size, with scaling curves and a stored baseline.
+
+One synthetic tenant (the first bundled tenant, resized) goes through every
+stage of the three data scripts against the bundled public/data templates:
+
+    regenerate              every generator and transform of regenerate_all_data.py,
+                            as recorded by instrumentation.py, plus "total"
+                            (generate, validate, write to memory, finalize)
+    generate_company_data   each transform_* and its JSON encode, plus "total"
+    fix_company_data        replace_tower_references over each encoded file, plus "total"
+
+(the last two only up to LEGACY_MAX_EMPLOYEES).
+
+Three axes are swept one at a time, the others held at BASE:
+
+    employees     employee_count, 200 → 1M
+    departments   number of departments
+    comments      text_analysis comments (template comments repeated)
+
+Every case runs in its own process. Per stage it records wall time (the
+best of --repeat runs), tracemalloc peak (a separate, last run, since
+tracing slows allocation-heavy code several times) and output bytes, plus
+the process's peak RSS. For each axis the log-log slope between the two
+largest sizes is the stage's scaling exponent; above SUPERLINEAR the stage
+is flagged.
+
+Results are compared with bench/pipeline_baseline.json: a stage regresses
+when it is more than TIME_TOLERANCE slower (and at least MIN_TIME_DELTA_S),
+MEMORY_TOLERANCE bigger at peak, BYTES_TOLERANCE bigger on output, or its
+exponent grew by more than EXPONENT_SLACK past SUPERLINEAR. Regressions exit
+1. Timings are machine-specific: refresh the baseline with --save-baseline
+on the machine that runs the comparison.
+
+    python pipeline_bench.py                      # full sweep, compare with the baseline
+    python pipeline_bench.py --quick --axis employees
+    python pipeline_bench.py --save-baseline --report /tmp/bench.json
+"""
+
+import argparse
+import copy
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import benchmarks
+import fix_company_data
+import generate_company_data
+import instrumentation
+import regenerate_all_data as pipeline
+from tenant_config import TENANTS_PATH, iter_tenants, resize_tenant
+
+BASELINE_PATH = Path(__file__).parent / "bench" / "pipeline_baseline.json"
+TEMPLATE_DIR = pipeline.REPO_DATA
+
+# ─── Sweeps ──────────────────────────────────────────────────────────────────
+BASE = {"employees": 1_000, "departments": 10, "comments": 800}
+SWEEPS = {
+    "employees": [200, 1_000, 10_000, 100_000, 1_000_000],
+    "departments": [5, 20, 100, 500],
+    "comments": [800, 5_000, 20_000, 100_000],
+}
+# generate_company_data.py keeps ~4 comments per employee in memory (4M at 1M employees)
+LEGACY_MAX_EMPLOYEES = 100_000    # larger cases only run regenerate
+QUICK_POINTS = 3                  # --quick: only the first sizes of each sweep
+REPEAT = 3                        # timing runs per case; the fastest is kept
+
+# ─── Thresholds ──────────────────────────────────────────────────────────────
+TIME_TOLERANCE = 0.25             # slower than baseline by more than this share
+MIN_TIME_DELTA_S = 0.05           # ...and by at least this much (timer noise on small stages)
+MEMORY_TOLERANCE = 0.20
+MIN_MEMORY_DELTA = 1 << 20
+BYTES_TOLERANCE = 0.05
+SUPERLINEAR = 1.15                # scaling exponent above which a stage is flagged
+EXPONENT_SLACK = 0.25             # exponent growth over baseline that counts as a regression
+MIN_CURVE_S = 0.005               # stages faster than this at the largest size have no exponent
+TOP_ROWS = 12                     # stages per axis table, slowest first
+
+
+def case_id(case):
+    return ",".join(f"{axis}={case[axis]}" for axis in SWEEPS)
+
+
+def sweep_cases(axes, quick=False):
+    """{axis: [case, ...]}; a case is BASE with one axis changed."""
+    return {axis: [{**BASE, axis: value} for value in SWEEPS[axis][:QUICK_POINTS if quick else None]]
+            for axis in axes}
+
+
+# ─── One case (runs in a child process) ──────────────────────────────────────
+
+def bench_tenant(case, tenants_path):
+    company_id, company = next(iter_tenants(tenants_path))
+    return company_id, resize_tenant(company, case["employees"], case["departments"])
+
+
+def scale_comments(template, n):
+    """text_analysis template with exactly n comments (the template's repeated, with fresh ids)."""
+    data = {k: v for k, v in template.items() if k != "comments"}
+    source = template["comments"]
+    data["comments"] = [{**source[i % len(source)], "id": f"c{i + 1:06d}"} for i in range(n)]
+    data["total_comments"] = max(template.get("total_comments", 0), n)
+    summary = {"positive": 0, "neutral": 0, "negative": 0}
+    for comment in data["comments"]:
+        summary[comment["sentiment"]] += 1
+    data["sentiment_summary"] = {**summary, "total": n}
+    return data
+
+
+def stage_table(records, group, table):
+    """Fold instrumentation records into table[group/stage] = {wall_s, peak_bytes, bytes}."""
+    encode_bytes = {}
+    for company, name, file, wall, _, peak, _, nbytes, _ in records:
+        row = table.setdefault(f"{group}/{name}", {"wall_s": 0.0, "peak_bytes": None, "bytes": 0})
+        row["wall_s"] += wall
+        row["bytes"] += nbytes
+        if peak is not None:
+            row["peak_bytes"] = max(row["peak_bytes"] or 0, peak)
+        if name == "encode" and file is not None:
+            encode_bytes[file] = encode_bytes.get(file, 0) + nbytes
+    # A generator's output is the document it produces
+    for generator, file in pipeline.GENERATOR_FILES.items():
+        if f"{group}/{generator}" in table:
+            table[f"{group}/{generator}"]["bytes"] = encode_bytes.get(file, 0)
+    return table
+
+
+def run_once(company_id, company, legacy_templates, trace_memory):
+    """Every stage once; returns ({group/stage: row}, validation failures)."""
+    table = {}
+    with tempfile.TemporaryDirectory() as out:
+        # A fresh output base each run: the word-cloud cache starts cold
+        pipeline.init_worker(TEMPLATE_DIR, out, False, "memory", metrics=True, trace_memory=trace_memory)
+        with instrumentation.stage(company_id, "total"):
+            result = pipeline.generate_tenant((company_id, company, 0))
+            failures = result[4]
+            if not failures:
+                sketches = {}
+                benchmarks.observe_values(sketches, result[2])
+                pipeline.finalize_tenant(company_id, company["industry"], sketches)
+        records = result[5] + instrumentation.drain()
+        written = sum(len(data) for data in pipeline.take_memory_documents(company_id).values())
+    stage_table(records, "regenerate", table)
+    table["regenerate/total"]["bytes"] = written
+    if company["employee_count"] > LEGACY_MAX_EMPLOYEES:
+        return table, failures
+
+    info = generate_company_data.legacy_company(company)
+    encoded = {}
+    with instrumentation.stage(company_id, "total"):
+        for filename, transform in generate_company_data.TRANSFORMS.items():
+            random.seed(zlib.crc32(f"{company_id}{filename}".encode("utf-8")))
+            with instrumentation.stage(company_id, transform.__name__, filename):
+                data = transform(legacy_templates[filename], info)
+            with instrumentation.stage(company_id, "encode", filename):
+                encoded[filename] = json.dumps(data, ensure_ascii=False, indent=2)
+                instrumentation.add_bytes(len(encoded[filename].encode("utf-8")))
+    stage_table(instrumentation.drain(), "generate_company_data", table)
+    table["generate_company_data/total"]["bytes"] = table["generate_company_data/encode"]["bytes"]
+
+    names = fix_company_data.company_names(company_id, company)
+    fixed_bytes = 0
+    with instrumentation.stage(company_id, "total"):
+        for filename, text in encoded.items():
+            with instrumentation.stage(company_id, "replace_tower_references", filename):
+                fixed_bytes += len(fix_company_data.replace_tower_references(text, names).encode("utf-8"))
+    stage_table(instrumentation.drain(), "fix_company_data", table)
+    table["fix_company_data/total"]["bytes"] = fixed_bytes
+    return table, failures
+
+
+def run_case(case, tenants_path, repeat, trace_memory):
+    """Best-of-repeat timings, then (optionally) one tracemalloc run for peaks."""
+    company_id, company = bench_tenant(case, tenants_path)
+    pipeline.init_worker(TEMPLATE_DIR, TEMPLATE_DIR, False, "memory")
+    pipeline._templates["text_analysis_data.json"] = scale_comments(
+        pipeline._templates["text_analysis_data.json"], case["comments"])
+    legacy_templates = {name: copy.deepcopy(pipeline._templates[name]) for name in generate_company_data.TRANSFORMS}
+
+    # Warm-up at the smallest size: imports, regex and allocator caches
+    run_once(company_id, {**company, "employee_count": SWEEPS["employees"][0]}, legacy_templates, False)
+    stages, failures = {}, {}
+    for _ in range(repeat):
+        table, failures = run_once(company_id, company, legacy_templates, False)
+        for key, row in table.items():
+            best = stages.get(key)
+            if best is None or row["wall_s"] < best["wall_s"]:
+                stages[key] = row
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024   # KiB on Linux
+    if trace_memory:
+        table, _ = run_once(company_id, company, legacy_templates, True)
+        for key, row in table.items():
+            if key in stages:
+                stages[key]["peak_bytes"] = row["peak_bytes"]
+    return {"case": case, "stages": stages, "max_rss_bytes": max_rss,
+            "failures": {name: errors[:1] for name, errors in failures.items()}}
+
+
+def spawn_case(case, args):
+    """run_case in a fresh interpreter, so peak RSS and caches belong to this case alone."""
+    cmd = [sys.executable, __file__, "--run-case", json.dumps(case), "--tenants", str(args.tenants),
+           "--repeat", str(args.repeat)] + (["--no-memory"] if args.no_memory else [])
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=Path(__file__).parent)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{case_id(case)} failed:\n{proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# ─── Curves and baseline ─────────────────────────────────────────────────────
+
+def exponent(sizes, walls):
+    """Log-log slope between the two largest sizes, or None below MIN_CURVE_S."""
+    if len(sizes) < 2 or walls[-1] < MIN_CURVE_S or walls[-2] <= 0:
+        return None
+    return math.log(walls[-1] / walls[-2]) / math.log(sizes[-1] / sizes[-2])
+
+
+def curves(results, sweeps):
+    """{axis: {stage: {"sizes", "wall_s", "peak_bytes", "bytes", "exponent"}}}."""
+    out = {}
+    for axis, cases in sweeps.items():
+        sizes = [case[axis] for case in cases]
+        rows = [results[case_id(case)]["stages"] for case in cases]
+        out[axis] = {}
+        for key in sorted(set().union(*rows)):
+            # Sizes a stage did not run at (see LEGACY_MAX_EMPLOYEES) are None
+            values = {field: [row[key][field] if key in row else None for row in rows]
+                      for field in ("wall_s", "peak_bytes", "bytes")}
+            present = [(size, wall) for size, wall in zip(sizes, values["wall_s"]) if wall is not None]
+            if len(present) < 2:
+                continue
+            out[axis][key] = {"sizes": sizes, **values,
+                              "exponent": exponent([p[0] for p in present], [p[1] for p in present])}
+    return out
+
+
+def _exceeds(now, base, tolerance, min_delta):
+    return now is not None and base is not None and now > base * (1 + tolerance) and now - base >= min_delta
+
+
+def compare(results, scaling, baseline):
+    """Regressions against the baseline as (case or axis, stage, metric, baseline, now) tuples."""
+    regressions = []
+    for cid, result in results.items():
+        base_case = baseline["cases"].get(cid)
+        if base_case is None:
+            continue
+        for key, row in result["stages"].items():
+            base = base_case["stages"].get(key)
+            if base is None:
+                continue
+            if _exceeds(row["wall_s"], base["wall_s"], TIME_TOLERANCE, MIN_TIME_DELTA_S):
+                regressions.append((cid, key, "wall_s", base["wall_s"], row["wall_s"]))
+            if _exceeds(row["peak_bytes"], base["peak_bytes"], MEMORY_TOLERANCE, MIN_MEMORY_DELTA):
+                regressions.append((cid, key, "peak_bytes", base["peak_bytes"], row["peak_bytes"]))
+            if _exceeds(row["bytes"], base["bytes"], BYTES_TOLERANCE, 1):
+                regressions.append((cid, key, "bytes", base["bytes"], row["bytes"]))
+    for axis, stages in scaling.items():
+        base_axis = baseline.get("curves", {}).get(axis, {})
+        for key, curve in stages.items():
+            base_curve = base_axis.get(key)
+            if base_curve is None or base_curve["sizes"] != curve["sizes"]:
+                continue
+            base, now = base_curve["exponent"], curve["exponent"]
+            if now is not None and now > SUPERLINEAR and (base is None or now > base + EXPONENT_SLACK):
+                regressions.append((axis, key, "exponent", base, now))
+    return regressions
+
+
+# ─── Output ──────────────────────────────────────────────────────────────────
+
+def _size(n):
+    return f"{n / 1_000_000:g}M" if n >= 1_000_000 else f"{n / 1000:g}k" if n >= 10_000 else str(n)
+
+
+def _mb(n):
+    return f"{n / 2 ** 20:.1f}" if n is not None else "-"
+
+
+def format_axis(axis, stages):
+    """Wall ms per size and the exponent, slowest stages first."""
+    sizes = next(iter(stages.values()))["sizes"]
+    lines = [f"{axis:<44}" + "".join(f"{_size(s):>10}" for s in sizes) + f"{'exp':>7} {'peak MB':>8} {'out MB':>8}"]
+    ranked = sorted(stages.items(), key=lambda kv: -max(w for w in kv[1]["wall_s"] if w is not None))
+    for key, curve in ranked[:TOP_ROWS]:
+        exp = curve["exponent"]
+        mark = "▲" if exp is not None and exp > SUPERLINEAR else " "
+        last = max(i for i, w in enumerate(curve["wall_s"]) if w is not None)
+        lines.append(f"{key[:44]:<44}"
+                     + "".join(f"{w * 1000:>10.1f}" if w is not None else f"{'-':>10}" for w in curve["wall_s"])
+                     + (f"{exp:>6.2f}{mark}" if exp is not None else f"{'-':>6} ")
+                     + f" {_mb(curve['peak_bytes'][last]):>8} {curve['bytes'][last] / 2 ** 20:>8.2f}")
+    return "\n".join(lines)
+
+
+def format_regression(where, key, metric, base, now):
+    if metric == "exponent":
+        before = f"{base:.2f}" if base is not None else "-"
+        return f"  {where}  {key}: scaling exponent {before} → {now:.2f}"
+    if metric == "wall_s":
+        return f"  {where}  {key}: {base * 1000:.1f} ms → {now * 1000:.1f} ms ({now / base:.2f}×)"
+    return f"  {where}  {key}: {metric} {_mb(base)} MB → {_mb(now)} MB ({now / base:.2f}×)"
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the data pipeline over tenant size.")
+    parser.add_argument("--axis", action="append", choices=sorted(SWEEPS),
+                        help="sweep only this axis (repeatable; default: all)")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"only the first {QUICK_POINTS} sizes of each sweep")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timing runs per case; the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run (no per-stage peaks)")
+    parser.add_argument("--tenants", type=Path, default=TENANTS_PATH,
+                        help="tenant config; its first tenant is resized for every case")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--report", type=Path, default=None, metavar="PATH", help="write results as JSON")
+    parser.add_argument("--run-case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case is not None:
+        result = run_case(json.loads(args.run_case), args.tenants, args.repeat, not args.no_memory)
+        print(json.dumps(result))
+        return 0
+
+    sweeps = sweep_cases(args.axis or list(SWEEPS), args.quick)
+    cases = {case_id(case): case for axis_cases in sweeps.values() for case in axis_cases}
+    print(f"Benchmarking {len(cases)} cases ({args.repeat} timing run{'s' if args.repeat != 1 else ''}"
+          f"{', no memory run' if args.no_memory else ' + 1 tracemalloc run'} each)")
+    results = {}
+    started = time.perf_counter()
+    for done, (cid, case) in enumerate(cases.items(), 1):
+        results[cid] = spawn_case(case, args)
+        failed = results[cid]["failures"]
+        print(f"[{done}/{len(cases)}] {cid}  {results[cid]['stages']['regenerate/total']['wall_s']:.2f}s  "
+              f"rss {_mb(results[cid]['max_rss_bytes'])} MB"
+              + (f"  validation failed: {', '.join(sorted(failed))}" if failed else ""), flush=True)
+    scaling = curves(results, sweeps)
+
+    for axis, stages in scaling.items():
+        print(f"\n─── {axis} (wall ms; ▲ exponent > {SUPERLINEAR}) ───")
+        print(format_axis(axis, stages))
+
+    run = {"finished_at": time.time(), "seconds": time.perf_counter() - started, "repeat": args.repeat,
+           "python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()}
+    document = {"run": run, "base": BASE, "cases": results, "curves": scaling}
+    if args.report is not None:
+        args.report.write_text(json.dumps(document, indent=2), encoding="utf-8")
+        print(f"\n  results → {args.report}")
+
+    regressions, baseline = [], None
+    print("\n─── Baseline ───")
+    if args.baseline.is_file():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, scaling, baseline)
+        print(f"  {len(regressions)} regressions against {args.baseline}")
+        for regression in regressions:
+            print(format_regression(*regression))
+    else:
+        print(f"  no baseline at {args.baseline}")
+    if args.save_baseline:
+        if baseline is not None:
+            # A partial sweep (--axis, --quick) only replaces the cases and curves it ran
+            document["cases"] = {**baseline["cases"], **results}
+            document["curves"] = {**baseline["curves"], **scaling}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(document, indent=1) + "\n", encoding="utf-8")
+        print(f"  baseline saved → {args.baseline}")
+    return 1 if regressions and not args.save_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,178 @@
+"""
+cProfile per pipeline stage, with flamegraph-ready output.
+
+instrumentation.py says which stage is slow; this says which functions
+inside it are. With enable(), every stage entered through stage() runs
+under its own cProfile profiler (one per stage name, accumulated over
+tenants), optionally only for one company and/or one output file. Stages
+do not nest: a stage entered while another is being profiled is part of
+the outer profile.
+
+write_profiles() leaves, per stage:
+
+    <stage>.prof        pstats file (python -m pstats, snakeviz, gprof2dot)
+    <stage>.collapsed   "frame;frame;frame microseconds" lines, as read by
+                        flamegraph.pl, inferno and speedscope
+
+plus run.collapsed, every stage under a root frame named after it.
+
+cProfile records caller→callee edges, not whole stacks, so the collapsed
+stacks are rebuilt from the call graph: a function's self time and callees
+are split between its callers in proportion to the cumulative time each
+caller spent in it. That is exact for tree-shaped call graphs and a good
+approximation for shared helpers; recursive calls fold into the outermost
+frame. Profiling makes call-heavy code 2-3× slower, so absolute times are
+only good for comparing functions with each other.
+"""
+
+import cProfile
+import marshal
+import os
+import pstats
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+MIN_STACK_US = 1           # collapsed stacks below this many microseconds are dropped
+MAX_STACK_DEPTH = 96
+TOP_FUNCTIONS = 12         # rows in the hot-functions table
+
+_state = {"enabled": False, "company": None, "file": None, "profilers": {}, "active": False}
+
+
+def enable(company=None, file=None):
+    """Profile stages from now on; company / file restrict it to one tenant / one output document."""
+    _state.update(enabled=True, company=company, file=file)
+
+
+def enabled():
+    return _state["enabled"]
+
+
+# ─── Recording ───────────────────────────────────────────────────────────────
+
+@contextmanager
+def _profile(name):
+    profiler = _state["profilers"].get(name)
+    if profiler is None:
+        profiler = _state["profilers"][name] = cProfile.Profile()
+    _state["active"] = True
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _state["active"] = False
+
+
+def stage(company, name, file=None):
+    """Context manager profiling one stage; a no-op unless enabled and company / file match."""
+    if (not _state["enabled"] or _state["active"]
+            or (_state["company"] is not None and company != _state["company"])
+            or (_state["file"] is not None and file != _state["file"])):
+        return nullcontext()
+    return _profile(name)
+
+
+def drain():
+    """{stage: pstats dict} recorded since the last drain; plain data, so pool workers can return it."""
+    profiles = {}
+    for name, profiler in _state["profilers"].items():
+        profiler.create_stats()
+        profiles[name] = profiler.stats
+    _state["profilers"] = {}
+    return profiles
+
+
+def merge(into, profiles):
+    """Add drained profiles into an accumulating {stage: pstats dict}."""
+    for name, stats in profiles.items():
+        target = into.setdefault(name, {})
+        for func, stat in stats.items():
+            target[func] = pstats.add_func_stats(target[func], stat) if func in target else stat
+    return into
+
+
+# ─── Output ──────────────────────────────────────────────────────────────────
+
+def frame_name(func):
+    filename, line, name = func
+    if filename == "~":                       # builtins: ('~', 0, "<method 'join' of 'str' objects>")
+        return name.replace(";", ",")
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
+
+
+def collapse(stats):
+    """{stack: microseconds}, stacks as tuples of frame names rebuilt from the caller→callee graph."""
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            if caller != func:
+                callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, (*_, callers) in stats.items()
+             if not any(caller in stats and caller != func for caller in callers)]
+    stacks = {}
+
+    def walk(func, stack, share):
+        # share: fraction of func's total (self + callees) that belongs to this stack
+        tt = stats[func][2]
+        stack = stack + (frame_name(func),)
+        self_us = tt * share * 1e6
+        if self_us >= MIN_STACK_US:
+            stacks[stack] = stacks.get(stack, 0) + self_us
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            callee_ct = stats[callee][3]
+            if callee_ct <= 0 or frame_name(callee) in stack:
+                continue
+            sub = share * edge_ct / callee_ct
+            if callee_ct * sub * 1e6 >= MIN_STACK_US:
+                walk(callee, stack, sub)
+
+    for root in roots:
+        walk(root, (), 1.0)
+    return stacks
+
+
+def format_collapsed(stacks, prefix=()):
+    return "".join(f"{';'.join(prefix + stack)} {round(us)}\n"
+                   for stack, us in sorted(stacks.items()) if round(us) > 0)
+
+
+def write_profiles(out_dir, profiles):
+    """Write <stage>.prof / <stage>.collapsed per stage and run.collapsed; returns the stage names written."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    combined = []
+    for name, stats in sorted(profiles.items()):
+        with open(out_dir / f"{name}.prof", "wb") as f:
+            marshal.dump(stats, f)            # the format Profile.dump_stats writes
+        stacks = collapse(stats)
+        (out_dir / f"{name}.collapsed").write_text(format_collapsed(stacks), encoding="utf-8")
+        combined.append(format_collapsed(stacks, (name,)))
+    (out_dir / "run.collapsed").write_text("".join(combined), encoding="utf-8")
+    return sorted(profiles)
+
+
+def stage_seconds(stats):
+    """Wall time profiled in a stage: the cumulative time of its root calls."""
+    return sum(ct for func, (_, _, _, ct, callers) in stats.items()
+               if not any(caller in stats and caller != func for caller in callers))
+
+
+def format_hot_functions(profiles, top=TOP_FUNCTIONS):
+    """Functions with the most self time over all stages, with the stage that spends most in each."""
+    totals = {}
+    for name, stats in profiles.items():
+        for func, (_, nc, tt, ct, _) in stats.items():
+            entry = totals.setdefault(func, {"calls": 0, "self_s": 0.0, "cum_s": 0.0, "stages": {}})
+            entry["calls"] += nc
+            entry["self_s"] += tt
+            entry["cum_s"] += ct
+            entry["stages"][name] = entry["stages"].get(name, 0.0) + tt
+    lines = [f"{'self s':>8} {'cum s':>8} {'calls':>10}  {'function':<58} stage"]
+    for func, entry in sorted(totals.items(), key=lambda kv: -kv[1]["self_s"])[:top]:
+        main_stage = max(entry["stages"], key=entry["stages"].get)
+        lines.append(f"{entry['self_s']:>8.3f} {entry['cum_s']:>8.3f} {entry['calls']:>10}  "
+                     f"{frame_name(func)[:58]:<58} {main_stage}")
+    return "\n".join(lines)
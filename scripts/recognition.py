@@ -0,0 +1,152 @@
+"""
+Multi-period recognition rankings.
+
+Department scores live in one (D × T × M) array: department × month ×
+metric, where metric 0 is engagement and the rest are the dimensions shown
+on the recognition page. Every period is ranked at once:
+
+- rank: ``argsort`` of engagement along the department axis
+- change / trend: ``np.diff`` along the month axis
+- medals: rank quantiles, so the split scales with the number of areas
+- badges: boolean (D × T) masks, one per badge rule
+- area of the month: ``argmax`` of the monthly engagement improvement
+
+Annual survey results are anchored at December of each survey year and the
+months in between are interpolated with a small pulse-survey wobble.
+"""
+
+import numpy as np
+
+MONTH_NAMES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio",
+               "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+MEDALS = np.array(["gold", "silver", "bronze", "none"])
+MEDAL_CUTS = [0.2, 0.5, 0.8]       # rank quantiles: top 20% gold, next 30% silver, next 30% bronze
+TREND_EPS = 0.02                   # smaller month-over-month moves count as stable
+PULSE_NOISE = 0.04                 # std of the month-to-month wobble between surveys
+CONSISTENCY_MONTHS = 3
+
+BADGES = {
+    "rising_star": {"id": "rising_star", "name": "Estrella en Ascenso",
+                    "description": "Mayor mejora vs período anterior", "icon": "star", "color": "yellow"},
+    "consistency": {"id": "consistency", "name": "Consistencia",
+                    "description": "Mantiene engagement superior a 4.3", "icon": "check-circle", "color": "green"},
+    "wellness_leader": {"id": "wellness_leader", "name": "Líder en Bienestar",
+                        "description": "Top en Balance Vida-Trabajo", "icon": "heart", "color": "pink"},
+    "team_spirit": {"id": "team_spirit", "name": "Espíritu de Equipo",
+                    "description": "Excelente cohesión de equipo", "icon": "users", "color": "blue"},
+    "leadership_excellence": {"id": "leadership_excellence", "name": "Excelencia en Liderazgo",
+                              "description": "Liderazgo destacado", "icon": "award", "color": "purple"},
+}
+
+
+def month_label(period):
+    """'2025-12' -> 'Diciembre 2025'."""
+    year, mon = period.split("-")
+    return f"{MONTH_NAMES[int(mon) - 1]} {year}"
+
+
+def monthly_periods(years):
+    """'YYYY-MM' labels from December of the first survey year to December of the last."""
+    first, last = int(years[0]), int(years[-1])
+    return [f"{first + (m + 11) // 12:04d}-{(m + 11) % 12 + 1:02d}" for m in range((last - first) * 12 + 1)]
+
+
+def monthly_series(annual, rng, noise=PULSE_NOISE):
+    """Expand (D × Y × M) annual scores to (D × T × M) monthly scores.
+
+    Survey years are anchored every 12 months. A metric missing in a year
+    takes the next surveyed value, so interpolation never runs through NaN.
+    Anchors keep their survey values; months in between get a per-department
+    wobble shared across metrics plus a smaller per-metric one.
+    """
+    annual = np.asarray(annual, dtype=np.float64)
+    D, Y, M = annual.shape
+    # Back-fill along years, then forward-fill whatever is still missing at the end
+    filled = annual.copy()
+    for y in range(Y - 2, -1, -1):
+        filled[:, y] = np.where(np.isnan(filled[:, y]), filled[:, y + 1], filled[:, y])
+    for y in range(1, Y):
+        filled[:, y] = np.where(np.isnan(filled[:, y]), filled[:, y - 1], filled[:, y])
+
+    T = (Y - 1) * 12 + 1
+    t = np.arange(T)
+    lo = np.minimum(t // 12, Y - 1)
+    hi = np.minimum(lo + 1, Y - 1)
+    w = ((t % 12) / 12.0)[None, :, None]
+    monthly = filled[:, lo] * (1 - w) + filled[:, hi] * w
+
+    between = (t % 12 != 0)[None, :, None]
+    wobble = rng.normal(0, noise, (D, T, 1)) + rng.normal(0, noise / 2, (D, T, M))
+    return np.clip(monthly + wobble * between, 1.0, 5.0)
+
+
+def interpolated_months(T):
+    """(T,) bool: True for months between survey anchors, whose scores are interpolated."""
+    return np.arange(T) % 12 != 0
+
+
+def rank_periods(scores):
+    """Rank departments by engagement (metric 0) in every month.
+
+    Returns a dict of (D × T) arrays: rank (1-based), change, trend and
+    medal, plus order (T × D, best first).
+    """
+    eng = scores[:, :, 0]
+    D, T = eng.shape
+    order = np.argsort(-eng, axis=0, kind="stable")          # (D × T), department index per rank
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(D)[:, None].repeat(T, axis=1), axis=0)
+
+    change = np.zeros_like(eng)
+    change[:, 1:] = np.diff(eng, axis=1)
+    trend = np.where(change > TREND_EPS, "up", np.where(change < -TREND_EPS, "down", "stable")).astype(object)
+    trend[:, 0] = "new"
+
+    medal = MEDALS[np.digitize(rank / max(D, 1), MEDAL_CUTS, right=False)]
+    return {"rank": rank + 1, "change": change, "trend": trend, "medal": medal, "order": order.T}
+
+
+def badge_masks(scores, change, metric_index):
+    """Boolean (D × T) mask per badge id."""
+    eng = scores[:, :, 0]
+    D, T = eng.shape
+    # Engagement above 4.3 in each of the last CONSISTENCY_MONTHS months
+    above = np.pad(eng > 4.3, ((0, 0), (CONSISTENCY_MONTHS - 1, 0)), constant_values=False)
+    window = np.lib.stride_tricks.sliding_window_view(above, CONSISTENCY_MONTHS, axis=1)
+
+    rising = np.zeros((D, T), dtype=bool)
+    best = change.argmax(axis=0)
+    rising[best, np.arange(T)] = change[best, np.arange(T)] > 0
+    rising[:, 0] = False
+
+    return {
+        "rising_star": rising,
+        "consistency": window.all(axis=2),
+        "wellness_leader": scores[:, :, metric_index["balance"]] >= 4.4,
+        "team_spirit": scores[:, :, metric_index["cohesion"]] >= 4.4,
+        "leadership_excellence": scores[:, :, metric_index["liderazgo"]] >= 4.5,
+    }
+
+
+def areas_of_month(scores, top_dims=3):
+    """Winner per month: largest engagement gain vs the previous month.
+
+    Returns (winner, improvement, top_metrics), each indexed by month;
+    month 0 has no previous period, and a month where no area improved has
+    no winner, so both are left at -1 / 0.
+    """
+    diffs = np.diff(scores, axis=1)                          # (D × T-1 × M)
+    gain = diffs[:, :, 0]
+    T = scores.shape[1]
+    winner = np.full(T, -1)
+    improvement = np.zeros(T)
+    top_metrics = np.zeros((T, top_dims), dtype=int)
+    if T > 1:
+        winner[1:] = gain.argmax(axis=0)
+        improvement[1:] = gain[winner[1:], np.arange(T - 1)]
+        top_metrics[1:] = np.argsort(-diffs[winner[1:], np.arange(T - 1)], axis=1)[:, :top_dims]
+        none = improvement <= 0
+        winner[none] = -1
+        improvement[none] = 0.0
+    return winner, improvement, top_metrics
@@ -1,98 +1,117 @@
 #!/usr/bin/env python3
 """
-Regenerate all 36 company JSON data files for MRI Organizacional.
+Regenerate all company JSON data files for MRI Organizacional.
 
-Reads 9 template JSONs from clima-dashboard and generates 4 differentiated
-company variants with narrative offsets, populated segmentation dimensions,
-and company-specific departments/names.
+Reads 9 template JSONs from clima-dashboard and generates a differentiated
+variant per tenant with narrative offsets, populated segmentation dimensions,
+and company-specific departments/names. Tenants come from the tenant config
+(scripts/tenants/ by default, see tenant_config.py) and are streamed, so a
+run over thousands of tenants only keeps one tenant in memory per worker:
+
+    python scripts/regenerate_all_data.py --tenants tenants.jsonl --workers 8 --quiet
+
+text_analysis_data.json is written as a summary plus a shard manifest; the
+comments themselves go to fixed-size pages under text_analysis/, alongside a
+delta-encoded inverted index for filtering (see comment_index.py).
+
+A tenant's writes are staged in memory and validated inside the worker
+(schemas mirroring src/types plus invariants, see validation.py); nothing is
+written for a tenant that fails, and the run exits non-zero.
+
+With --optimize-payloads, documents are written without the fields the
+client can derive and with a per-file string table (see payload_codec.py);
+the dashboard hooks decode either shape.
 """
 
+import argparse
 import json
 import copy
-import os
+import multiprocessing
 import random
 import re
+import sys
+import time
+import zlib
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
+import benchmarks
+import early_alerts
+import exports
+import forecasting
+import instrumentation
+import olap_cube
+import payload_codec
+import profiling
+import recognition
+import scenarios
+import sqlite_sink
+import tenant_pack
+import turnover_risk
+import validation
+import word_cloud
+from comment_index import build_comment_index
+from org_tree import default_org_tree, org_level_documents, rollup_org_tree
+from tenant_config import TENANTS_PATH, count_tenants, iter_tenants
+
 random.seed(42)
 
 # ─── Paths ───────────────────────────────────────────────────────────────────
-TEMPLATE_DIR = Path.home() / "Projects" / "clima-dashboard" / "public" / "data"
-OUTPUT_BASE = Path.home() / "Projects" / "pulseorg" / "public" / "data"
-
-# ─── Company definitions ─────────────────────────────────────────────────────
-COMPANIES = {
-    "novatech": {
-        "name": "NovaTech Solutions",
-        "industry": "Tech / SaaS",
-        "employee_count": 450,
-        "departments": [
-            ("engineering", "Engineering"),
-            ("product", "Product"),
-            ("design", "Design"),
-            ("devops", "DevOps"),
-            ("data_science", "Data Science"),
-            ("sales", "Sales"),
-            ("customer_success", "Customer Success"),
-            ("marketing", "Marketing"),
-            ("people_ops", "People Ops"),
-            ("finance", "Finance"),
-        ],
-    },
-    "meridian": {
-        "name": "Meridian Stores",
-        "industry": "Retail",
-        "employee_count": 1200,
-        "departments": [
-            ("ventas_tienda", "Ventas Tienda"),
-            ("logistica", "Logística"),
-            ("e_commerce", "E-Commerce"),
-            ("marketing", "Marketing"),
-            ("rrhh", "RRHH"),
-            ("finanzas", "Finanzas"),
-            ("compras", "Compras"),
-            ("atencion_al_cliente", "Atención al Cliente"),
-            ("it", "IT"),
-            ("operaciones", "Operaciones"),
-        ],
-    },
-    "atlas": {
-        "name": "Atlas Capital Group",
-        "industry": "Finanzas",
-        "employee_count": 350,
-        "departments": [
-            ("banca_privada", "Banca Privada"),
-            ("cumplimiento", "Cumplimiento"),
-            ("riesgos", "Riesgos"),
-            ("tesoreria", "Tesorería"),
-            ("operaciones", "Operaciones"),
-            ("tecnologia", "Tecnología"),
-            ("legal", "Legal"),
-            ("auditoria", "Auditoría"),
-            ("rrhh", "RRHH"),
-            ("marketing", "Marketing"),
-        ],
-    },
-    "vitacore": {
-        "name": "VitaCore Health",
-        "industry": "Salud",
-        "employee_count": 800,
-        "departments": [
-            ("medicina_general", "Medicina General"),
-            ("enfermeria", "Enfermería"),
-            ("farmacia", "Farmacia"),
-            ("laboratorio", "Laboratorio"),
-            ("administracion", "Administración"),
-            ("ti_salud", "TI Salud"),
-            ("recursos_humanos", "Recursos Humanos"),
-            ("calidad", "Calidad"),
-            ("urgencias", "Urgencias"),
-            ("investigacion", "Investigación"),
-        ],
-    },
+# Defaults point at this repo; override with --templates / --output / --tenants.
+# Tenant definitions (departments, narrative offsets, engagement profiles, risk
+# narratives and models) live in tenant config files, see tenant_config.py.
+REPO_DATA = Path(__file__).resolve().parent.parent / "public" / "data"
+TEMPLATE_DIR = REPO_DATA
+OUTPUT_BASE = REPO_DATA
+
+# ─── Run control ─────────────────────────────────────────────────────────────
+BATCH_SIZE = 50                   # tenants per worker chunk / progress line
+VERBOSE = True                    # per-file progress lines (off with --quiet)
+TEMPLATE_FILES = [
+    "clima_v2_data.json", "clima_demographics.json", "segmentation_data.json",
+    "predictions_data.json", "correlations_data.json", "clustering_data.json",
+    "recognition_data.json", "text_analysis_data.json", "unified_analysis.json",
+]
+# Document each generator produces, so --profile-file can select its stage
+GENERATOR_FILES = {
+    "generate_clima_v2": "clima_v2_data.json", "generate_demographics": "clima_demographics.json",
+    "generate_segmentation": "segmentation_data.json", "generate_predictions": "predictions_data.json",
+    "generate_correlations": "correlations_data.json", "generate_clustering": "clustering_data.json",
+    "generate_recognition": "recognition_data.json", "generate_text_analysis": "text_analysis_data.json",
+    "generate_unified_analysis": "unified_analysis.json",
 }
 
+# ─── Output layout ───────────────────────────────────────────────────────────
+COMMENT_SHARD_SIZE = 200          # comments per text_analysis page
+COMMENT_SHARD_DIR = "text_analysis"
+COMMENT_INDEX_FILE = f"{COMMENT_SHARD_DIR}/comment_index.json"
+HEATMAP_LEGACY_CELLS = False      # also emit heatmap.cells (one dict per cell)
+ORG_MIN_N = 5                     # org-tree nodes below this respondent count are suppressed
+OUTPUT_FORMAT = "tree"            # "tree": one file per document; "pack": one indexed pack per tenant;
+                                  # "memory": kept in memory, see take_memory_documents()
+PACK_ROOT = None                  # fan-out root for packs (default: OUTPUT_BASE / "packs")
+WORDCLOUD_CACHE = None            # content-addressed word-cloud cache (default: OUTPUT_BASE / "wordclouds";
+                                  # no disk cache in "memory" mode unless set)
+SQLITE_PATH = None                # also load normalized rows into this SQLite file (see sqlite_sink.py)
+METRICS_DIR = None                # write run_report.json + pipeline.prom here (see instrumentation.py)
+TRACE_MEMORY = False              # with METRICS_DIR: also record tracemalloc peaks (slow)
+PROFILE_DIR = None                # write per-stage .prof / .collapsed files here (see profiling.py)
+PROFILE_COMPANY = None            # with PROFILE_DIR: only profile this tenant
+PROFILE_FILE = None               # with PROFILE_DIR: only profile the stages producing this document
+OPTIMIZE_PAYLOADS = False         # drop derivable fields and share repeated strings (see payload_codec.py)
+
+# Scenario variants for --scenarios K (see scenarios.py). Shifts are added to the
+# latest-year dimension scores; "base" only varies the narrative strength.
+SCENARIOS = [
+    {"id": "base", "label": "Narrativa actual", "shifts": {}},
+    {"id": "compensacion_mejora", "label": "Compensación mejora 0.2", "shifts": {"compensacion": 0.2}},
+    {"id": "liderazgo_mejora", "label": "Liderazgo mejora 0.15",
+     "shifts": {"liderazgo_efectivo": 0.15, "comunicacion_interna": 0.05}},
+    {"id": "balance_cae", "label": "Balance vida-trabajo cae 0.2", "shifts": {"balance_vida_trabajo": -0.2}},
+]
+
 # ─── 17 Dimensions ───────────────────────────────────────────────────────────
 DIMENSIONS = [
     ("innovacion_cambio", "Innovación y Gestión del Cambio"),
@@ -117,75 +136,6 @@ DIMENSIONS = [
 DIM_CODES = [d[0] for d in DIMENSIONS]
 DIM_NAMES = {d[0]: d[1] for d in DIMENSIONS}
 
-# ─── Narrative offsets per dimension per company ──────────────────────────────
-OFFSETS = {
-    "novatech": {
-        "innovacion_cambio": 0.25, "autonomia": 0.20, "balance_vida_trabajo": -0.35,
-        "proposito_trabajo": 0.0, "seguridad_fisica": -0.10, "cohesion_equipo": 0.0,
-        "cuidado_mutuo": -0.05, "liderazgo_efectivo": 0.05, "desarrollo_profesional": 0.10,
-        "compensacion": -0.10, "equidad_ascensos": -0.15, "beneficios_exclusivos": 0.0,
-        "comunicacion_interna": 0.05, "reconocimiento": 0.10, "orgullo_institucional": 0.10,
-        "resultados_logros": 0.10, "confianza_institucional": 0.10,
-    },
-    "meridian": {
-        "innovacion_cambio": -0.15, "autonomia": -0.10, "balance_vida_trabajo": -0.20,
-        "proposito_trabajo": 0.05, "seguridad_fisica": 0.10, "cohesion_equipo": 0.20,
-        "cuidado_mutuo": 0.15, "liderazgo_efectivo": 0.0, "desarrollo_profesional": -0.25,
-        "compensacion": -0.30, "equidad_ascensos": -0.20, "beneficios_exclusivos": -0.20,
-        "comunicacion_interna": -0.10, "reconocimiento": -0.10, "orgullo_institucional": 0.05,
-        "resultados_logros": -0.05, "confianza_institucional": 0.05,
-    },
-    "atlas": {
-        "innovacion_cambio": -0.30, "autonomia": -0.15, "balance_vida_trabajo": 0.05,
-        "proposito_trabajo": 0.05, "seguridad_fisica": 0.15, "cohesion_equipo": -0.10,
-        "cuidado_mutuo": -0.10, "liderazgo_efectivo": 0.20, "desarrollo_profesional": 0.10,
-        "compensacion": 0.20, "equidad_ascensos": -0.05, "beneficios_exclusivos": 0.15,
-        "comunicacion_interna": -0.15, "reconocimiento": 0.05, "orgullo_institucional": 0.15,
-        "resultados_logros": 0.15, "confianza_institucional": 0.15,
-    },
-    "vitacore": {
-        "innovacion_cambio": -0.10, "autonomia": 0.0, "balance_vida_trabajo": -0.25,
-        "proposito_trabajo": 0.30, "seguridad_fisica": 0.25, "cohesion_equipo": 0.10,
-        "cuidado_mutuo": 0.20, "liderazgo_efectivo": 0.05, "desarrollo_profesional": -0.30,
-        "compensacion": -0.20, "equidad_ascensos": -0.15, "beneficios_exclusivos": -0.10,
-        "comunicacion_interna": 0.10, "reconocimiento": -0.05, "orgullo_institucional": 0.10,
-        "resultados_logros": 0.0, "confianza_institucional": 0.10,
-    },
-}
-
-# Engagement profile distributions per company
-ENGAGEMENT_PROFILES = {
-    "novatech": {"Embajadores": 35, "Comprometidos Pragmáticos": 40, "Neutrales": 15, "Desvinculados": 10},
-    "meridian": {"Embajadores": 20, "Comprometidos Pragmáticos": 30, "Neutrales": 35, "Desvinculados": 15},
-    "atlas":    {"Embajadores": 25, "Comprometidos Pragmáticos": 45, "Neutrales": 20, "Desvinculados": 10},
-    "vitacore": {"Embajadores": 28, "Comprometidos Pragmáticos": 38, "Neutrales": 22, "Desvinculados": 12},
-}
-
-# Company-specific risk narratives
-RISK_NARRATIVES = {
-    "novatech": {
-        "primary": ("rf_balance", "Carga de trabajo excesiva en tech", "balance_vida_trabajo", 0.28),
-        "secondary": ("rf_equidad", "Falta de equidad en ascensos", "equidad_ascensos", 0.18),
-        "tertiary": ("rf_compensacion", "Compensación debajo del mercado tech", "compensacion", 0.14),
-    },
-    "meridian": {
-        "primary": ("rf_compensacion", "Satisfacción con compensación baja", "compensacion", 0.30),
-        "secondary": ("rf_desarrollo", "Oportunidades de desarrollo limitadas", "desarrollo_profesional", 0.22),
-        "tertiary": ("rf_beneficios", "Beneficios poco competitivos", "beneficios_exclusivos", 0.15),
-    },
-    "atlas": {
-        "primary": ("rf_innovacion", "Resistencia a la innovación", "innovacion_cambio", 0.25),
-        "secondary": ("rf_comunicacion", "Comunicación deficiente entre áreas", "comunicacion_interna", 0.18),
-        "tertiary": ("rf_cohesion", "Baja cohesión entre equipos", "cohesion_equipo", 0.12),
-    },
-    "vitacore": {
-        "primary": ("rf_desarrollo", "Pocas oportunidades de crecimiento", "desarrollo_profesional", 0.27),
-        "secondary": ("rf_balance", "Carga asistencial excesiva", "balance_vida_trabajo", 0.20),
-        "tertiary": ("rf_compensacion", "Compensación debajo del sector salud", "compensacion", 0.16),
-    },
-}
-
-
 # ─── Helpers ──────────────────────────────────────────────────────────────────
 
 def clamp(v, lo=1.0, hi=5.0):
@@ -201,6 +151,18 @@ def score_to_segment(score):
     if score >= 3.5: return "atencion"
     return "crisis"
 
+# Same bins as score_to_segment, lowest first, for vectorized lookups
+SEGMENT_THRESHOLDS = [3.5, 4.0, 4.2, 4.5]
+SEGMENT_LABELS = ["crisis", "atencion", "aceptable", "fortaleza_solida", "fortaleza_excepcional"]
+
+def scores_to_segments(scores):
+    """Vectorized score_to_segment over an array of scores."""
+    return np.asarray(SEGMENT_LABELS)[np.digitize(scores, SEGMENT_THRESHOLDS)]
+
+def numpy_rng():
+    """NumPy generator seeded from the stdlib RNG, so per-company seeding covers both."""
+    return np.random.default_rng(random.getrandbits(64))
+
 def score_to_favorability(score):
     """Convert 1-5 score to a favorability percentage."""
     base = (score - 1.0) / 4.0 * 100
@@ -210,27 +172,103 @@ def load_template(name):
     with open(TEMPLATE_DIR / name, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def save_json(company_id, name, data):
-    outdir = OUTPUT_BASE / company_id
-    outdir.mkdir(parents=True, exist_ok=True)
-    with open(outdir / name, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def pack_path(company_id):
+    return tenant_pack.fanout_path(PACK_ROOT or OUTPUT_BASE / "packs", company_id)
+
+
+def write_document(company_id, name, data):
+    """Write one document's bytes to the tenant's file tree or pack (see OUTPUT_FORMAT)."""
+    staged = _staged.get(company_id)
+    if staged is not None:
+        staged.append((name, data))
+        return
+    with instrumentation.stage(company_id, "write", name), profiling.stage(company_id, "write", name):
+        instrumentation.add_bytes(len(data))
+        pack = _open_packs.get(company_id)
+        if pack is not None:
+            tenant_pack.add_document(pack, name, data)
+        elif OUTPUT_FORMAT == "memory":
+            _memory_docs.setdefault(company_id, {})[name] = data
+        elif OUTPUT_FORMAT == "pack":
+            # Every append leaves superseded bytes behind, so writers batch: open the pack once
+            # per tenant around all of their writes, as _generate_tenant and finalize_tenant do
+            raise RuntimeError(f"{company_id}: writing {name} with no open pack")
+        else:
+            path = OUTPUT_BASE / company_id / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+
+
+def read_document(company_id, name):
+    if OUTPUT_FORMAT == "memory":
+        return _memory_docs[company_id][name]
+    if OUTPUT_FORMAT == "pack":
+        return tenant_pack.read_document(pack_path(company_id), name)
+    return (OUTPUT_BASE / company_id / name).read_bytes()
+
+
+def take_memory_documents(company_id):
+    """Remove and return {name: bytes} written for a tenant in "memory" output format."""
+    return _memory_docs.pop(company_id, {})
+
+
+def list_documents(company_id):
+    """{name: size in bytes} for every document written for a tenant."""
+    if OUTPUT_FORMAT == "memory":
+        return {name: len(data) for name, data in _memory_docs.get(company_id, {}).items()}
+    if OUTPUT_FORMAT == "pack":
+        return {name: length for name, (_, length) in tenant_pack.read_index(pack_path(company_id)).items()}
+    root = OUTPUT_BASE / company_id
+    return {f.relative_to(root).as_posix(): f.stat().st_size for f in root.rglob("*") if f.is_file()}
+
+
+def save_json(company_id, name, data, compact=False):
+    with instrumentation.stage(company_id, "encode", name), profiling.stage(company_id, "encode", name):
+        if OPTIMIZE_PAYLOADS:
+            data = payload_codec.encode_document(name, data)
+        if compact:
+            text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        else:
+            text = json.dumps(data, ensure_ascii=False, indent=2)
+        raw = text.encode("utf-8")
+        instrumentation.add_bytes(len(raw))
+    write_document(company_id, name, raw)
+
+
+def measured(company_id, fn, *args, **kwargs):
+    """fn(*args, **kwargs), recorded (and profiled) as a stage named after fn.
+
+    See instrumentation.py and profiling.py.
+    """
+    name = fn.__name__
+    with instrumentation.stage(company_id, name), profiling.stage(company_id, name, GENERATOR_FILES.get(name)):
+        return fn(*args, **kwargs)
+
+
+# Template copies and reference rewriting are timed separately inside each generator
+copy_template = instrumentation.timed("deepcopy")(copy.deepcopy)
+
 
 def distribute_respondents(total, n_groups):
     """Distribute total respondents across n groups roughly evenly with variance."""
     base = total // n_groups
     remainder = total % n_groups
+    floor = min(3, base)
     counts = []
     for i in range(n_groups):
         c = base + (1 if i < remainder else 0)
-        c = max(3, c + random.randint(-max(2, c // 5), max(2, c // 5)))
+        c = max(floor, c + random.randint(-max(2, c // 5), max(2, c // 5)))
         counts.append(c)
-    # Normalize to match total
+    # Normalize to match total; groups already at the floor are not taken from
     diff = total - sum(counts)
-    for i in range(abs(diff)):
+    while diff:
         idx = random.randint(0, n_groups - 1)
-        counts[idx] += 1 if diff > 0 else -1
-        counts[idx] = max(3, counts[idx])
+        if diff > 0:
+            counts[idx] += 1
+            diff -= 1
+        elif counts[idx] > floor:
+            counts[idx] -= 1
+            diff += 1
     return counts
 
 
@@ -238,10 +276,10 @@ def distribute_respondents(total, n_groups):
 
 def generate_clima_v2(template, company_id, company):
     """Generate clima_v2_data.json with narrative offsets."""
-    data = copy.deepcopy(template)
+    data = copy_template(template)
     data["generated_at"] = datetime.now().isoformat()
-    offsets = OFFSETS[company_id]
-    profiles = ENGAGEMENT_PROFILES[company_id]
+    offsets = company["offsets"]
+    profiles = company["engagement_profile"]
 
     respondent_scale = company["employee_count"] / 200  # base template had ~200
 
@@ -295,15 +333,53 @@ def generate_clima_v2(template, company_id, company):
     return data
 
 
-def generate_segmentation(template, company_id, company, clima_data):
-    """Generate segmentation_data.json with POPULATED dimensions."""
-    data = copy.deepcopy(template)
+def heatmap_payload(scores, departments, department_keys, dimensions, dimension_keys,
+                    include_cells=False):
+    """Serialize a department × dimension score matrix.
+
+    Rows follow ``departments`` and columns follow ``dimensions``. Segments are
+    not stored per cell; they derive from the scores via ``segment_bins``.
+    With include_cells, the legacy one-dict-per-cell list is added as well.
+    """
+    heatmap = {
+        "dimensions": dimensions,
+        "dimension_keys": dimension_keys,
+        "departments": departments,
+        "department_keys": department_keys,
+        "scores": scores.tolist(),
+        "segment_bins": {"thresholds": SEGMENT_THRESHOLDS, "labels": SEGMENT_LABELS},
+    }
+    if include_cells:
+        segments = scores_to_segments(scores)
+        heatmap["cells"] = [
+            {
+                "department": dept_name,
+                "dimension": dim_name,
+                "score": float(scores[i, j]),
+                "segment": str(segments[i, j]),
+            }
+            for i, dept_name in enumerate(departments)
+            for j, dim_name in enumerate(dimensions)
+        ]
+    return heatmap
+
+
+def generate_segmentation(template, company_id, company, clima_data, demographics_data,
+                          include_cells=HEATMAP_LEGACY_CELLS):
+    """Generate segmentation_data.json with POPULATED dimensions.
+
+    Segment respondent counts are the latest demographics counts, so both
+    documents partition the same sample_n.
+    """
+    data = copy_template(template)
     data["generated_at"] = datetime.now().isoformat()
 
-    offsets = OFFSETS[company_id]
+    offsets = company["offsets"]
     depts = company["departments"]
     total = company["employee_count"]
-    dept_counts = distribute_respondents(int(total * 0.85), len(depts))
+    latest_demo = demographics_data["years"][max(demographics_data["years"])]
+    counts = latest_demo["demographics"]
+    dept_counts = [counts["departments"][name] for _, name in depts]
 
     # Get global scores from 2026 (latest year) clima data
     latest_year = max(clima_data["years"].keys())
@@ -312,29 +388,38 @@ def generate_segmentation(template, company_id, company, clima_data):
 
     data["global_engagement"] = global_eng.get("engagement_pct", 88.0)
     data["global_score"] = global_eng.get("engagement_score", 4.4)
-    data["total_respondents"] = total
-
-    def make_segment_dimensions(segment_offset_factor):
-        """Create 17 SegmentDimensionScore entries with variance from global."""
-        dims = []
-        for code, name in DIMENSIONS:
-            g = global_dims.get(code)
-            if not g:
-                continue
-            variance = random.uniform(-0.15, 0.15) * segment_offset_factor + jitter(0.05)
-            seg_score = clamp(g["avg_score"] + variance)
-            fav = round(score_to_favorability(seg_score), 1)
-            dims.append({
-                "dimension_code": code,
-                "dimension_name": name,
-                "avg_score": seg_score,
-                "favorability_pct": fav,
-                "gap_vs_global": round(seg_score - g["avg_score"], 2),
-            })
-        return dims
+    data["total_respondents"] = latest_demo["ficha_tecnica"]["sample_n"]
+
+    rng = numpy_rng()
+    seg_dims = [(code, name) for code, name in DIMENSIONS if code in global_dims]
+    global_vec = np.array([global_dims[code]["avg_score"] for code, _ in seg_dims])
+
+    def make_segment_dimensions(segment_offset_factors):
+        """Create 17 SegmentDimensionScore entries for each segment, one matrix draw per group."""
+        factors = np.asarray(segment_offset_factors)[:, None]
+        shape = (len(factors), len(seg_dims))
+        variance = rng.uniform(-0.15, 0.15, shape) * factors + rng.uniform(-0.05, 0.05, shape)
+        scores = np.clip(global_vec + variance, 1.0, 5.0).round(2)
+        fav = np.clip((scores - 1.0) / 4.0 * 100 + rng.uniform(-3, 3, shape), 0, 100).round(1)
+        gaps = (scores - global_vec).round(2)
+        scores, fav, gaps = scores.tolist(), fav.tolist(), gaps.tolist()
+        return [
+            [
+                {
+                    "dimension_code": code,
+                    "dimension_name": name,
+                    "avg_score": scores[i][j],
+                    "favorability_pct": fav[i][j],
+                    "gap_vs_global": gaps[i][j],
+                }
+                for j, (code, name) in enumerate(seg_dims)
+            ]
+            for i in range(len(factors))
+        ]
 
     # by_department
     data["by_department"] = []
+    dept_dims = make_segment_dimensions([1.0 + random.uniform(-0.3, 0.3) for _ in depts])
     for i, (dept_id, dept_name) in enumerate(depts):
         resp = dept_counts[i]
         dept_eng = clamp(data["global_score"] + random.uniform(-0.3, 0.3) + jitter())
@@ -345,7 +430,7 @@ def generate_segmentation(template, company_id, company, clima_data):
             "respondent_count": resp,
             "engagement_score": dept_eng,
             "engagement_pct": clamp(dept_eng / 5.0 * 100, 50, 100),
-            "dimensions": make_segment_dimensions(1.0 + random.uniform(-0.3, 0.3)),
+            "dimensions": dept_dims[i],
         })
 
     # by_tenure
@@ -356,10 +441,11 @@ def generate_segmentation(template, company_id, company, clima_data):
         ("entre_5_y_7_años", "5-7 años"),
         ("mas_de_7_años", "Más de 7 años"),
     ]
-    tenure_pcts = [0.22, 0.30, 0.18, 0.12, 0.18]
     data["by_tenure"] = []
-    for (tid, tname), pct in zip(tenures, tenure_pcts):
-        resp = max(10, int(total * pct * random.uniform(0.85, 1.15)))
+    tenure_dims = make_segment_dimensions([0.8] * len(tenures))
+    # Demographics uses short labels ("<1 año", ...) in the same order
+    tenure_counts = list(counts["tenures"].values())
+    for i, ((tid, tname), resp) in enumerate(zip(tenures, tenure_counts)):
         eng = clamp(data["global_score"] + random.uniform(-0.2, 0.2) + jitter())
         data["by_tenure"].append({
             "segment_id": tid,
@@ -368,18 +454,19 @@ def generate_segmentation(template, company_id, company, clima_data):
             "respondent_count": resp,
             "engagement_score": eng,
             "engagement_pct": clamp(eng / 5.0 * 100, 50, 100),
-            "dimensions": make_segment_dimensions(0.8),
+            "dimensions": tenure_dims[i],
         })
 
     # by_gender
     genders = [
-        ("masculino", "Masculino", 0.45),
-        ("femenino", "Femenino", 0.50),
-        ("otro", "Otro", 0.05),
+        ("masculino", "Masculino"),
+        ("femenino", "Femenino"),
+        ("otro", "Otro"),
     ]
     data["by_gender"] = []
-    for gid, gname, pct in genders:
-        resp = max(5, int(total * pct * random.uniform(0.9, 1.1)))
+    gender_dims = make_segment_dimensions([0.6] * len(genders))
+    for i, (gid, gname) in enumerate(genders):
+        resp = counts["genders"][gname]
         eng = clamp(data["global_score"] + random.uniform(-0.15, 0.15) + jitter())
         data["by_gender"].append({
             "segment_id": gid,
@@ -388,11 +475,11 @@ def generate_segmentation(template, company_id, company, clima_data):
             "respondent_count": resp,
             "engagement_score": eng,
             "engagement_pct": clamp(eng / 5.0 * 100, 50, 100),
-            "dimensions": make_segment_dimensions(0.6),
+            "dimensions": gender_dims[i],
         })
 
     # risk_groups
-    risk_narrative = RISK_NARRATIVES[company_id]
+    risk_narrative = company["risk_narratives"]
     data["risk_groups"] = [
         {
             "group_name": "Alto Riesgo",
@@ -420,40 +507,91 @@ def generate_segmentation(template, company_id, company, clima_data):
         },
     ]
 
-    # heatmap
+    # heatmap — dense department × dimension score matrix
     key_dims = ["innovacion_cambio", "balance_vida_trabajo", "liderazgo_efectivo",
                 "compensacion", "desarrollo_profesional", "cohesion_equipo"]
-    cells = []
-    for dept_id, dept_name in depts:
-        for dim_code in key_dims:
-            g = global_dims.get(dim_code)
-            base = g["avg_score"] if g else 4.0
-            score = clamp(base + random.uniform(-0.4, 0.4) + jitter())
-            cells.append({
-                "department": dept_name,
-                "dimension": DIM_NAMES.get(dim_code, dim_code),
-                "score": score,
-                "segment": score_to_segment(score),
-            })
-
-    data["heatmap"] = {
-        "dimensions": [DIM_NAMES[d] for d in key_dims],
-        "departments": [d[1] for d in depts],
-        "cells": cells,
-    }
+    base = np.array([global_dims[d]["avg_score"] if d in global_dims else 4.0 for d in key_dims])
+    shape = (len(depts), len(key_dims))
+    scores = base + rng.uniform(-0.4, 0.4, shape) + rng.uniform(-0.05, 0.05, shape)
+    scores = np.clip(scores, 1.0, 5.0).round(2)
+
+    data["heatmap"] = heatmap_payload(
+        scores,
+        departments=[d[1] for d in depts],
+        department_keys=[d[0] for d in depts],
+        dimensions=[DIM_NAMES[d] for d in key_dims],
+        dimension_keys=key_dims,
+        include_cells=include_cells,
+    )
 
     return data
 
 
+def generate_org_levels(company_id, company, clima_data, seg):
+    """Roll the company org tree up into per-level segmentation files.
+
+    Uses company["org_tree"] when configured, otherwise company → departments.
+    Department nodes are anchored to the segmentation by_department counts and
+    scores, and the tree splits the same sample, so the roll-up restates them.
+    Returns (manifest, [(path, document), ...]); the manifest goes into
+    segmentation_data.json so the page can load levels lazily.
+    """
+    if company.get("org_tree"):
+        root, level_names = company["org_tree"], company.get("org_levels")
+    else:
+        root, level_names = default_org_tree(company_id, company), ["company", "department"]
+    latest_year = max(clima_data["years"].keys())
+    global_dims = {d["dimension_code"]: d["avg_score"] for d in clima_data["years"][latest_year]["dimensions"]}
+    codes = [code for code in DIM_CODES if code in global_dims]
+    global_scores = np.array([global_dims[code] for code in codes])
+    anchors = {}
+    for segment in seg["by_department"]:
+        dept_dims = {d["dimension_code"]: d["avg_score"] for d in segment["dimensions"]}
+        anchors[segment["segment_id"]] = (segment["respondent_count"], [dept_dims[code] for code in codes])
+
+    tree = rollup_org_tree(
+        root, global_scores, seg["total_respondents"], numpy_rng(),
+        min_n=company.get("org_min_n", ORG_MIN_N), anchors=anchors,
+    )
+    return org_level_documents(tree, codes, global_scores, level_names=level_names)
+
+
+def generate_respondents(company_id, company, clima_data, demographics_data):
+    """Synthetic respondent records (labels, codes, scores), shared by the cube and risk model."""
+    return olap_cube.synthesize_respondents(clima_data, demographics_data, DIM_CODES, numpy_rng())
+
+
+def generate_scenarios(company_id, company, clima_data, seg, k):
+    """K Monte Carlo realizations per scenario, reduced to banded deltas (see scenarios.py)."""
+    years = sorted(clima_data["years"])
+    by_code = [{d["dimension_code"]: d["avg_score"] for d in clima_data["years"][y]["dimensions"]} for y in years]
+    base = np.array([[scores.get(code, np.nan) for code in DIM_CODES] for scores in by_code])
+    offsets = np.array([company["offsets"].get(code, 0.0) for code in DIM_CODES])
+    year_factor = np.array([0.5 + 0.5 * ((int(y) - 2023) / 3) for y in years])
+
+    rng = numpy_rng()
+    realized, _ = scenarios.realize(base, offsets, year_factor, scenarios.shift_matrix(SCENARIOS, DIM_CODES), k, rng)
+
+    heat = seg["heatmap"]
+    seg_codes = heat["dimension_keys"]
+    seg_cols = [DIM_CODES.index(code) for code in seg_codes]
+    seg_base = np.array(heat["scores"], dtype=np.float64)
+    company_delta = np.nan_to_num(realized[:, :, -1, seg_cols] - base[-1, seg_cols])
+    seg_realized = scenarios.realize_segments(seg_base, company_delta, rng)
+
+    return scenarios.scenario_documents(SCENARIOS, k, years, DIM_CODES, base, realized,
+                                        heat["departments"], seg_codes, seg_base, seg_realized)
+
+
 def generate_demographics(template, company_id, company, clima_data):
     """Generate clima_demographics.json."""
-    data = copy.deepcopy(template)
+    data = copy_template(template)
     data["generated_at"] = datetime.now().isoformat()
     data["model_version"] = "v2_demographics"
 
     depts = company["departments"]
     total = company["employee_count"]
-    offsets = OFFSETS[company_id]
+    offsets = company["offsets"]
 
     respondent_scale = total / 200
 
@@ -461,6 +599,10 @@ def generate_demographics(template, company_id, company, clima_data):
         ft = year_data["ficha_tecnica"]
         pop = max(50, int(ft["population_n"] * respondent_scale))
         sample = max(40, int(pop * ft["response_rate"] / 100))
+        if year_key in clima_data["years"]:
+            # Same survey: the sample is clima's respondent count for the year
+            sample = clima_data["years"][year_key]["respondent_count"]
+            pop = max(pop, sample)
         ft["population_n"] = pop
         ft["sample_n"] = sample
         ft["response_rate"] = round(sample / pop * 100, 1)
@@ -475,8 +617,8 @@ def generate_demographics(template, company_id, company, clima_data):
         # Genders - redistribute
         total_gender = sample
         m = int(total_gender * random.uniform(0.40, 0.55))
-        f = int(total_gender * random.uniform(0.40, 0.50))
-        o = max(1, total_gender - m - f)
+        f = min(int(total_gender * random.uniform(0.40, 0.50)), total_gender - m - 1)
+        o = total_gender - m - f  # at least 1, and the three always sum to sample_n
         year_data["demographics"]["genders"] = {
             "Masculino": m, "Femenino": f, "Otro": o
         }
@@ -536,117 +678,243 @@ def generate_demographics(template, company_id, company, clima_data):
     return data
 
 
-def generate_predictions(template, company_id, company, clima_data):
+ROTATION_TREND = {"improving": "down", "worsening": "up"}
+
+
+def generate_predictions(template, company_id, company, clima_data, cube=None, respondents=None):
     """Generate predictions_data.json."""
-    data = copy.deepcopy(template)
+    data = copy_template(template)
     data["generated_at"] = datetime.now().isoformat()
     data["total_respondents"] = company["employee_count"]
 
-    offsets = OFFSETS[company_id]
-    depts = company["departments"]
-    risk_narr = RISK_NARRATIVES[company_id]
-
+    offsets = company["offsets"]
     avg_offset = sum(offsets.values()) / len(offsets)
 
-    # Rotation risk
+    # Rotation risk - logistic model scored over every respondent
     rr = data["rotation_risk"]
-    rr["overall_index"] = max(3, min(40, int(rr["overall_index"] - avg_offset * 10 + jitter(2))))
-
-    # Risk factors - use company-specific narratives
-    rr["risk_factors"] = [
-        {
-            "id": risk_narr["primary"][0],
-            "factor": risk_narr["primary"][1],
-            "impact_score": round(risk_narr["primary"][3] + jitter(0.02), 2),
-            "affected_percentage": max(5, int(24 + random.uniform(-5, 5))),
-            "dimension": risk_narr["primary"][2],
-            "avg_score": clamp(3.8 + offsets.get(risk_narr["primary"][2], 0) + jitter()),
-        },
-        {
-            "id": risk_narr["secondary"][0],
-            "factor": risk_narr["secondary"][1],
-            "impact_score": round(risk_narr["secondary"][3] + jitter(0.02), 2),
-            "affected_percentage": max(5, int(18 + random.uniform(-4, 4))),
-            "dimension": risk_narr["secondary"][2],
-            "avg_score": clamp(4.0 + offsets.get(risk_narr["secondary"][2], 0) + jitter()),
-        },
-        {
-            "id": risk_narr["tertiary"][0],
-            "factor": risk_narr["tertiary"][1],
-            "impact_score": round(risk_narr["tertiary"][3] + jitter(0.02), 2),
-            "affected_percentage": max(5, int(12 + random.uniform(-3, 3))),
-            "dimension": risk_narr["tertiary"][2],
-            "avg_score": clamp(4.2 + offsets.get(risk_narr["tertiary"][2], 0) + jitter()),
-        },
-    ]
-
-    # High risk areas - use company departments
-    chosen_depts = random.sample(depts, min(5, len(depts)))
-    rr["high_risk_areas"] = []
-    for i, (dept_id, dept_name) in enumerate(chosen_depts):
-        risk_level = max(3, 18 - i * 3 + random.randint(-2, 2))
-        eng = clamp(3.7 + i * 0.15 + avg_offset + jitter(0.1))
-        headcount = max(5, int(company["employee_count"] / len(depts) * random.uniform(0.5, 1.5)))
-        issues = random.sample(
-            [risk_narr["primary"][1].split(" ")[0], risk_narr["secondary"][1].split(" ")[0],
-             "Reconocimiento", "Comunicación", "Liderazgo"],
-            k=random.randint(1, 2)
-        )
-        rr["high_risk_areas"].append({
-            "area": dept_name,
-            "risk_level": risk_level,
-            "engagement_score": eng,
-            "headcount": headcount,
-            "key_issues": issues,
-        })
+    # The template says "improving"/"worsening"; the page expects the risk index direction
+    rr["trend"] = ROTATION_TREND.get(rr.get("trend"), rr.get("trend", "stable"))
+    if respondents is not None:
+        rr.update(score_rotation_risk(company_id, company, respondents))
 
     # Engagement-rotation correlation - apply offset
     if "engagement_rotation_correlation" in rr:
         for point in rr["engagement_rotation_correlation"]:
             point["rotation"] = max(1, int(point["rotation"] - avg_offset * 5 + jitter(2)))
 
-    # Projections - apply offsets
+    # Projections - fitted forecasts (see forecasting.py)
     if "projections" in data:
-        proj = data["projections"]
-        # Overall
-        if "overall" in proj:
-            ov = proj["overall"]
-            ov["current_score"] = clamp(ov["current_score"] + avg_offset + jitter())
-            for h in ov.get("historical", []):
-                h["score"] = clamp(h["score"] + avg_offset + jitter(0.03))
-            for f in ov.get("forecast", []):
-                for k in ["optimistic", "expected", "pessimistic"]:
-                    if k in f:
-                        f[k] = clamp(f[k] + avg_offset + jitter(0.03))
-
-        # By dimension
-        if "by_dimension" in proj:
-            for dim_proj in proj["by_dimension"]:
-                # Find matching dimension code
-                dim_name = dim_proj.get("dimension", dim_proj.get("label", ""))
-                matching_code = None
-                for code, name in DIMENSIONS:
-                    if name == dim_name:
-                        matching_code = code
-                        break
-                dim_offset = offsets.get(matching_code, 0) if matching_code else 0
-
-                dim_proj["current_score"] = clamp(dim_proj["current_score"] + dim_offset + jitter())
-                for f in dim_proj.get("forecast", []):
-                    for k in ["optimistic", "expected", "pessimistic"]:
-                        if k in f:
-                            f[k] = clamp(f[k] + dim_offset + jitter(0.03))
+        data["projections"] = generate_projections(data["projections"], clima_data, cube, avg_offset)
+        data.setdefault("statistical_metadata", {}).update({
+            "model": forecasting.MODEL_NAME,
+            "confidence_level": 0.8,
+        })
+
+    # Early alerts - detected from the company and department series
+    data["early_alerts"] = generate_early_alerts(clima_data, cube, data["generated_at"])
+    trends = [d.get("trend") for d in data.get("projections", {}).get("by_dimension", [])]
+    forecast = data.get("projections", {}).get("overall", {}).get("forecast", [])
+    overall_trend = "stable"
+    if forecast and forecast[-1]["expected"] - forecast[0]["expected"] > 0.02:
+        overall_trend = "up"
+    elif forecast and forecast[-1]["expected"] - forecast[0]["expected"] < -0.02:
+        overall_trend = "down"
+    data["summary"] = {
+        "total_alerts": len(data["early_alerts"]),
+        "new_alerts": sum(1 for a in data["early_alerts"] if a["is_new"]),
+        "high_severity_alerts": sum(1 for a in data["early_alerts"] if a["severity"] == "high"),
+        "dimensions_improving": trends.count("up"),
+        "dimensions_declining": trends.count("down"),
+        "overall_trend": overall_trend,
+        "last_updated": data["generated_at"][:10],
+    }
 
     return data
 
 
+def generate_early_alerts(clima_data, cube, created_at):
+    """Scan every dimension × area series (company level plus departments) for declines."""
+    years = sorted(clima_data["years"])
+    by_code = [{d["dimension_code"]: d["avg_score"] for d in clima_data["years"][y]["dimensions"]} for y in years]
+    rows = [[scores.get(code, np.nan) for scores in by_code] for code in DIM_CODES]
+    keys = [(code, None) for code in DIM_CODES]
+
+    if cube is not None:
+        dept_roll = olap_cube.rollup(cube, keep=("year", "department"))
+        dept_avg, _, _ = olap_cube.cube_scores(dept_roll)           # (Y, Dp, K)
+        for d, dept in enumerate(dept_roll["axes"]["department"]):
+            for k, code in enumerate(dept_roll["axes"]["dimension"]):
+                rows.append(dept_avg[:, d, k])
+                keys.append((code, dept))
+
+    # Annual surveys: one period is twelve months
+    periods = [f"{y}-12" for y in years]
+    return early_alerts.build_alerts(np.array(rows), keys, periods, DIM_NAMES, created_at, period_months=12)
+
+
+def score_rotation_risk(company_id, company, respondents, n_areas=5, n_factors=5):
+    """rotation_risk fields from the company risk model over latest-year respondents."""
+    labels, codes, scores = respondents
+    latest = codes[:, 0] == len(labels["year"]) - 1
+    codes, scores = codes[latest], scores[latest]
+    depts = labels["department"]
+
+    weights, intercept = turnover_risk.model_weights(company["risk_model"], DIM_CODES)
+    p = turnover_risk.score_respondents(scores, weights, intercept)
+    mean_p, at_risk, counts = turnover_risk.risk_by_group(p, codes[:, 1], len(depts))
+    drivers = turnover_risk.group_drivers(scores, codes[:, 1], len(depts), weights)
+    impact, affected, avg_score = turnover_risk.factor_contributions(scores, weights)
+
+    # Narrative labels where the company has one, dimension names otherwise
+    narratives = {n[2]: n for n in company["risk_narratives"].values()}
+    risk_factors = []
+    for k in np.argsort(-impact)[:n_factors]:
+        if impact[k] <= 0:
+            break
+        code = DIM_CODES[k]
+        narrative = narratives.get(code)
+        risk_factors.append({
+            "id": narrative[0] if narrative else f"rf_{code}",
+            "factor": narrative[1] if narrative else f"{DIM_NAMES[code]} por debajo de lo esperado",
+            "impact_score": round(float(impact[k]), 2),
+            "affected_percentage": int(round(affected[k])),
+            "dimension": code,
+            "avg_score": round(float(avg_score[k]), 2),
+        })
+
+    # Headcount scales surveyed respondents back up to the workforce
+    to_headcount = company["employee_count"] / max(1, len(p))
+    dept_eng = np.bincount(codes[:, 1], weights=np.nanmean(scores, axis=1), minlength=len(depts))
+    high_risk_areas = []
+    for d in np.argsort(-mean_p)[:n_areas]:
+        if counts[d] == 0:
+            continue
+        high_risk_areas.append({
+            "area": depts[d],
+            "risk_level": int(round(mean_p[d] * 100)),
+            "engagement_score": round(float(dept_eng[d] / counts[d]), 2),
+            "headcount": max(1, int(round(counts[d] * to_headcount))),
+            "at_risk_percentage": round(float(at_risk[d] * 100), 1),
+            "key_issues": [DIM_NAMES[DIM_CODES[k]] for k in drivers[d]],
+        })
+
+    return {
+        "overall_index": int(round(p.mean() * 100)),
+        "affected_percentage": round(float((p >= turnover_risk.HIGH_RISK_P).mean() * 100), 1),
+        "risk_factors": risk_factors,
+        "high_risk_areas": high_risk_areas,
+    }
+
+
+def add_months(month, k):
+    """'2026-12' + 2 -> '2027-02'."""
+    year, mon = map(int, month.split("-"))
+    idx = year * 12 + (mon - 1) + k
+    return f"{idx // 12:04d}-{idx % 12 + 1:02d}"
+
+
+def dimension_code_for(label):
+    """Match a template dimension label to a code (exact name, then prefix)."""
+    for code, name in DIMENSIONS:
+        if name == label:
+            return code
+    for code, name in DIMENSIONS:
+        if name.startswith(label) or label.startswith(name):
+            return code
+    return None
+
+
+def generate_projections(proj, clima_data, cube, avg_offset, horizon_months=12):
+    """Fit damped-trend models to every score series and rebuild projections.
+
+    The overall monthly series is forecast month by month. Company-level
+    dimension series and department × dimension series (annual, from clima
+    and the OLAP cube) are stacked into one array and fitted in one call;
+    fractional horizons give their 6- and 12-month projections.
+    """
+    # Overall monthly series: keep the narrative shift on history, forecast from the fit
+    ov = proj.get("overall", {})
+    for h in ov.get("historical", []):
+        h["score"] = clamp(h["score"] + avg_offset + jitter(0.03))
+    if ov.get("historical"):
+        hist = np.array([[h["score"] for h in ov["historical"]]])
+        fit = forecasting.fit_damped_trend(hist)
+        exp_, opt, pess = forecasting.forecast(fit, np.arange(1, horizon_months + 1))
+        last_month = ov["historical"][-1]["month"]
+        ov["current_score"] = ov["historical"][-1]["score"]
+        ov["forecast"] = [
+            {
+                "month": add_months(last_month, k + 1),
+                "optimistic": round(float(opt[0, k]), 2),
+                "expected": round(float(exp_[0, k]), 2),
+                "pessimistic": round(float(pess[0, k]), 2),
+            }
+            for k in range(horizon_months)
+        ]
+
+    # Annual series: company × dimension, then department × dimension, stacked
+    years = sorted(clima_data["years"])
+    by_code = [{d["dimension_code"]: d["avg_score"] for d in clima_data["years"][y]["dimensions"]} for y in years]
+    company_series = np.array([[scores.get(code, np.nan) for scores in by_code] for code in DIM_CODES])
+    series = [company_series]
+    if cube is not None:
+        dept_roll = olap_cube.rollup(cube, keep=("year", "department"))
+        dept_avg, _, _ = olap_cube.cube_scores(dept_roll)           # (Y, Dp, K)
+        dept_series = dept_avg.transpose(1, 2, 0).reshape(-1, dept_avg.shape[0])
+        series.append(dept_series)
+    stacked = np.vstack(series)
+
+    fit = forecasting.fit_damped_trend(stacked)
+    exp_, opt, pess = forecasting.forecast(fit, [0.5, 1.0])
+    trends = forecasting.trend_labels(fit)
+    current = np.array([row[~np.isnan(row)][-1] if (~np.isnan(row)).any() else np.nan for row in stacked])
+    n_dims = len(DIM_CODES)
+
+    dim_index = {code: k for k, code in enumerate(DIM_CODES)}
+    for dim_proj in proj.get("by_dimension", []):
+        code = dimension_code_for(dim_proj.get("dimension", dim_proj.get("label", "")))
+        if code is None:
+            continue
+        k = dim_index[code]
+        band = float(opt[k, 1] - pess[k, 1])
+        dim_proj.update({
+            "current_score": round(float(current[k]), 2),
+            "projected_6m": round(float(exp_[k, 0]), 2),
+            "projected_12m": round(float(exp_[k, 1]), 2),
+            "trend": trends[k],
+            "change_rate": round(float(fit["trend"][k]) / 12, 3),
+            # Narrower 12-month band -> higher confidence
+            "confidence": round(min(0.99, max(0.5, 1 - band / 2)), 2),
+        })
+
+    if cube is not None:
+        dp = slice(n_dims, None)
+        shape = (len(dept_roll["axes"]["department"]), n_dims)
+
+        def as_matrix(arr):
+            return np.where(np.isnan(arr), None, arr.round(2)).reshape(shape).tolist()
+
+        proj["by_department"] = {
+            "departments": dept_roll["axes"]["department"],
+            "dimension_codes": DIM_CODES,
+            "current": as_matrix(current[dp]),
+            "projected_6m": as_matrix(exp_[dp, 0]),
+            "projected_12m": as_matrix(exp_[dp, 1]),
+            "optimistic_12m": as_matrix(opt[dp, 1]),
+            "pessimistic_12m": as_matrix(pess[dp, 1]),
+            "trend": trends[dp].reshape(shape).tolist(),
+        }
+
+    return proj
+
+
 def generate_correlations(template, company_id, company):
     """Generate correlations_data.json."""
-    data = copy.deepcopy(template)
+    data = copy_template(template)
     data["generated_at"] = datetime.now().isoformat()
     data["total_respondents"] = company["employee_count"]
 
-    offsets = OFFSETS[company_id]
+    offsets = company["offsets"]
 
     # Adjust correlation matrix with small perturbations
     if "correlation_matrix" in data:
@@ -675,6 +943,7 @@ def replace_company_refs(text, company_name, company_id):
     return text
 
 
+@instrumentation.timed("deep_replace_refs")
 def deep_replace_refs(obj, company_name, company_id):
     """Recursively replace Towerbank/Tower references in all strings."""
     if isinstance(obj, str):
@@ -688,7 +957,7 @@ def deep_replace_refs(obj, company_name, company_id):
 
 def generate_clustering(template, company_id, company):
     """Generate clustering_data.json."""
-    data = copy.deepcopy(template)
+    data = copy_template(template)
     data["generated_at"] = datetime.now().isoformat()
 
     total = company["employee_count"]
@@ -696,14 +965,41 @@ def generate_clustering(template, company_id, company):
     dept_names = [d[1] for d in depts]
     dept_ids = [d[0] for d in depts]
 
-    # Update nodes with company departments
+    # Update nodes with company departments; border colors mark the department, as in the template
     if "nodes" in data:
+        palette = list(dict.fromkeys(node["border_color"] for node in data["nodes"]
+                                     if node.get("type") == "participant" and "border_color" in node))
         for node in data["nodes"]:
             if node.get("type") == "participant":
                 # Assign a random department from this company
                 idx = random.randint(0, len(depts) - 1)
                 node["department"] = dept_ids[idx]
                 node["department_name"] = dept_names[idx]
+                if palette:
+                    node["border_color"] = palette[idx % len(palette)]
+
+    # The template has edges to a theme node it never defines (T_general); drop them
+    node_ids = {node["id"] for node in data.get("nodes", [])}
+    edges = [e for e in data.get("edges", []) if e["source"] in node_ids and e["target"] in node_ids]
+    if len(edges) != len(data.get("edges", [])):
+        data["edges"] = edges
+        metrics = data["metrics"]
+        metrics["total_edges"] = len(edges)
+        metrics["theme_edges"] = sum(1 for e in edges if e["type"] == "participant_theme")
+        metrics["participant_edges"] = len(edges) - metrics["theme_edges"]
+
+    # Department/profile distributions count the participant nodes, which were just reassigned
+    metrics = data.get("metrics", {})
+    participants = [n for n in data.get("nodes", []) if n.get("type") == "participant"]
+    if "department_distribution" in metrics:
+        by_dept = {}
+        for node in participants:
+            by_dept[node["department_name"]] = by_dept.get(node["department_name"], 0) + 1
+        metrics["department_distribution"] = [
+            {"department": name, "count": n} for name, n in sorted(by_dept.items(), key=lambda kv: -kv[1])
+        ]
+    for row in metrics.get("profile_distribution", []):
+        row["count"] = sum(1 for node in participants if node.get("profile") == row["profile"])
 
     # Adjust cluster sizes
     if "clusters" in data:
@@ -717,89 +1013,148 @@ def generate_clustering(template, company_id, company):
     return data
 
 
-def generate_recognition(template, company_id, company, clima_data):
-    """Generate recognition_data.json."""
-    data = copy.deepcopy(template)
-    data["generated_at"] = datetime.now().isoformat()
+# Recognition metrics: page key -> dimension code (engagement is the mean over all dimensions)
+RECOGNITION_METRICS = [
+    ("engagement", None),
+    ("orgullo_institucional", "orgullo_institucional"),
+    ("liderazgo", "liderazgo_efectivo"),
+    ("comunicacion", "comunicacion_interna"),
+    ("desarrollo", "desarrollo_profesional"),
+    ("compensacion", "compensacion"),
+    ("reconocimiento", "reconocimiento"),
+    ("balance", "balance_vida_trabajo"),
+    ("cohesion", "cohesion_equipo"),
+]
+RECOGNITION_METRIC_NAMES = {
+    "orgullo_institucional": "Orgullo Institucional",
+    "engagement": "Engagement Global",
+    "liderazgo": "Liderazgo Efectivo",
+    "comunicacion": "Comunicación Interna",
+    "desarrollo": "Desarrollo Profesional",
+    "compensacion": "Compensación",
+    "reconocimiento": "Reconocimiento",
+    "balance": "Balance Vida-Trabajo",
+    "cohesion": "Cohesión de Equipo",
+}
 
-    depts = company["departments"]
-    offsets = OFFSETS[company_id]
-    avg_offset = sum(offsets.values()) / len(offsets)
 
-    # Replace department rankings
-    rankings = []
-    dept_scores = []
-    for dept_id, dept_name in depts:
-        base_eng = 4.3 + avg_offset + random.uniform(-0.4, 0.4) + jitter()
-        dept_scores.append((dept_id, dept_name, clamp(base_eng)))
-
-    dept_scores.sort(key=lambda x: x[2], reverse=True)
-
-    medals = ["gold", "gold", "silver", "silver", "silver", "bronze", "bronze", "bronze", None, None]
-    for i, (dept_id, dept_name, eng_score) in enumerate(dept_scores):
-        dim_scores = {}
-        for dim_code in ["orgullo_institucional", "liderazgo_efectivo", "comunicacion_interna",
-                         "desarrollo_profesional", "compensacion", "reconocimiento",
-                         "balance_vida_trabajo", "cohesion_equipo", "engagement_global"]:
-            dim_offset = offsets.get(dim_code, 0)
-            dim_scores[dim_code.replace("_efectivo", "").replace("_interna", "")
-                       .replace("_vida_trabajo", "").replace("_profesional", "")
-                       .replace("_equipo", "").replace("_institucional", "")
-                       .replace("_global", "")] = clamp(eng_score + dim_offset * 0.5 + jitter(0.1))
-
-        # Simplified dimension keys matching template
-        dims = {
-            "orgullo_institucional": clamp(eng_score + offsets.get("orgullo_institucional", 0) * 0.5 + jitter(0.1)),
-            "engagement": eng_score,
-            "liderazgo": clamp(eng_score + offsets.get("liderazgo_efectivo", 0) * 0.5 + jitter(0.1)),
-            "comunicacion": clamp(eng_score + offsets.get("comunicacion_interna", 0) * 0.5 + jitter(0.1)),
-            "desarrollo": clamp(eng_score + offsets.get("desarrollo_profesional", 0) * 0.5 + jitter(0.1)),
-            "compensacion": clamp(eng_score + offsets.get("compensacion", 0) * 0.5 + jitter(0.1)),
-            "reconocimiento": clamp(eng_score + offsets.get("reconocimiento", 0) * 0.5 + jitter(0.1)),
-            "balance": clamp(eng_score + offsets.get("balance_vida_trabajo", 0) * 0.5 + jitter(0.1)),
-            "cohesion": clamp(eng_score + offsets.get("cohesion_equipo", 0) * 0.5 + jitter(0.1)),
-        }
+def generate_recognition(template, company_id, company, clima_data, cube):
+    """Generate recognition_data.json with monthly periods over the survey history.
 
-        respondents = max(5, int(company["employee_count"] / len(depts) * random.uniform(0.7, 1.3)))
-
-        # Badges
-        badges = []
-        if eng_score >= 4.3:
-            badges.append({"id": "consistency", "name": "Consistencia",
-                           "description": "Mantiene engagement superior a 4.3",
-                           "icon": "check-circle", "color": "green"})
-        if dims["balance"] >= 4.4:
-            badges.append({"id": "wellness_leader", "name": "Líder en Bienestar",
-                           "description": "Top en Balance Vida-Trabajo",
-                           "icon": "heart", "color": "pink"})
-        if dims["cohesion"] >= 4.4:
-            badges.append({"id": "team_spirit", "name": "Espíritu de Equipo",
-                           "description": "Excelente cohesión de equipo",
-                           "icon": "users", "color": "blue"})
-        if dims["liderazgo"] >= 4.5:
-            badges.append({"id": "leadership_excellence", "name": "Excelencia en Liderazgo",
-                           "description": "Liderazgo destacado",
-                           "icon": "award", "color": "purple"})
+    Department × year × dimension scores come from the OLAP cube; the latest
+    period fills the existing rankings / podium / area_of_month fields and
+    every month also lands in ``periods`` in a compact form. Only the
+    December anchors are survey results; the months in between are
+    interpolated and flagged ``interpolated`` so they are not read as
+    measurements.
+    """
+    data = copy_template(template)
+    data["generated_at"] = datetime.now().isoformat()
 
+    dept_roll = olap_cube.rollup(cube, keep=("year", "department"))
+    dept_avg, _, dept_n = olap_cube.cube_scores(dept_roll)          # (Y, D, K)
+    years = dept_roll["axes"]["year"]
+    areas = dept_roll["axes"]["department"]
+    dim_index = {code: k for k, code in enumerate(dept_roll["axes"]["dimension"])}
+
+    # (D × Y × M); engagement comes first, so the ranking metric is column 0
+    keys = [key for key, _ in RECOGNITION_METRICS]
+    with np.errstate(invalid="ignore"):
+        columns = [np.nanmean(dept_avg, axis=2) if code is None else dept_avg[:, :, dim_index[code]]
+                   for _, code in RECOGNITION_METRICS]
+    annual = np.stack(columns, axis=2).transpose(1, 0, 2)
+    metric_index = {key: m for m, key in enumerate(keys)}
+
+    scores = recognition.monthly_series(annual, numpy_rng())
+    periods = recognition.monthly_periods(years)
+    ranked = recognition.rank_periods(scores)
+    badges = recognition.badge_masks(scores, ranked["change"], metric_index)
+    winner, improvement, top_metrics = recognition.areas_of_month(scores)
+    interpolated = recognition.interpolated_months(len(periods))
+    # Respondents per area come from the survey that closes each month's interval
+    respondents = dept_n.max(axis=2)                                 # (Y, D)
+    year_of = -(-np.arange(len(periods)) // 12)
+
+    def area_badges(d, t):
+        return [bid for bid, mask in badges.items() if mask[d, t]]
+
+    history = []
+    for t, period in enumerate(periods):
+        rows = [{
+            "area": areas[d],
+            "rank": int(ranked["rank"][d, t]),
+            "engagement": round(float(scores[d, t, 0]), 2),
+            "medal": str(ranked["medal"][d, t]),
+            "change": round(float(ranked["change"][d, t]), 2) + 0.0,
+            "trend": ranked["trend"][d, t],
+            "badges": area_badges(d, t),
+        } for d in ranked["order"][t]]
+        entry = {"period": period, "month": recognition.month_label(period),
+                 "interpolated": bool(interpolated[t]), "rankings": rows}
+        if winner[t] >= 0:
+            entry["area_of_month"] = {"area": areas[winner[t]], "improvement": round(float(improvement[t]), 2)}
+        history.append(entry)
+
+    # Latest period in the full ranking shape
+    t = len(periods) - 1
+    rankings = []
+    for d in ranked["order"][t]:
         rankings.append({
-            "area": dept_name,
-            "engagement": eng_score,
-            "respondents": respondents,
-            "dimensions": dims,
-            "medal": medals[i] if i < len(medals) else None,
-            "rank": i + 1,
-            "change": round(random.uniform(-0.15, 0.2), 2),
-            "trend": random.choice(["up", "stable", "down"]) if i > 0 else "up",
-            "badges": badges,
+            "area": areas[d],
+            "engagement": round(float(scores[d, t, 0]), 2),
+            "respondents": int(respondents[year_of[t], d]),
+            "dimensions": {key: round(float(scores[d, t, m]), 2) for m, key in enumerate(keys)},
+            "medal": str(ranked["medal"][d, t]),
+            "rank": int(ranked["rank"][d, t]),
+            "change": round(float(ranked["change"][d, t]), 2) + 0.0,
+            "trend": ranked["trend"][d, t],
+            "badges": [recognition.BADGES[bid] for bid in area_badges(d, t)],
         })
-
     data["rankings"] = rankings
+    data["podium"] = rankings[:3]
+
+    data["area_of_month"] = None
+    if winner[t] >= 0:
+        w = winner[t]
+        data["area_of_month"] = {
+            "current": {
+                "area": areas[w],
+                "improvement": round(float(improvement[t]), 2),
+                "previous_score": round(float(scores[w, t - 1, 0]), 2),
+                "current_score": round(float(scores[w, t, 0]), 2),
+                "top_improving_dimensions": [
+                    {
+                        "dimension": keys[m],
+                        "name": RECOGNITION_METRIC_NAMES[keys[m]],
+                        "improvement": round(float(scores[w, t, m] - scores[w, t - 1, m]), 2),
+                    }
+                    for m in top_metrics[t]
+                ],
+                "month": recognition.month_label(periods[t]),
+            },
+            "history": [
+                {"month": e["month"], "area": e["area_of_month"]["area"], "improvement": e["area_of_month"]["improvement"]}
+                for e in reversed(history[:-1]) if "area_of_month" in e
+            ],
+        }
+
+    data["periods"] = history
+    data["badge_definitions"] = list(recognition.BADGES.values())
+    if "summary" in data:
+        medals = [r["medal"] for r in rankings]
+        data["summary"].update({
+            "total_areas": len(rankings),
+            "gold_medals": medals.count("gold"),
+            "silver_medals": medals.count("silver"),
+            "bronze_medals": medals.count("bronze"),
+            "average_engagement": round(float(scores[:, t, 0].mean()), 2),
+        })
     return data
 
 
 def generate_text_analysis(template, company_id, company):
     """Generate text_analysis_data.json."""
-    data = copy.deepcopy(template)
+    data = copy_template(template)
     data["generated_at"] = datetime.now().isoformat()
 
     # Replace all Towerbank/Tower references throughout
@@ -813,6 +1168,10 @@ def generate_text_analysis(template, company_id, company):
     total_scale = company["employee_count"] / 200
     data["total_comments"] = max(100, int(data.get("total_comments", 500) * total_scale))
 
+    # The template tags some themes with codes that are not survey dimensions ("recursos")
+    for theme in data.get("themes", []):
+        theme["dimensions"] = [d for d in theme["dimensions"] if d in DIM_NAMES or d == "engagement_global"]
+
     # Update comments - replace Towerbank references and departments
     if "comments" in data:
         for comment in data["comments"]:
@@ -828,16 +1187,12 @@ def generate_text_analysis(template, company_id, company):
 
 def generate_unified_analysis(template, company_id, company, clima_data):
     """Generate unified_analysis.json."""
-    data = copy.deepcopy(template)
+    data = copy_template(template)
     data["generated_at"] = datetime.now().isoformat()
 
     # Replace all Towerbank/Tower references throughout
     data = deep_replace_refs(data, company["name"], company_id)
 
-    offsets = OFFSETS[company_id]
-    company_name = company["name"]
-    avg_offset = sum(offsets.values()) / len(offsets)
-
     # Update keyword analysis - scale counts
     if "keyword_analysis" in data:
         for year_key, year_data in data["keyword_analysis"].items():
@@ -858,134 +1213,472 @@ def generate_unified_analysis(template, company_id, company, clima_data):
                             bg["count"] = max(1, int(bg["count"] * company["employee_count"] / 200 * random.uniform(0.7, 1.3)))
                             bg["frequency"] = round(bg["count"] / max(1, section.get("response_count", 100)) * 100, 2)
 
-    # Update global_engagement
-    if "global_engagement" in data:
-        for entry in data["global_engagement"]:
-            entry["engagement_score"] = clamp(entry["engagement_score"] + avg_offset * 0.5 + jitter(0.03))
-            entry["engagement_pct"] = clamp(entry["engagement_pct"] + avg_offset * 8 + jitter(1), 50, 100)
-            entry["respondent_count"] = max(50, int(
-                entry["respondent_count"] * company["employee_count"] / 200
-            ))
+    # Historical trends restate clima year by year
+    years = sorted(clima_data["years"])
+    data["historical_trends"] = {
+        "global_engagement": [
+            {"year": int(y), "engagement_score": eng["engagement_score"], "engagement_pct": eng["engagement_pct"],
+             "respondent_count": clima_data["years"][y]["respondent_count"]}
+            for y in years if (eng := clima_data["years"][y].get("engagement"))
+        ],
+        "by_dimension": {},
+    }
+    for y in years:
+        for d in clima_data["years"][y]["dimensions"]:
+            series = data["historical_trends"]["by_dimension"].setdefault(
+                d["dimension_code"], {"name": d["dimension_name"], "data": []})
+            series["data"].append({"year": int(y), "score": d["avg_score"], "favorability": d["favorability_pct"],
+                                   "segment": d["segment"]})
+
+    # Year comparison restates clima too; years that did not survey a dimension are omitted, as in the template
+    comparison = {}
+    for y in years:
+        for d in clima_data["years"][y]["dimensions"]:
+            row = comparison.setdefault(d["dimension_code"], {"dimension_code": d["dimension_code"],
+                                                              "dimension_name": d["dimension_name"]})
+            row[f"score_{y}"] = round(d["avg_score"], 2)
+            row[f"favorability_{y}"] = round(d["favorability_pct"], 1)
+    data["year_comparison"] = sorted(comparison.values(), key=lambda r: r.get(f"score_{years[-1]}", 0), reverse=True)
 
     return data
 
 
+def shard_comments(data, shard_size=COMMENT_SHARD_SIZE):
+    """Split text_analysis comments into fixed-size pages.
+
+    Returns (summary, shards): the summary keeps every aggregate field plus a
+    ``comment_shards`` manifest instead of the inline ``comments`` list, and
+    shards is a list of (relative_path, page_payload) to save next to it.
+    """
+    comments = data.get("comments", [])
+    summary = {k: v for k, v in data.items() if k != "comments"}
+
+    pages = []
+    shards = []
+    for index, offset in enumerate(range(0, len(comments), shard_size)):
+        page = comments[offset:offset + shard_size]
+        path = f"{COMMENT_SHARD_DIR}/comments_{index:04d}.json"
+        pages.append({
+            "index": index,
+            "path": path,
+            "offset": offset,
+            "count": len(page),
+            "first_id": page[0]["id"],
+            "last_id": page[-1]["id"],
+        })
+        shards.append((path, {"page": index, "offset": offset, "comments": page}))
+
+    summary["comment_shards"] = {
+        "page_size": shard_size,
+        "total": len(comments),
+        "pages": pages,
+        "index": COMMENT_INDEX_FILE,
+    }
+    return summary, shards
+
+
 # ─── Main ─────────────────────────────────────────────────────────────────────
 
-def main():
-    print("Loading templates...")
-    templates = {}
-    for name in [
-        "clima_v2_data.json", "clima_demographics.json", "segmentation_data.json",
-        "predictions_data.json", "correlations_data.json", "clustering_data.json",
-        "recognition_data.json", "text_analysis_data.json", "unified_analysis.json",
-    ]:
-        templates[name] = load_template(name)
-        print(f"  Loaded {name}")
-
-    for company_id, company in COMPANIES.items():
-        print(f"\nGenerating data for {company['name']} ({company_id})...")
-        random.seed(hash(company_id) + 42)  # Deterministic per company
-
-        # 1. clima_v2_data.json
-        clima = generate_clima_v2(templates["clima_v2_data.json"], company_id, company)
-        save_json(company_id, "clima_v2_data.json", clima)
-        print(f"  clima_v2_data.json")
-
-        # 2. segmentation_data.json (needs clima data)
-        seg = generate_segmentation(templates["segmentation_data.json"], company_id, company, clima)
-        save_json(company_id, "segmentation_data.json", seg)
-        print(f"  segmentation_data.json")
-
-        # 3. clima_demographics.json
-        demo = generate_demographics(templates["clima_demographics.json"], company_id, company, clima)
-        save_json(company_id, "clima_demographics.json", demo)
-        print(f"  clima_demographics.json")
-
-        # 4. predictions_data.json
-        pred = generate_predictions(templates["predictions_data.json"], company_id, company, clima)
-        save_json(company_id, "predictions_data.json", pred)
-        print(f"  predictions_data.json")
-
-        # 5. correlations_data.json
-        corr = generate_correlations(templates["correlations_data.json"], company_id, company)
-        save_json(company_id, "correlations_data.json", corr)
-        print(f"  correlations_data.json")
-
-        # 6. clustering_data.json
-        clust = generate_clustering(templates["clustering_data.json"], company_id, company)
-        save_json(company_id, "clustering_data.json", clust)
-        print(f"  clustering_data.json")
-
-        # 7. recognition_data.json
-        recog = generate_recognition(templates["recognition_data.json"], company_id, company, clima)
-        save_json(company_id, "recognition_data.json", recog)
-        print(f"  recognition_data.json")
-
-        # 8. text_analysis_data.json
-        text = generate_text_analysis(templates["text_analysis_data.json"], company_id, company)
-        save_json(company_id, "text_analysis_data.json", text)
-        print(f"  text_analysis_data.json")
-
-        # 9. unified_analysis.json
-        unified = generate_unified_analysis(templates["unified_analysis.json"], company_id, company, clima)
-        save_json(company_id, "unified_analysis.json", unified)
-        print(f"  unified_analysis.json")
-
-    # Verification
-    print("\n─── Verification ───")
-    for company_id in COMPANIES:
-        outdir = OUTPUT_BASE / company_id
-        files = sorted(f.name for f in outdir.glob("*.json"))
-        print(f"\n{company_id}: {len(files)} files")
-        for f in files:
-            fpath = outdir / f
-            with open(fpath, "r") as fp:
-                d = json.load(fp)
-            size_kb = fpath.stat().st_size / 1024
-            print(f"  {f}: {size_kb:.1f} KB")
-
-    # Check segmentation dimensions populated
-    print("\n─── Segmentation dimensions check ───")
-    for company_id in COMPANIES:
-        seg_path = OUTPUT_BASE / company_id / "segmentation_data.json"
-        with open(seg_path) as f:
-            seg = json.load(f)
-        dept_dims = len(seg["by_department"][0]["dimensions"]) if seg["by_department"] else 0
-        tenure_dims = len(seg["by_tenure"][0]["dimensions"]) if seg["by_tenure"] else 0
-        gender_dims = len(seg["by_gender"][0]["dimensions"]) if seg["by_gender"] else 0
-        print(f"  {company_id}: dept_dims={dept_dims}, tenure_dims={tenure_dims}, gender_dims={gender_dims}")
-
-    # Check no Towerbank references
-    print("\n─── Towerbank reference check ───")
-    for company_id in COMPANIES:
-        outdir = OUTPUT_BASE / company_id
-        for fpath in outdir.glob("*.json"):
-            with open(fpath) as f:
-                content = f.read().lower()
-            if "towerbank" in content or "tower" in content.split('"'):
-                print(f"  WARNING: {company_id}/{fpath.name} still has Towerbank references!")
-                break
-        else:
-            print(f"  {company_id}: Clean (no Towerbank/Tower references)")
-
-    # Show score differentiation
-    print("\n─── Score differentiation (2026 dimensions) ───")
-    for company_id in COMPANIES:
-        clima_path = OUTPUT_BASE / company_id / "clima_v2_data.json"
-        with open(clima_path) as f:
-            clima = json.load(f)
-        latest = max(clima["years"].keys())
-        dims = clima["years"][latest]["dimensions"]
-        top = dims[0]
-        bottom = dims[-1]
-        eng = clima["years"][latest].get("engagement", {})
-        print(f"  {company_id}: top={top['dimension_name']}({top['avg_score']}), "
-              f"bottom={bottom['dimension_name']}({bottom['avg_score']}), "
-              f"engagement={eng.get('engagement_score', 'N/A')}")
-
-    print("\nDone! All 36 files generated.")
+_templates = {}
+_open_packs = {}
+_memory_docs = {}
+_staged = {}                      # company_id -> [(name, bytes)] while a tenant job is running
+
+
+def log(message):
+    if VERBOSE:
+        print(message)
+
+
+def init_worker(template_dir, output_base, verbose, output_format="tree", pack_root=None, sqlite_path=None,
+                metrics=False, trace_memory=False, profile=None, optimize_payloads=False, wordcloud_cache=None):
+    """Load templates once per process (the main process, or each pool worker)."""
+    global TEMPLATE_DIR, OUTPUT_BASE, VERBOSE, OUTPUT_FORMAT, PACK_ROOT, SQLITE_PATH, OPTIMIZE_PAYLOADS
+    global WORDCLOUD_CACHE
+    TEMPLATE_DIR, OUTPUT_BASE, VERBOSE = Path(template_dir), Path(output_base), verbose
+    OUTPUT_FORMAT, PACK_ROOT, SQLITE_PATH = output_format, pack_root, sqlite_path
+    OPTIMIZE_PAYLOADS, WORDCLOUD_CACHE = optimize_payloads, wordcloud_cache
+    if metrics:
+        instrumentation.enable(trace_memory)
+    if profile is not None:
+        profiling.enable(*profile)  # (company, file), either may be None
+    if not _templates:
+        for name in TEMPLATE_FILES:
+            _templates[name] = load_template(name)
+
+
+def wordcloud_cache_dir():
+    """Where rendered word clouds are cached, or None to render without a disk cache."""
+    if WORDCLOUD_CACHE is not None:
+        return Path(WORDCLOUD_CACHE)
+    return None if OUTPUT_FORMAT == "memory" else OUTPUT_BASE / "wordclouds"
+
+
+def tenant_seed(company_id):
+    """Stable across processes, unlike hash(), so pool workers reproduce serial runs."""
+    return zlib.crc32(company_id.encode("utf-8")) + 42
+
+
+def generate_tenant(job):
+    """Generate, validate and write one tenant.
+
+    Returns (company_id, industry, benchmark values, sink rows, failures,
+    stage records, profiles). Documents are staged in memory until the whole
+    tenant validates. failures maps document name to errors; it is empty on
+    success. When it is non-empty, nothing was written. Nothing but the small
+    benchmark observations (and, with SQLITE_PATH set, this tenant's table
+    rows; with --metrics, its stage records; with --profile, the stage
+    profiles) travels back to the caller, so the parent's memory does not
+    grow with the number of tenants.
+    """
+    company_id, company, scenario_k = job
+    with instrumentation.stage(company_id, "tenant"):
+        result = _generate_tenant(company_id, company, scenario_k)
+    return (*result, instrumentation.drain() if instrumentation.enabled() else None,
+            profiling.drain() if profiling.enabled() else None)
+
+
+def _generate_tenant(company_id, company, scenario_k):
+    log(f"\nGenerating data for {company['name']} ({company_id})...")
+    random.seed(tenant_seed(company_id))  # Deterministic per company
+    _staged[company_id] = []
+    try:
+        result, failures = _generate_tenant_files(company_id, company, scenario_k)
+    finally:
+        staged = _staged.pop(company_id)
+    for name, data in staged:
+        if name.endswith(".json"):
+            leftovers = validation.leftover_template_refs(data)
+            if leftovers:
+                failures.setdefault(name, []).append(f"template references left: {', '.join(leftovers)}")
+    if failures:
+        log(f"  validation failed: {', '.join(sorted(failures))} (nothing written)")
+        return (*result, failures)
+    log(f"  validated {len(staged)} documents")
+    if OUTPUT_FORMAT == "pack":
+        _open_packs[company_id] = tenant_pack.open_pack(pack_path(company_id), "w")
+    try:
+        for name, data in staged:
+            write_document(company_id, name, data)
+    finally:
+        if company_id in _open_packs:
+            tenant_pack.close_pack(_open_packs.pop(company_id))
+    return (*result, failures)
+
+
+def _generate_tenant_files(company_id, company, scenario_k):
+    # 1. clima_v2_data.json
+    clima = measured(company_id, generate_clima_v2, _templates["clima_v2_data.json"], company_id, company)
+    save_json(company_id, "clima_v2_data.json", clima)
+    log(f"  clima_v2_data.json")
+
+    # 2. clima_demographics.json
+    demo = measured(company_id, generate_demographics, _templates["clima_demographics.json"], company_id, company, clima)
+    save_json(company_id, "clima_demographics.json", demo)
+    log(f"  clima_demographics.json")
+
+    # 3. segmentation_data.json (needs clima + demographics)
+    seg = measured(company_id, generate_segmentation, _templates["segmentation_data.json"], company_id, company, clima, demo)
+    seg["org_tree"], org_levels = measured(company_id, generate_org_levels, company_id, company, clima, seg)
+    save_json(company_id, "segmentation_data.json", seg)
+    for level_path, level_doc in org_levels:
+        save_json(company_id, level_path, level_doc, compact=True)
+    log(f"  segmentation_data.json (+{len(org_levels)} org levels)")
+
+    # 3a. Scenario variants (optional): banded deltas against this tenant
+    if scenario_k:
+        manifest, scenario_docs = measured(company_id, generate_scenarios, company_id, company, clima, seg, scenario_k)
+        save_json(company_id, scenarios.MANIFEST_FILE, manifest)
+        for scenario_path, scenario_doc in scenario_docs:
+            save_json(company_id, scenario_path, scenario_doc, compact=True)
+        log(f"  {scenarios.MANIFEST_FILE} ({len(scenario_docs)} scenarios × {scenario_k} realizations)")
+
+    # 3b. OLAP cube (needs clima + demographics)
+    respondents = measured(company_id, generate_respondents, company_id, company, clima, demo)
+    cube = measured(company_id, olap_cube.build_cube, *respondents, DIM_CODES)
+    cube_header, cube_blob = measured(company_id, olap_cube.encode_cube, cube)
+    write_document(company_id, olap_cube.DATA_FILE, cube_blob)
+    save_json(company_id, olap_cube.HEADER_FILE, cube_header, compact=True)
+    log(f"  {olap_cube.HEADER_FILE} (+{olap_cube.DATA_FILE})")
+
+    # 4. predictions_data.json
+    pred = measured(company_id, generate_predictions, _templates["predictions_data.json"], company_id, company, clima, cube, respondents)
+    save_json(company_id, "predictions_data.json", pred)
+    log(f"  predictions_data.json")
+
+    # 5. correlations_data.json
+    corr = measured(company_id, generate_correlations, _templates["correlations_data.json"], company_id, company)
+    save_json(company_id, "correlations_data.json", corr)
+    log(f"  correlations_data.json")
+
+    # 6. clustering_data.json
+    clust = measured(company_id, generate_clustering, _templates["clustering_data.json"], company_id, company)
+    save_json(company_id, "clustering_data.json", clust)
+    log(f"  clustering_data.json")
+
+    # 7. recognition_data.json
+    recog = measured(company_id, generate_recognition, _templates["recognition_data.json"], company_id, company, clima, cube)
+    save_json(company_id, "recognition_data.json", recog)
+    log(f"  recognition_data.json")
+
+    # 8. text_analysis_data.json
+    text = measured(company_id, generate_text_analysis, _templates["text_analysis_data.json"], company_id, company)
+    text_summary, comment_shards = measured(company_id, shard_comments, text)
+    cloud_hash, cloud_images, rendered = measured(company_id, word_cloud.word_cloud_images,
+                                                  text["word_frequencies"], wordcloud_cache_dir())
+    for theme, image in cloud_images.items():
+        write_document(company_id, word_cloud.IMAGE_FILES[theme], image)
+    text_summary["word_cloud"] = {"hash": cloud_hash, **word_cloud.IMAGE_FILES}
+    save_json(company_id, "text_analysis_data.json", text_summary)
+    for shard_path, shard in comment_shards:
+        save_json(company_id, shard_path, shard)
+    save_json(company_id, COMMENT_INDEX_FILE, measured(company_id, build_comment_index, text["comments"]),
+              compact=True)
+    log(f"  text_analysis_data.json (+{len(comment_shards)} comment pages, "
+        f"word cloud {'rendered' if rendered else 'cached'})")
+
+    # 9. unified_analysis.json
+    unified = measured(company_id, generate_unified_analysis, _templates["unified_analysis.json"], company_id, company, clima)
+    save_json(company_id, "unified_analysis.json", unified)
+    log(f"  unified_analysis.json")
+
+    docs = {
+        "clima_v2_data.json": clima, "segmentation_data.json": seg, "clima_demographics.json": demo,
+        "predictions_data.json": pred, "correlations_data.json": corr, "clustering_data.json": clust,
+        "recognition_data.json": recog, "text_analysis_data.json": text, "unified_analysis.json": unified,
+    }
+    # The staged summary (with its shard manifest and word cloud) is what gets written
+    failures = measured(company_id, validation.validate_tenant,
+                        {**docs, "text_analysis_data.json": text_summary, "comments": text["comments"],
+                         "org_level": [doc for _, doc in org_levels]})
+
+    # Rows for the SQLite sink are built here; only the parent process writes to the database
+    rows = None
+    if SQLITE_PATH and not failures:
+        rows = measured(company_id, sqlite_sink.tenant_rows, company_id, company, docs)
+    return (company_id, company["industry"], benchmarks.tenant_values(company["industry"], clima), rows), failures
+
+
+def finalize_tenant(company_id, industry, sketches):
+    """Cross-tenant step for one tenant: benchmark write-back, then the export artifacts built from it.
+
+    Returns (benchmarked clima, export files written, export bytes written).
+    """
+    with instrumentation.stage(company_id, "finalize"):
+        clima = payload_codec.loads(read_document(company_id, "clima_v2_data.json"))
+        measured(company_id, benchmarks.apply_benchmarks, clima, industry, sketches)
+        errors = validation.validate_document("clima_v2_data.json", clima)
+        if errors:
+            raise ValueError(f"{company_id}: benchmarked clima_v2_data.json is invalid: {errors[0]}")
+        if OUTPUT_FORMAT == "pack":
+            # One append per tenant instead of one per document
+            _open_packs[company_id] = tenant_pack.open_pack(pack_path(company_id), "a")
+        try:
+            save_json(company_id, "clima_v2_data.json", clima)
+            files = size = 0
+            with instrumentation.stage(company_id, "export_documents"), \
+                    profiling.stage(company_id, "export_documents"):
+                for path, data in exports.export_documents(clima):
+                    write_document(company_id, path, data)
+                    files, size = files + 1, size + len(data)
+        finally:
+            if company_id in _open_packs:
+                tenant_pack.close_pack(_open_packs.pop(company_id))
+    return clima, files, size
+
+
+_finalize_sketches = {}   # sketch file → merged sketches, loaded once per worker
+
+
+def finalize_job(job):
+    """Pool entry for finalize_tenant; job is (company_id, industry, sketch file).
+
+    Sketches are read from the file the parent saved once they were final,
+    so a serial run and every worker benchmark against the same digests.
+    Exports are built here too, one tenant at a time, so no process ever
+    holds more than one tenant's export files. Returns (company_id, benchmark
+    rows for the SQLite sink or None, export files, export bytes, stage
+    records, profiles): the benchmarked clima itself stays in the worker.
+    """
+    company_id, industry, sketch_path = job
+    if sketch_path not in _finalize_sketches:
+        _finalize_sketches.clear()
+        _finalize_sketches[sketch_path] = benchmarks.load_sketches(sketch_path)
+    clima, files, size = finalize_tenant(company_id, industry, _finalize_sketches[sketch_path])
+    rows = sqlite_sink.benchmark_rows(company_id, clima) if SQLITE_PATH else None
+    return (company_id, rows, files, size, instrumentation.drain() if instrumentation.enabled() else None,
+            profiling.drain() if profiling.enabled() else None)
+
+
+def report_progress(done, total, started):
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate > 0 else 0.0
+    print(f"[{done}/{total}] {done / max(total, 1) * 100:5.1f}%  "
+          f"{rate:.1f} tenants/s  elapsed {elapsed:.0f}s  eta {eta:.0f}s", flush=True)
+
+
+def main(tenants_path=TENANTS_PATH, scenario_k=0, workers=1, batch_size=BATCH_SIZE):
+    total = count_tenants(tenants_path)
+    print(f"Loading templates from {TEMPLATE_DIR}...")
+    metrics = METRICS_DIR is not None
+    profile = (PROFILE_COMPANY, PROFILE_FILE) if PROFILE_DIR is not None else None
+    init_worker(TEMPLATE_DIR, OUTPUT_BASE, VERBOSE, OUTPUT_FORMAT, PACK_ROOT, SQLITE_PATH, metrics, TRACE_MEMORY,
+                profile, OPTIMIZE_PAYLOADS, WORDCLOUD_CACHE)
+    print(f"Generating {total} tenants from {tenants_path} into {OUTPUT_BASE} "
+          f"({workers} worker{'s' if workers != 1 else ''}, batches of {batch_size})")
+
+    # Opened before the pool so a bad --sqlite path fails before any worker starts
+    conn = sqlite_sink.connect(SQLITE_PATH) if SQLITE_PATH else None
+    jobs = ((company_id, company, scenario_k) for company_id, company in iter_tenants(tenants_path))
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, initializer=init_worker,
+                                    initargs=(TEMPLATE_DIR, OUTPUT_BASE, VERBOSE, OUTPUT_FORMAT, PACK_ROOT,
+                                              SQLITE_PATH, metrics, TRACE_MEMORY, profile, OPTIMIZE_PAYLOADS,
+                                              WORDCLOUD_CACHE))
+
+        def run(fn, fn_jobs):
+            return pool.imap_unordered(fn, fn_jobs, chunksize=batch_size)
+    else:
+        run = map
+
+    # Only per-tenant ids, industries and sketch updates (plus stage records with --metrics) are kept here
+    sketches = {}
+    industries = {}
+    failed = {}
+    stage_records = []
+    profiles = {}
+    started_at = time.time()
+    started = time.perf_counter()
+    try:
+        for done, (company_id, industry, values, rows, failures, records, tenant_profiles) in enumerate(
+                run(generate_tenant, jobs), 1):
+            if records:
+                stage_records.extend(records)
+            if tenant_profiles:
+                profiling.merge(profiles, tenant_profiles)
+            if failures:
+                failed[company_id] = failures
+            else:
+                benchmarks.observe_values(sketches, values)
+                industries[company_id] = industry
+                if conn is not None:
+                    sqlite_sink.write_tenant(conn, company_id, rows)
+            if done % batch_size == 0 or done == total:
+                report_progress(done, total, started)
+
+        # Cross-tenant benchmarks need every tenant's values, so the write-back (and the exports
+        # built from the benchmarked clima) is a second pass through the same pool
+        print("\n─── Benchmarks and exports ───")
+        sketch_path = OUTPUT_BASE / benchmarks.SKETCH_FILE
+        benchmarks.save_sketches(sketch_path, sketches)
+        final_jobs = ((company_id, industry, sketch_path) for company_id, industry in industries.items())
+        export_files = export_bytes = 0
+        for company_id, rows, files, size, records, tenant_profiles in run(finalize_job, final_jobs):
+            export_files, export_bytes = export_files + files, export_bytes + size
+            if records:
+                stage_records.extend(records)
+            if tenant_profiles:
+                profiling.merge(profiles, tenant_profiles)
+            if conn is not None:
+                sqlite_sink.update_benchmarks(conn, rows)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    print(f"  {benchmarks.SKETCH_FILE}: {len(sketches)} sketches, written back to {len(industries)} tenants")
+    print(f"  {exports.EXPORT_DIR}/: {export_files} files, {export_bytes / 2**20:.1f} MB")
+    if conn is not None:
+        conn.close()
+        print(f"  {SQLITE_PATH}: {len(industries)} tenants loaded")
+
+    # Validation ran in the workers, before anything was written
+    print("\n─── Validation ───")
+    print(f"  {len(industries)} tenants passed, {len(failed)} failed")
+    for company_id, failures in sorted(failed.items()):
+        for name, errors in sorted(failures.items()):
+            print(f"  FAILED {company_id}/{name}: {errors[0]}"
+                  + (f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""))
+
+    if metrics:
+        stage_records.extend(instrumentation.drain())
+        write_metrics(stage_records, {
+            "tenants": len(industries), "failed": len(failed), "workers": workers,
+            "output_format": OUTPUT_FORMAT, "trace_memory": TRACE_MEMORY, "started_at": started_at,
+            "finished_at": time.time(), "seconds": time.perf_counter() - started,
+        })
+
+    if profile is not None:
+        write_profiles(profiling.merge(profiles, profiling.drain()))
+
+    print(f"\nDone! Generated {len(industries)} tenants.")
+    return len(failed)
+
+
+def write_metrics(records, run):
+    """Run report, Prometheus textfile and slowest-stages table (see instrumentation.py)."""
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    summary = instrumentation.summarize(records)
+    instrumentation.write_report(METRICS_DIR / "run_report.json", records, summary, run)
+    instrumentation.write_prometheus(METRICS_DIR / "pipeline.prom", records, summary, run)
+    print("\n─── Slowest stages ───")
+    print(instrumentation.format_table(summary))
+    print(f"  {len(records)} stage records → {METRICS_DIR / 'run_report.json'}, {METRICS_DIR / 'pipeline.prom'}")
+
+
+def write_profiles(profiles):
+    """Per-stage .prof / .collapsed files and the hot-functions table (see profiling.py)."""
+    print("\n─── Profile ───")
+    if not profiles:
+        print(f"  nothing profiled (company {PROFILE_COMPANY or 'any'}, file {PROFILE_FILE or 'any'})")
+        return
+    profiling.write_profiles(PROFILE_DIR, profiles)
+    print(profiling.format_hot_functions(profiles))
+    print(f"  {len(profiles)} stages → {PROFILE_DIR}/<stage>.prof, <stage>.collapsed, run.collapsed")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Regenerate all company data files.")
+    parser.add_argument("--tenants", type=Path, default=TENANTS_PATH,
+                        help="tenant config: directory of .json files, a .json file or a .jsonl stream")
+    parser.add_argument("--templates", type=Path, default=TEMPLATE_DIR, help="template JSON directory")
+    parser.add_argument("--output", type=Path, default=OUTPUT_BASE, help="output data directory")
+    parser.add_argument("--workers", type=int, default=1, help="tenant worker processes")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="tenants per worker chunk and progress line")
+    parser.add_argument("--output-format", choices=("tree", "pack"), default=OUTPUT_FORMAT,
+                        help="one file per document, or one indexed pack per tenant (see tenant_pack.py)")
+    parser.add_argument("--pack-root", type=Path, default=None,
+                        help="fan-out root for packs (default: <output>/packs)")
+    parser.add_argument("--sqlite", type=Path, default=None, metavar="PATH",
+                        help="also load normalized rows into a SQLite database (see sqlite_sink.py)")
+    parser.add_argument("--wordcloud-cache", type=Path, default=None, metavar="DIR",
+                        help="word-cloud SVG cache, shared across runs (default: <output>/wordclouds)")
+    parser.add_argument("--metrics", type=Path, default=None, metavar="DIR",
+                        help="record per-stage timings, allocations and bytes; write run_report.json and "
+                             "pipeline.prom to DIR")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="with --metrics, also record tracemalloc peaks per stage (several times slower)")
+    parser.add_argument("--profile", type=Path, default=None, metavar="DIR",
+                        help="cProfile each stage; write <stage>.prof and flamegraph-ready <stage>.collapsed "
+                             "files to DIR (see profiling.py)")
+    parser.add_argument("--profile-company", default=None, metavar="ID",
+                        help="with --profile, only profile this tenant")
+    parser.add_argument("--profile-file", default=None, metavar="NAME",
+                        help="with --profile, only profile the stages producing this document "
+                             "(e.g. clustering_data.json)")
+    parser.add_argument("--optimize-payloads", action="store_true",
+                        help="drop derivable fields and share repeated strings per file (see payload_codec.py)")
+    parser.add_argument("--quiet", action="store_true", help="only print batch progress and summaries")
+    parser.add_argument("--scenarios", type=int, default=0, metavar="K",
+                        help="also write K Monte Carlo realizations per scenario under scenarios/")
+    args = parser.parse_args()
+    TEMPLATE_DIR, OUTPUT_BASE, VERBOSE = args.templates, args.output, not args.quiet
+    OUTPUT_FORMAT, PACK_ROOT, SQLITE_PATH = args.output_format, args.pack_root, args.sqlite
+    METRICS_DIR, TRACE_MEMORY = args.metrics, args.trace_memory
+    PROFILE_DIR, PROFILE_COMPANY, PROFILE_FILE = args.profile, args.profile_company, args.profile_file
+    OPTIMIZE_PAYLOADS, WORDCLOUD_CACHE = args.optimize_payloads, args.wordcloud_cache
+    failed = main(tenants_path=args.tenants, scenario_k=args.scenarios, workers=args.workers,
+                  batch_size=args.batch_size)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,118 @@
+"""
+Monte Carlo scenario variants per tenant.
+
+The base tenant is one realization of its narrative offsets. Scenario mode
+draws K more realizations per scenario at once, as extra array axes:
+
+    scores[s, k, year, dimension]      company dimension scores
+    segments[s, k, dept, dimension]    latest-year department × dimension heatmap
+
+Each realization rescales the narrative offsets (how strongly the company
+story plays out), adds survey jitter and applies the scenario's shifts. The
+K axis is reduced to p10 / p50 / p90 bands, and each scenario is written as
+a compact delta against the base tenant (bands minus base, two decimals),
+not as a copy of the base files.
+"""
+
+import numpy as np
+
+BANDS = (10, 50, 90)
+NARRATIVE_SPREAD = 0.25    # std of the per-realization narrative strength (1.0 = base)
+SURVEY_NOISE = 0.05        # per year × dimension jitter, same scale as jitter()
+SEGMENT_NOISE = 0.08       # extra per department × dimension jitter
+MANIFEST_FILE = "scenarios/manifest.json"
+SCENARIO_FILE = "scenarios/{id}.json"
+
+
+def shift_matrix(scenarios, dim_codes):
+    """(S × D) additive shifts from each scenario's {dimension_code: delta} map."""
+    index = {code: k for k, code in enumerate(dim_codes)}
+    out = np.zeros((len(scenarios), len(dim_codes)))
+    for s, scenario in enumerate(scenarios):
+        for code, delta in scenario.get("shifts", {}).items():
+            out[s, index[code]] = delta
+    return out
+
+
+def realize(base, offsets, year_factor, shifts, k, rng):
+    """Draw (S × K × Y × D) company scores around base (Y × D, NaN = not surveyed).
+
+    offsets (D,) is the narrative; year_factor (Y,) is how much of it each
+    year carries in the base. A realization with strength f moves every
+    score by (f - 1) × offset × year_factor on top of the base.
+    """
+    S = len(shifts)
+    strength = rng.normal(1.0, NARRATIVE_SPREAD, (S, k, 1, 1))
+    narrative = (strength - 1.0) * year_factor[:, None] * offsets[None, :]
+    noise = rng.normal(0.0, SURVEY_NOISE, (S, k) + base.shape)
+    # Shifts land on the latest year only: the scenario is about what happens next
+    shift = np.zeros((S, 1) + base.shape)
+    shift[:, 0, -1, :] = shifts
+    return np.clip(base + narrative + noise + shift, 1.0, 5.0), strength
+
+
+def realize_segments(base, company_delta, rng):
+    """Carry each realization's latest-year company delta onto the (P × D) segment matrix."""
+    S, K, D = company_delta.shape
+    noise = rng.normal(0.0, SEGMENT_NOISE, (S, K) + base.shape)
+    return np.clip(base + company_delta[:, :, None, :] + noise, 1.0, 5.0)
+
+
+def bands(values, axis=1):
+    """p10 / p50 / p90 across the realization axis; NaN stays NaN."""
+    with np.errstate(invalid="ignore"):
+        return np.nanpercentile(values, BANDS, axis=axis)
+
+
+def _matrix(arr):
+    return np.where(np.isnan(arr), None, arr.round(2) + 0.0).tolist()
+
+
+def scenario_documents(scenarios, k, years, dim_codes, base, realized, departments, seg_codes,
+                       seg_base, seg_realized):
+    """One compact delta document per scenario plus a manifest.
+
+    Bands are stored minus the base, so a reader rebuilds scenario values
+    as base + delta from the files it already has.
+    """
+    dim_bands = bands(realized)                 # (3, S, Y, D)
+    seg_bands = bands(seg_realized)             # (3, S, P, Dseg)
+    latest = realized[:, :, -1, :]
+    with np.errstate(invalid="ignore"):
+        eng = np.nanmean(latest, axis=2)        # (S, K) engagement index per realization
+        eng_base = float(np.nanmean(base[-1]))
+    eng_bands = np.percentile(eng, BANDS, axis=1)
+
+    manifest = {"k": k, "bands": list(BANDS), "years": years, "dimension_codes": dim_codes,
+                "scenarios": []}
+    documents = []
+    for s, scenario in enumerate(scenarios):
+        path = SCENARIO_FILE.format(id=scenario["id"])
+        doc = {
+            "id": scenario["id"],
+            "label": scenario["label"],
+            "shifts": scenario.get("shifts", {}),
+            "k": k,
+            "engagement": {f"p{b}": round(float(eng_bands[i, s] - eng_base), 2) + 0.0
+                           for i, b in enumerate(BANDS)},
+            "dimensions": {
+                "years": years,
+                "dimension_codes": dim_codes,
+                **{f"delta_p{b}": _matrix(dim_bands[i, s] - base) for i, b in enumerate(BANDS)},
+            },
+            "segments": {
+                "departments": departments,
+                "dimension_codes": seg_codes,
+                **{f"delta_p{b}": _matrix(seg_bands[i, s] - seg_base) for i, b in enumerate(BANDS)},
+            },
+        }
+        manifest["scenarios"].append({"id": scenario["id"], "label": scenario["label"], "path": path,
+                                      "engagement_p50_delta": doc["engagement"]["p50"]})
+        documents.append((path, doc))
+    return manifest, documents
+
+
+def apply_delta(base, delta):
+    """Rebuild scenario values from a base matrix and a stored delta (None = not surveyed)."""
+    return [[None if d is None or b is None else round(b + d, 2) for b, d in zip(brow, drow)]
+            for brow, drow in zip(base, delta)]
@@ -0,0 +1,206 @@
+"""
+Optional SQLite sink: normalized rows from every generator output.
+
+Each tenant's documents are flattened into plain rows, one table per
+concept, and written with ``executemany`` inside a single transaction per
+tenant (re-running a tenant replaces its rows). Composite indexes on
+(company_id, year, dimension_code, department) cover the usual cross-tenant
+questions, e.g.
+
+    SELECT company_id, avg_score FROM dimension_scores
+    WHERE year = '2026' AND dimension_code = 'compensacion' ORDER BY avg_score;
+
+Tables and their sources:
+
+    tenants               tenant config
+    dimension_scores      clima_v2_data.json (per year)
+    engagement            clima_v2_data.json (per year)
+    demographics          clima_demographics.json (per year × category × label)
+    segments              segmentation_data.json (by_department / tenure / gender)
+    segment_scores        segmentation_data.json (segment × dimension)
+    projections           predictions_data.json (projections.by_dimension)
+    alerts                predictions_data.json (early_alerts)
+    correlations          correlations_data.json (detailed_correlations)
+    graph_nodes / edges   clustering_data.json
+    recognition           recognition_data.json (every period × area)
+    comments              text_analysis_data.json (all comments, before sharding)
+    keywords              unified_analysis.json (keyword_analysis)
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+TABLES = {
+    "tenants": ("company_id", "name", "industry", "employee_count"),
+    "dimension_scores": ("company_id", "year", "dimension_code", "dimension_name", "avg_score", "std_score",
+                         "favorability_pct", "segment", "respondent_count", "benchmark", "gap_vs_benchmark",
+                         "percentile_rank", "benchmark_scope", "rank"),
+    "engagement": ("company_id", "year", "engagement_score", "engagement_pct", "respondent_count"),
+    "demographics": ("company_id", "year", "category", "label", "count"),
+    "segments": ("company_id", "year", "segment_type", "segment_id", "segment_name", "respondent_count",
+                 "engagement_score", "engagement_pct"),
+    "segment_scores": ("company_id", "year", "segment_type", "segment_id", "dimension_code", "avg_score",
+                       "favorability_pct", "gap_vs_global"),
+    "projections": ("company_id", "dimension_name", "current_score", "projected_6m", "projected_12m", "trend",
+                    "confidence"),
+    "alerts": ("company_id", "alert_id", "dimension_code", "severity", "current_score", "previous_score",
+               "change", "months_declining", "affected_areas"),
+    "correlations": ("company_id", "dim1", "dim2", "r", "spearman", "p_value", "r_squared", "ci_lower",
+                     "ci_upper", "effect_size"),
+    "graph_nodes": ("company_id", "node_id", "type", "label", "department", "profile", "comment_count"),
+    "graph_edges": ("company_id", "edge_id", "source", "target", "type", "weight", "sentiment"),
+    "recognition": ("company_id", "period", "department", "rank", "engagement", "medal", "change", "trend"),
+    "comments": ("company_id", "comment_id", "year", "date", "department", "dimension_code", "sentiment",
+                 "sentiment_score", "themes", "text"),
+    "keywords": ("company_id", "year", "section", "word", "count", "frequency"),
+}
+
+INDEXES = {
+    "dimension_scores": ("company_id", "year", "dimension_code"),
+    "engagement": ("company_id", "year"),
+    "demographics": ("company_id", "year", "category"),
+    "segments": ("company_id", "year", "segment_type", "segment_id"),
+    "segment_scores": ("company_id", "year", "dimension_code", "segment_id"),
+    "projections": ("company_id", "dimension_name"),
+    "alerts": ("company_id", "dimension_code"),
+    "correlations": ("company_id", "dim1", "dim2"),
+    "graph_nodes": ("company_id", "department"),
+    "graph_edges": ("company_id", "source"),
+    "recognition": ("company_id", "period", "department"),
+    "comments": ("company_id", "year", "dimension_code", "department"),
+    "keywords": ("company_id", "year", "section"),
+}
+
+# Cross-tenant lookups: same filters without a company_id prefix
+CROSS_TENANT_INDEXES = {
+    "dimension_scores": ("year", "dimension_code", "avg_score"),
+    "segment_scores": ("year", "dimension_code", "segment_type", "segment_id"),
+    "alerts": ("dimension_code", "severity"),
+    "recognition": ("period", "department"),
+    "comments": ("year", "dimension_code", "department"),
+}
+
+
+def connect(path):
+    """Open (and create if needed) the sink database and its directory."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        for table, columns in TABLES.items():
+            key = " PRIMARY KEY" if table == "tenants" else ""
+            cols = ", ".join(f"{c}{key if c == 'company_id' else ''}" for c in columns)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({cols})")
+        for table, columns in INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table} ON {table} ({', '.join(columns)})")
+        for table, columns in CROSS_TENANT_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_cross ON {table} ({', '.join(columns)})")
+    return conn
+
+
+def tenant_rows(company_id, company, docs):
+    """Flatten one tenant's documents into {table: [row tuples]}.
+
+    docs maps output names ("clima_v2_data.json", ...) to the in-memory
+    documents; text_analysis_data.json must still carry its comments.
+    """
+    rows = {table: [] for table in TABLES}
+    rows["tenants"].append((company_id, company["name"], company["industry"], company["employee_count"]))
+
+    for year, yd in docs["clima_v2_data.json"]["years"].items():
+        for d in yd["dimensions"]:
+            rows["dimension_scores"].append((
+                company_id, year, d["dimension_code"], d["dimension_name"], d["avg_score"], d.get("std_score"),
+                d["favorability_pct"], d.get("segment"), d.get("respondent_count"), d.get("benchmark"),
+                d.get("gap_vs_benchmark"), d.get("percentile_rank"), d.get("benchmark_scope"), d.get("rank"),
+            ))
+        eng = yd.get("engagement")
+        if eng:
+            rows["engagement"].append((company_id, year, eng["engagement_score"], eng["engagement_pct"],
+                                       eng["respondent_count"]))
+
+    for year, yd in docs["clima_demographics.json"]["years"].items():
+        for category, counts in yd["demographics"].items():
+            rows["demographics"].extend((company_id, year, category, label, n) for label, n in counts.items())
+
+    seg = docs["segmentation_data.json"]
+    seg_year = max(docs["clima_v2_data.json"]["years"])
+    for key in ("by_department", "by_tenure", "by_gender", "by_hierarchy", "by_location"):
+        for s in seg.get(key) or []:
+            rows["segments"].append((company_id, seg_year, s["segment_type"], s["segment_id"], s["segment_name"],
+                                     s.get("respondent_count"), s.get("engagement_score"), s.get("engagement_pct")))
+            rows["segment_scores"].extend(
+                (company_id, seg_year, s["segment_type"], s["segment_id"], d["dimension_code"], d.get("avg_score"),
+                 d.get("favorability_pct"), d.get("gap_vs_global"))
+                for d in s.get("dimensions", [])
+            )
+
+    pred = docs["predictions_data.json"]
+    for p in pred.get("projections", {}).get("by_dimension", []):
+        rows["projections"].append((company_id, p.get("label") or p.get("dimension"), p.get("current_score"), p.get("projected_6m"),
+                                    p.get("projected_12m"), p.get("trend"), p.get("confidence")))
+    for a in pred.get("early_alerts", []):
+        rows["alerts"].append((company_id, a["id"], a["dimension"], a["severity"], a["current_score"],
+                               a["previous_score"], a["change"], a["months_declining"],
+                               json.dumps(a.get("affected_areas", []), ensure_ascii=False)))
+
+    for c in docs["correlations_data.json"].get("detailed_correlations", []):
+        rows["correlations"].append((company_id, c["dim1"], c["dim2"], c.get("r"), c.get("spearman"),
+                                     c.get("p_value"), c.get("r_squared"), c.get("ci_lower"), c.get("ci_upper"),
+                                     c.get("effect_size")))
+
+    clust = docs["clustering_data.json"]
+    for n in clust.get("nodes", []):
+        rows["graph_nodes"].append((company_id, n["id"], n.get("type"), n.get("label"), n.get("department"),
+                                    n.get("profile"), n.get("comment_count")))
+    for e in clust.get("edges", []):
+        rows["graph_edges"].append((company_id, e["id"], e["source"], e["target"], e.get("type"),
+                                    e.get("weight"), e.get("sentiment")))
+
+    for period in docs["recognition_data.json"].get("periods", []):
+        rows["recognition"].extend(
+            (company_id, period["period"], r["area"], r["rank"], r["engagement"], r["medal"], r["change"], r["trend"])
+            for r in period["rankings"]
+        )
+
+    for c in docs["text_analysis_data.json"].get("comments", []):
+        date = c.get("date") or ""
+        rows["comments"].append((company_id, c["id"], date[:4] or None, date or None, c.get("department"),
+                                 c.get("dimension"), c.get("sentiment"), c.get("sentiment_score"),
+                                 ",".join(c.get("themes", [])), c.get("text")))
+
+    for year, sections in docs["unified_analysis.json"].get("keyword_analysis", {}).items():
+        for section, body in sections.items():
+            if isinstance(body, dict):
+                rows["keywords"].extend((company_id, year, section, k["word"], k["count"], k.get("frequency"))
+                                        for k in body.get("keywords", []))
+    return rows
+
+
+def write_tenant(conn, company_id, rows):
+    """Replace a tenant's rows in one transaction, one executemany per table."""
+    with conn:
+        for table, columns in TABLES.items():
+            conn.execute(f"DELETE FROM {table} WHERE company_id = ?", (company_id,))
+            if rows.get(table):
+                marks = ", ".join("?" * len(columns))
+                conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})", rows[table])
+
+
+def benchmark_rows(company_id, clima_data):
+    """update_benchmarks parameters for one benchmarked clima document."""
+    return [(d.get("benchmark"), d.get("gap_vs_benchmark"), d.get("percentile_rank"), d.get("benchmark_scope"),
+             company_id, year, d["dimension_code"])
+            for year, yd in clima_data["years"].items() for d in yd["dimensions"]]
+
+
+def update_benchmarks(conn, rows):
+    """Refresh benchmark columns after the cross-tenant benchmark write-back (rows from benchmark_rows)."""
+    with conn:
+        conn.executemany(
+            "UPDATE dimension_scores SET benchmark = ?, gap_vs_benchmark = ?, percentile_rank = ?, benchmark_scope = ? "
+            "WHERE company_id = ? AND year = ? AND dimension_code = ?",
+            rows,
+        )
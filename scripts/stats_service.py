@@ -0,0 +1,443 @@
+"""
+Local stand-in for the clima-api statistics endpoints.
+
+Implements the ``API_ENDPOINTS`` the frontend calls (src/lib/constants.ts)
+over generated tenant data, so load tests do not depend on the remote host:
+
+    GET /api/v1/statistics/dimensions   year, min_responses            (DimensionStatsParams)
+    GET /api/v1/statistics/items        year, dimension, classification, min_responses
+    GET /api/v1/statistics/trends       min_years, dimension           (TrendsParams)
+    GET /api/v1/statistics/alerts       severity, alert_type, dimension, limit (AlertsParams)
+    GET /api/v1/statistics/export       format=csv, scope, year, dimension (format=excel: 400)
+    GET /health, /health/detail, /health/db
+
+Every endpoint also takes ``company`` (default: the first tenant loaded);
+the remote API is single-tenant, this one serves every tenant under --root.
+
+All JSON is parsed once at startup. Each response row is encoded to bytes
+up front and stored under (company, year, dimension) keys, so a request is a
+dict lookup, a filter over at most a few dozen pre-encoded rows and one
+``b",".join`` — no JSON parsing or serialization on the request path.
+
+The generated data has no questionnaire items. Each of the 17 clima_v2
+dimensions stands in as one item (item_code = v2 code, item_text = its name),
+grouped under the API's 8 ``Dimension`` values (src/types/api.ts) by
+API_DIMENSION, so every ``dimension`` field and filter uses the API
+vocabulary. ``/dimensions`` aggregates those items. These are not item-level
+statistics. Alerts combine the tenant's early alerts (``decline``) with
+ceiling and dispersion checks on the latest year.
+
+    python scripts/stats_service.py --root public/data --port 8766
+    python scripts/stats_service.py --root public/data --output-format pack --pack-root public/packs
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+import payload_codec
+import tenant_pack
+from data_service import MAX_HEADER_BYTES, parse_target, response_head
+from tenant_config import TENANTS_PATH, iter_tenants
+
+DEFAULT_PORT = 8766
+API_PREFIX = "/api/v1/statistics/"
+VERSION = "local-1"
+CLASSIFICATION = {"fortaleza_excepcional": "fortaleza", "fortaleza_solida": "fortaleza",
+                  "aceptable": "oportunidad", "atencion": "debilidad", "crisis": "critico"}
+CLASSIFICATION_BINS = [(3.5, "critico"), (4.0, "debilidad"), (4.2, "oportunidad")]   # clima segment bins
+API_DIMENSION = {   # clima_v2 dimension code → clima-api Dimension
+    "liderazgo_efectivo": "liderazgo", "confianza_institucional": "liderazgo",
+    "comunicacion_interna": "comunicacion",
+    "desarrollo_profesional": "desarrollo", "equidad_ascensos": "desarrollo", "autonomia": "desarrollo",
+    "compensacion": "compensacion", "beneficios_exclusivos": "compensacion", "reconocimiento": "compensacion",
+    "cohesion_equipo": "ambiente", "cuidado_mutuo": "ambiente", "seguridad_fisica": "ambiente",
+    "balance_vida_trabajo": "balance",
+    "innovacion_cambio": "innovacion",
+    "proposito_trabajo": "compromiso", "orgullo_institucional": "compromiso", "resultados_logros": "compromiso",
+}
+DEFAULT_API_DIMENSION = "compromiso"   # engagement_global and any code outside the table
+EXPORT_FORMATS = ("csv", "excel")      # ExportFormat; only csv is produced locally
+TOP_ITEMS = 3                          # top_items / bottom_items per dimension
+ALERT_SEVERITY = {"high": "critical", "medium": "warning", "low": "info"}
+SEVERITY_ORDER = {"critical": 0, "warning": 1, "info": 2}
+CEILING_FAVORABILITY = 95.0    # latest-year favorability at or above this: little room to improve
+DISPERSION_STD = 0.9           # latest-year std_score at or above this: split opinions
+TREND_STABLE = 0.1             # |total change| below this is "stable"
+EXPORT_SCOPES = ("items", "dimensions", "trends", "alerts")
+RESPONSE_CACHE_SIZE = 4096     # memoized responses per process, oldest dropped first
+
+
+def encode(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# ─── Loading ─────────────────────────────────────────────────────────────────
+
+def document_reader(root, output_format="tree", pack_root=None):
+    """read(company_id, name) -> parsed JSON, from a file tree or from packs."""
+    if output_format == "pack":
+        pack_root = pack_root or Path(root) / "packs"
+        return lambda cid, name: payload_codec.loads(
+            tenant_pack.read_document(tenant_pack.fanout_path(pack_root, cid), name))
+    return lambda cid, name: payload_codec.loads((Path(root) / cid / name).read_bytes())
+
+
+def api_dimension(code):
+    return API_DIMENSION.get(code, DEFAULT_API_DIMENSION)
+
+
+def classify(score):
+    for bound, label in CLASSIFICATION_BINS:
+        if score < bound:
+            return label
+    return "fortaleza"
+
+
+def item_row(dim, year):
+    n = dim["respondent_count"]
+    fav = round(n * dim["favorability_pct"] / 100)
+    return {
+        "item_code": dim["dimension_code"],
+        "item_text": dim["dimension_name"],
+        "dimension": api_dimension(dim["dimension_code"]),
+        "year": int(year),
+        "total_responses": n,
+        "score_mean": dim["avg_score"],
+        "score_std": dim.get("std_score", 0.0),
+        "favorability_pct": dim["favorability_pct"],
+        "score_distribution": {"4-5": fav, "1-3": n - fav},
+        "classification": CLASSIFICATION.get(dim.get("segment"), "oportunidad"),
+    }
+
+
+def dimension_stat(dimension, year, items):
+    """DimensionStatistics over one API dimension's items (response-weighted, pooled std)."""
+    total = sum(i["total_responses"] for i in items)
+    weights = [i["total_responses"] / total if total else 1 / len(items) for i in items]
+    mean = sum(w * i["score_mean"] for w, i in zip(weights, items))
+    var = sum(w * (i["score_std"] ** 2 + (i["score_mean"] - mean) ** 2) for w, i in zip(weights, items))
+    ranked = sorted(items, key=lambda i: i["score_mean"], reverse=True)
+    return {
+        "dimension": dimension, "year": year, "items_count": len(items),
+        "total_responses": max(i["total_responses"] for i in items),   # every item is answered by each respondent
+        "score_mean": round(mean, 2), "score_std": round(var ** 0.5, 2),
+        "favorability_pct": round(sum(w * i["favorability_pct"] for w, i in zip(weights, items)), 1),
+        "classification": classify(round(mean, 2)),
+        "top_items": ranked[:TOP_ITEMS], "bottom_items": ranked[::-1][:TOP_ITEMS],
+    }
+
+
+def trend_pattern(scores):
+    steps = [b - a for a, b in zip(scores, scores[1:])]
+    total = scores[-1] - scores[0]
+    if len(steps) > 1 and any(s > TREND_STABLE for s in steps) and any(s < -TREND_STABLE for s in steps):
+        return "volatile"
+    if total > TREND_STABLE:
+        return "improving"
+    if total < -TREND_STABLE:
+        return "declining"
+    return "stable"
+
+
+def trend_rows(clima):
+    series = {}
+    for year in sorted(clima["years"]):
+        for dim in clima["years"][year]["dimensions"]:
+            series.setdefault(dim["dimension_code"], (dim["dimension_name"], []))[1].append(
+                (int(year), dim["avg_score"], dim["favorability_pct"]))
+    rows = []
+    for code, (name, points) in series.items():
+        scores = [p[1] for p in points]
+        total = round(scores[-1] - scores[0], 2)
+        rows.append({
+            "item_code": code, "item_text": name, "dimension": api_dimension(code),
+            "years": [p[0] for p in points], "scores": scores, "favorabilities": [p[2] for p in points],
+            "total_change": total,
+            "average_change": round(total / (len(points) - 1), 3) if len(points) > 1 else 0.0,
+            "trend_pattern": trend_pattern(scores),
+            "data_points": len(points),
+        })
+    return rows
+
+
+def alert_rows(company_id, clima, predictions):
+    latest = max(clima["years"])
+    names = {d["dimension_code"]: d["dimension_name"] for d in clima["years"][latest]["dimensions"]}
+    rows = []
+    for a in predictions.get("early_alerts", []):
+        rows.append({
+            "id": f"{company_id}:{a['id']}", "item_code": a["dimension"], "item_text": a["label"],
+            "dimension": api_dimension(a["dimension"]), "alert_type": "decline",
+            "severity": ALERT_SEVERITY.get(a["severity"], "info"),
+            "current_value": a["current_score"], "threshold_value": a["previous_score"],
+            "description": f"{a['label']}: {a['change']:+.2f} en {a['months_declining']} meses",
+            "recommendation": a["recommendation"], "detected_at": a["created_at"],
+        })
+    detected_at = clima.get("generated_at", "")
+    for d in clima["years"][latest]["dimensions"]:
+        code, name = d["dimension_code"], names[d["dimension_code"]]
+        if d["favorability_pct"] >= CEILING_FAVORABILITY:
+            rows.append({
+                "id": f"{company_id}:ceiling_{code}", "item_code": code, "item_text": name,
+                "dimension": api_dimension(code),
+                "alert_type": "ceiling", "severity": "info", "current_value": d["favorability_pct"],
+                "threshold_value": CEILING_FAVORABILITY,
+                "description": f"{name}: favorabilidad {d['favorability_pct']}% cerca del techo",
+                "recommendation": f"Sostener las prácticas de {name.lower()} y priorizar otras dimensiones",
+                "detected_at": detected_at,
+            })
+        if d.get("std_score", 0.0) >= DISPERSION_STD:
+            rows.append({
+                "id": f"{company_id}:dispersion_{code}", "item_code": code, "item_text": name,
+                "dimension": api_dimension(code),
+                "alert_type": "dispersion", "severity": "warning", "current_value": d["std_score"],
+                "threshold_value": DISPERSION_STD,
+                "description": f"{name}: opiniones divididas (desviación {d['std_score']})",
+                "recommendation": f"Revisar {name.lower()} por área: el promedio oculta grupos opuestos",
+                "detected_at": detected_at,
+            })
+    rows.sort(key=lambda r: SEVERITY_ORDER[r["severity"]])
+    return rows
+
+
+def index_tenant(company_id, clima, predictions):
+    """Pre-encoded response rows for one tenant, keyed for the endpoint filters.
+
+    Rows are (filter fields..., encoded bytes, plain dict); the dicts are kept
+    only for CSV export.
+    """
+    items, dimensions = [], []
+    for year in sorted(clima["years"], reverse=True):
+        grouped = {}
+        for dim in clima["years"][year]["dimensions"]:
+            item = item_row(dim, year)
+            grouped.setdefault(item["dimension"], []).append(item)
+            key = (int(year), item["dimension"], item["classification"], item["total_responses"])
+            items.append((key, encode(item), item))
+        for dimension, members in grouped.items():
+            stat = dimension_stat(dimension, int(year), members)
+            key = (int(year), dimension, stat["classification"], stat["total_responses"])
+            dimensions.append((key, encode(stat), stat))
+    trends = [((t["data_points"], t["dimension"]), encode(t), t) for t in trend_rows(clima)]
+    alerts = [((a["severity"], a["alert_type"], a["dimension"]), encode(a), a)
+              for a in alert_rows(company_id, clima, predictions)]
+    return {"items": items, "dimensions": dimensions, "trends": trends, "alerts": alerts}
+
+
+def build_index(read, company_ids):
+    index = {}
+    for company_id in company_ids:
+        index[company_id] = index_tenant(company_id, read(company_id, "clima_v2_data.json"),
+                                         read(company_id, "predictions_data.json"))
+    return index
+
+
+# ─── Queries ─────────────────────────────────────────────────────────────────
+
+class BadRequest(ValueError):
+    pass
+
+
+def _int(query, name):
+    if name not in query:
+        return None
+    try:
+        return int(query[name])
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer") from None
+
+
+def select(tenant, endpoint, query):
+    """Rows matching the endpoint's filters, as (encoded, dict) pairs."""
+    if endpoint in ("dimensions", "items"):
+        year, min_n = _int(query, "year"), _int(query, "min_responses") or 0
+        dimension, classification = query.get("dimension"), query.get("classification")
+        return [(raw, row) for (y, d, c, n), raw, row in tenant[endpoint]
+                if (year is None or y == year) and n >= min_n
+                and (dimension is None or d == dimension) and (classification is None or c == classification)]
+    if endpoint == "trends":
+        min_years, dimension = _int(query, "min_years") or 0, query.get("dimension")
+        return [(raw, row) for (points, d), raw, row in tenant["trends"]
+                if points >= min_years and (dimension is None or d == dimension)]
+    if endpoint == "alerts":
+        severity, alert_type, dimension = query.get("severity"), query.get("alert_type"), query.get("dimension")
+        rows = [(raw, row) for (s, t, d), raw, row in tenant["alerts"]
+                if (severity is None or s == severity) and (alert_type is None or t == alert_type)
+                and (dimension is None or d == dimension)]
+        limit = _int(query, "limit")
+        return rows[:limit] if limit is not None else rows
+    raise KeyError(endpoint)
+
+
+def csv_bytes(rows):
+    """CSV for export; nested values (lists, dicts) are written as JSON."""
+    if not rows:
+        return b""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=[k for k in rows[0] if k not in ("top_items", "bottom_items")],
+                            extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({k: json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v
+                         for k, v in row.items()})
+    return out.getvalue().encode("utf-8-sig")
+
+
+# ─── Server ──────────────────────────────────────────────────────────────────
+
+JSON_TYPE = {"Content-Type": "application/json; charset=utf-8"}
+
+
+def make_responder(index, started):
+    """respond(method, path, query) -> (status, body, headers); never blocks or awaits."""
+    default_company = next(iter(index), None)
+    counts = {"tenants": len(index),
+              **{table: sum(len(t[table]) for t in index.values())
+                 for table in ("dimensions", "items", "trends", "alerts")}}
+    health = {"status": "healthy", "version": VERSION, "database": {"connected": True}}
+
+    def error(status, detail):
+        return status, encode({"detail": detail}), JSON_TYPE
+
+    def respond(method, path, query):
+        if method not in ("GET", "HEAD"):
+            return error(405, "method not allowed")
+        if path in ("/health", "/health/db"):
+            return 200, encode(health), JSON_TYPE
+        if path == "/health/detail":
+            return 200, encode({**health, "database_file_size_mb": 0.0, "table_counts": counts,
+                                "uptime_seconds": round(time.time() - started, 1)}), JSON_TYPE
+        if not path.startswith(API_PREFIX):
+            return error(404, "not found")
+        endpoint = path[len(API_PREFIX):].strip("/")
+        tenant = index.get(query.get("company", default_company))
+        if tenant is None:
+            return error(404, f"unknown company {query.get('company')!r}")
+        try:
+            if endpoint == "export":
+                fmt = query.get("format", "csv")
+                if fmt not in EXPORT_FORMATS:
+                    raise BadRequest(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+                if fmt != "csv":
+                    raise BadRequest(f"format={fmt} is not available locally; use format=csv")
+                scope = query.get("scope", "dimensions")
+                if scope not in EXPORT_SCOPES:
+                    raise BadRequest(f"scope must be one of {', '.join(EXPORT_SCOPES)}")
+                return 200, csv_bytes([row for _, row in select(tenant, scope, query)]), {
+                    "Content-Type": "text/csv; charset=utf-8",
+                    "Content-Disposition": f'attachment; filename="clima_{scope}.csv"'}
+            rows = select(tenant, endpoint, query)
+        except BadRequest as exc:
+            return error(400, str(exc))
+        except KeyError:
+            return error(404, "not found")
+        return 200, b"[" + b",".join(raw for raw, _ in rows) + b"]", JSON_TYPE
+
+    return respond
+
+
+class StatsProtocol(asyncio.Protocol):
+    """HTTP/1.1 keep-alive, answered synchronously in data_received.
+
+    Every statistics response is computable without awaiting, so this skips
+    the stream reader/writer layer data_service.py uses; responses for a raw
+    request target are memoized (the index is immutable once built).
+    """
+
+    def __init__(self, respond, cache):
+        self.respond, self.cache = respond, cache
+        self.buffer = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            head, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+            if len(head) > MAX_HEADER_BYTES:
+                self.transport.close()
+                return
+            lines = head.split(b"\r\n")
+            try:
+                method, target, _ = lines[0].decode("latin-1").split(" ", 2)
+            except ValueError:
+                self.transport.close()
+                return
+            method = method.upper()
+            hit = self.cache.get((method, target))
+            if hit is None:
+                status, body, headers = self.respond(method, *parse_target(target))
+                hit = (status, body, headers)
+                if status == 200 and target.startswith(API_PREFIX):
+                    if len(self.cache) >= RESPONSE_CACHE_SIZE:
+                        self.cache.pop(next(iter(self.cache)))
+                    self.cache[(method, target)] = hit
+            status, body, headers = hit
+            self.transport.write(response_head(status, len(body), headers))
+            if method != "HEAD":
+                self.transport.write(body)
+            if any(line.lower() == b"connection: close" for line in lines[1:]):
+                self.transport.close()
+                return
+
+
+async def serve(respond, host, port, reuse_port=False):
+    cache = {}
+    server = await asyncio.get_running_loop().create_server(lambda: StatsProtocol(respond, cache), host, port,
+                                                            reuse_port=reuse_port or None)
+    async with server:
+        await server.serve_forever()
+
+
+def run_process(respond, host, port, reuse_port):
+    try:
+        asyncio.run(serve(respond, host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Serve clima-api statistics endpoints from generated data.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--root", type=Path, default=Path(__file__).resolve().parent.parent / "public" / "data")
+    parser.add_argument("--tenants", type=Path, default=TENANTS_PATH)
+    parser.add_argument("--output-format", choices=("tree", "pack"), default="tree")
+    parser.add_argument("--pack-root", type=Path, default=None)
+    parser.add_argument("--processes", type=int, default=1,
+                        help="server processes sharing the port (SO_REUSEPORT), each with the forked index")
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    read = document_reader(args.root, args.output_format, args.pack_root)
+    index = build_index(read, [cid for cid, _ in iter_tenants(args.tenants)])
+    respond = make_responder(index, started)
+    print(f"Indexed {len(index)} tenants in {time.time() - started:.1f}s")
+    print(f"Serving statistics on http://{args.host}:{args.port} ({args.processes} processes)", flush=True)
+    if args.processes <= 1:
+        run_process(respond, args.host, args.port, False)
+        return 0
+    # Forked children share the index pages copy-on-write; the kernel balances connections
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=run_process, args=(respond, args.host, args.port, True))
+             for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
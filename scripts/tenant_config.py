@@ -0,0 +1,101 @@
+"""
+Tenant configuration loading.
+
+Tenants are read from a config path instead of hardcoded dicts:
+
+- a directory: every ``*.json`` file in it (sorted), each holding one tenant
+  object or a list of them (the default is scripts/tenants/)
+- a ``.jsonl`` file: one tenant object per line
+- a ``.json`` file: a tenant object, a list, or {"tenants": [...]}
+
+Tenants are yielded one at a time, so a 5,000-tenant config never has to
+be in memory at once (``.jsonl`` and directories are read lazily).
+
+Tenant shape:
+
+    {
+      "id": "novatech",
+      "name": "NovaTech Solutions",
+      "short_name": "NovaTech",                       # optional, defaults to name
+      "industry": "Tech / SaaS",
+      "employee_count": 450,
+      "departments": [["engineering", "Engineering"], ...],
+      "offsets": {"<dimension_code>": 0.25, ...},      # narrative offsets
+      "engagement_profile": {"Embajadores": 35, ...},  # percentages
+      "risk_narratives": {"primary": [id, label, dimension_code, weight], ...},
+      "risk_model": {"intercept": -3.4, "coefficients": {...}},
+      "score_offset": 0.05, "narrative": "...",        # optional, generate_company_data.py
+      "org_tree": {...}, "org_levels": [...], "org_min_n": 5   # optional, see org_tree.py
+    }
+"""
+
+import json
+from pathlib import Path
+
+TENANTS_PATH = Path(__file__).parent / "tenants"
+REQUIRED_KEYS = ("id", "name", "industry", "employee_count", "departments", "offsets",
+                 "engagement_profile", "risk_narratives", "risk_model")
+
+
+def normalize_tenant(raw, source="<config>"):
+    """Validate one tenant object and return (company_id, company)."""
+    missing = [k for k in REQUIRED_KEYS if k not in raw]
+    if missing:
+        raise ValueError(f"{source}: tenant {raw.get('id', '?')!r} is missing {', '.join(missing)}")
+    company = dict(raw)
+    company["departments"] = [tuple(d) for d in raw["departments"]]
+    company.setdefault("short_name", raw["name"])
+    return raw["id"], company
+
+
+def _objects(path):
+    path = Path(path)
+    if path.is_dir():
+        for child in sorted(path.glob("*.json")):
+            yield from _objects(child)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    yield json.loads(line), f"{path}:{line_no}"
+            return
+        data = json.load(f)
+    if isinstance(data, dict) and "tenants" in data:
+        data = data["tenants"]
+    for obj in data if isinstance(data, list) else [data]:
+        yield obj, str(path)
+
+
+def iter_tenants(path=TENANTS_PATH):
+    """Yield (company_id, company) for every tenant under path, in config order."""
+    seen = set()
+    for raw, source in _objects(path):
+        company_id, company = normalize_tenant(raw, source)
+        if company_id in seen:
+            raise ValueError(f"{source}: duplicate tenant id {company_id!r}")
+        seen.add(company_id)
+        yield company_id, company
+
+
+def resize_tenant(company, employee_count, departments):
+    """Copy of a tenant with a new headcount and department count.
+
+    Departments beyond the tenant's own are numbered (area_001, ...). A
+    configured org tree refers to the original departments, so it is dropped.
+    """
+    resized = {k: v for k, v in company.items() if k not in ("org_tree", "org_levels")}
+    depts = list(company["departments"])[:departments]
+    depts += [(f"area_{i:03d}", f"Área {i}") for i in range(len(depts) + 1, departments + 1)]
+    resized.update(employee_count=employee_count, departments=depts)
+    return resized
+
+
+def count_tenants(path=TENANTS_PATH):
+    """Tenant count for progress reporting, without normalizing every tenant."""
+    return sum(1 for _ in _objects(path))
+
+
+def load_tenants(path=TENANTS_PATH):
+    """All tenants as a dict; only for small configs (the four demo companies)."""
+    return dict(iter_tenants(path))
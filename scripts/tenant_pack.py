@@ -0,0 +1,186 @@
+"""
+Per-tenant pack files: every document of a tenant in one indexed archive.
+
+Thousands of tenants × nine-plus JSON files each make deploys and syncs slow
+on per-file overhead. A pack stores a tenant's documents back to back,
+uncompressed, followed by an offset table, so any single document is one
+seek + one read away and nothing has to be unpacked:
+
+    MAGIC | doc bytes | doc bytes | ... | index JSON | index offset (u64) | index length (u64) | MAGIC
+
+The index is {"version": 1, "documents": {name: [offset, length]}} with
+names relative to the tenant root (e.g. "text_analysis/comments_0001.json").
+Re-adding a name appends the new bytes and points the index at them.
+
+Appending never overwrites the existing index: new documents go after the
+old trailer, and the new index and trailer follow them, synced before close
+returns. If a writer dies part-way, the file ends in a torn tail after the
+last complete trailer. The next append finds that trailer, truncates the
+tail and carries on. Readers of a torn pack get an error instead of wrong
+bytes. Superseded bytes (old copies of re-added documents, old indexes)
+stay in the file until the pack is rewritten with "w", so callers batch
+their appends into one per tenant.
+
+Packs are spread over a fan-out layout, ``<root>/ab/cd/<tenant>.pack``, with
+the two levels taken from a hash of the tenant id. ``export`` writes the
+regular static tree (``<out>/<tenant>/<name>``) back out of the packs:
+
+    python scripts/tenant_pack.py list public/packs/ab/cd/novatech.pack
+    python scripts/tenant_pack.py cat public/packs/ab/cd/novatech.pack clima_v2_data.json
+    python scripts/tenant_pack.py export public/packs public/data [TENANT ...]
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+
+MAGIC = b"TPACK001"
+TRAILER = struct.Struct("<QQ8s")
+PACK_SUFFIX = ".pack"
+FANOUT_LEVELS = 2
+
+
+def fanout_path(root, company_id, levels=FANOUT_LEVELS):
+    """<root>/ab/cd/<company_id>.pack, with ab/cd from the tenant id's hash."""
+    digest = hashlib.sha1(company_id.encode("utf-8")).hexdigest()
+    parts = [digest[2 * i:2 * i + 2] for i in range(levels)]
+    return Path(root).joinpath(*parts, company_id + PACK_SUFFIX)
+
+
+def _read_trailer(f):
+    f.seek(0, 2)
+    size = f.tell()
+    if size < len(MAGIC) + TRAILER.size:
+        raise ValueError(f"{f.name}: too small to be a pack")
+    f.seek(size - TRAILER.size)
+    index_offset, index_length, magic = TRAILER.unpack(f.read(TRAILER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{f.name}: not a pack file (bad trailer)")
+    return index_offset, index_length
+
+
+def _last_trailer(f):
+    """(index offset, index length, end) of the last complete trailer, scanning back past a torn tail."""
+    f.seek(0)
+    raw = f.read()
+    end = len(raw)
+    while True:
+        end = raw.rfind(MAGIC, len(MAGIC), end) + len(MAGIC)
+        if end < len(MAGIC) + TRAILER.size:
+            raise ValueError(f"{f.name}: no complete index to recover")
+        offset, length, _ = TRAILER.unpack(raw[end - TRAILER.size:end])
+        if offset + length == end - TRAILER.size:
+            try:
+                json.loads(raw[offset:offset + length])
+                return offset, length, end
+            except ValueError:
+                pass
+        end -= len(MAGIC)
+
+
+def read_index(path):
+    """{name: (offset, length)} for every document in the pack."""
+    with open(path, "rb") as f:
+        offset, length = _read_trailer(f)
+        f.seek(offset)
+        raw = json.loads(f.read(length))
+    return {name: tuple(span) for name, span in raw["documents"].items()}
+
+
+def open_pack(path, mode="w"):
+    """Open a pack for writing ("w" truncates, "a" keeps existing documents)."""
+    path = Path(path)
+    if mode == "a" and path.exists():
+        f = open(path, "r+b")
+        try:
+            index_offset, index_length = _read_trailer(f)
+            end = f.tell()
+        except ValueError:
+            # An earlier append died before its trailer: drop the torn tail
+            index_offset, index_length, end = _last_trailer(f)
+            f.truncate(end)
+        f.seek(index_offset)
+        index = {name: tuple(span) for name, span in json.loads(f.read(index_length))["documents"].items()}
+        # New documents go after the old trailer, which stays valid until close writes the new one
+        f.seek(end)
+        return {"path": path, "file": f, "offset": end, "index": index}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, "wb")
+    f.write(MAGIC)
+    return {"path": path, "file": f, "offset": len(MAGIC), "index": {}}
+
+
+def add_document(pack, name, data):
+    """Append one document (bytes) to an open pack."""
+    pack["file"].write(data)
+    pack["index"][name] = (pack["offset"], len(data))
+    pack["offset"] += len(data)
+
+
+def close_pack(pack):
+    """Write the offset table and trailer; returns the index."""
+    raw = json.dumps({"version": 1, "documents": pack["index"]}, ensure_ascii=False,
+                     separators=(",", ":")).encode("utf-8")
+    f = pack["file"]
+    f.write(raw)
+    f.write(TRAILER.pack(pack["offset"], len(raw), MAGIC))
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+    return pack["index"]
+
+
+def read_document(path, name, index=None):
+    """One document's bytes, read by offset without touching the rest of the pack."""
+    index = index if index is not None else read_index(path)
+    if name not in index:
+        raise KeyError(f"{path}: no document {name!r}")
+    offset, length = index[name]
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+def iter_packs(root):
+    """(company_id, pack path) for every pack under a fan-out root."""
+    for path in sorted(Path(root).rglob("*" + PACK_SUFFIX)):
+        yield path.stem, path
+
+
+def export_tree(pack_path, outdir):
+    """Write every document of one pack under outdir/<name>; returns the document count."""
+    index = read_index(pack_path)
+    with open(pack_path, "rb") as f:
+        for name, (offset, length) in index.items():
+            target = Path(outdir) / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            f.seek(offset)
+            target.write_bytes(f.read(length))
+    return len(index)
+
+
+def main(argv):
+    if len(argv) == 2 and argv[0] == "list":
+        for name, (offset, length) in read_index(argv[1]).items():
+            print(f"{offset:>12} {length:>10}  {name}")
+        return 0
+    if len(argv) == 3 and argv[0] == "cat":
+        sys.stdout.buffer.write(read_document(argv[1], argv[2]))
+        return 0
+    if len(argv) >= 3 and argv[0] == "export":
+        packs = [(cid, fanout_path(argv[1], cid)) for cid in argv[3:]] or iter_packs(argv[1])
+        tenants = docs = 0
+        for company_id, path in packs:
+            docs += export_tree(path, Path(argv[2]) / company_id)
+            tenants += 1
+        print(f"Exported {docs} documents for {tenants} tenants to {argv[2]}")
+        return 0
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The scripts are run as top-level modules (python scripts/x.py), so import them that way
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
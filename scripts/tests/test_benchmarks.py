@@ -0,0 +1,47 @@
+import numpy as np
+
+import benchmarks
+
+
+def digest_of(values):
+    return benchmarks.add(benchmarks.new_digest(), values)
+
+
+def test_quantiles_track_the_data():
+    values = np.random.default_rng(7).normal(4.0, 0.4, 20_000)
+    digest = digest_of(values)
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert abs(benchmarks.quantile(digest, q) - np.quantile(values, q)) < 0.02
+    assert benchmarks.quantile(digest, 0) == values.min()
+    assert benchmarks.quantile(digest, 1) == values.max()
+    assert benchmarks.count(digest) == len(values)
+
+
+def test_merge_matches_a_single_digest():
+    rng = np.random.default_rng(11)
+    parts = [rng.normal(3.5 + 0.2 * i, 0.3, 3_000) for i in range(4)]
+    merged = benchmarks.merge([digest_of(p) for p in parts])
+    values = np.concatenate(parts)
+    assert benchmarks.count(merged) == len(values)
+    assert (merged["min"], merged["max"]) == (values.min(), values.max())
+    for q in (0.05, 0.5, 0.95):
+        assert abs(benchmarks.quantile(merged, q) - np.quantile(values, q)) < 0.03
+    assert abs(benchmarks.cdf(merged, 3.8) - np.mean(values <= 3.8)) < 0.01
+
+
+def test_merge_stays_compressed():
+    merged = benchmarks.merge([digest_of(np.random.default_rng(i).uniform(1, 5, 5_000)) for i in range(20)])
+    assert len(merged["means"]) <= merged["compression"]
+
+
+def test_cdf_bounds_and_nan_values():
+    digest = digest_of([1.0, 2.0, np.nan, 3.0])
+    assert benchmarks.count(digest) == 3
+    assert benchmarks.cdf(digest, 0.5) == 0.0 and benchmarks.cdf(digest, 3.0) == 1.0
+
+
+def test_dict_round_trip():
+    digest = digest_of(np.linspace(1, 5, 2_001))
+    restored = benchmarks.digest_from_dict(benchmarks.digest_to_dict(digest))
+    assert benchmarks.count(restored) == benchmarks.count(digest)
+    assert abs(benchmarks.quantile(restored, 0.3) - benchmarks.quantile(digest, 0.3)) < 1e-3
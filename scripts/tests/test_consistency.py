@@ -0,0 +1,68 @@
+import numpy as np
+
+import consistency
+
+
+def facts(*rows):
+    """(tenant index, key id, value) arrays from (t, k, v) rows."""
+    t, k, v = zip(*rows) if rows else ((), (), ())
+    return np.asarray(t, dtype=np.int64), np.asarray(k, dtype=np.int64), np.asarray(v, dtype=np.float64)
+
+
+def violations(kind, lhs, rhs, tol=0.0, n_tenants=2, n_keys=3):
+    bad = consistency.check_invariant(kind, lhs, rhs, tol, n_tenants, n_keys)
+    return [(int(t), int(k), None if np.isnan(l) else float(l), None if np.isnan(r) else float(r))
+            for t, k, l, r in zip(*bad)]
+
+
+def test_equal_within_tolerance():
+    lhs = facts((0, 0, 4.10), (0, 1, 3.5), (1, 0, 4.0))
+    rhs = facts((0, 0, 4.104), (0, 1, 3.5), (1, 0, 4.0))
+    assert violations("equal", lhs, rhs, tol=0.006) == []
+
+
+def test_equal_reports_mismatches_and_missing_rows_on_both_sides():
+    lhs = facts((0, 0, 4.1), (0, 1, 3.5), (1, 2, 2.0))
+    rhs = facts((0, 0, 4.1), (0, 1, 3.9), (1, 0, 4.0))
+    assert sorted(violations("equal", lhs, rhs, tol=0.006)) == [
+        (0, 1, 3.5, 3.9),        # differs
+        (1, 0, None, 4.0),       # only on the right
+        (1, 2, 2.0, None),       # only on the left
+    ]
+
+
+def test_sum_per_tenant():
+    parts = facts((0, 0, 10), (0, 1, 20), (1, 0, 5), (1, 1, 5))
+    totals = facts((0, 0, 30), (1, 0, 11))
+    assert violations("sum", parts, totals) == [(1, -1, 10.0, 11.0)]
+
+
+def test_sum_skips_tenants_without_parts():
+    assert violations("sum", facts((0, 0, 3)), facts((0, 0, 3), (1, 0, 7))) == []
+
+
+def test_sum_without_target_fails():
+    assert violations("sum", facts((0, 0, 3), (1, 0, 4)), facts((0, 0, 3))) == [(1, -1, 4.0, None)]
+
+
+def test_subset():
+    lhs = facts((0, 0, 1), (0, 2, 1), (1, 1, 1))
+    rhs = facts((0, 0, 1), (0, 1, 1), (1, 1, 1))
+    assert violations("subset", lhs, rhs) == [(0, 2, 1.0, None)]
+
+
+def test_run_checks_names_failing_tenants():
+    results = [
+        ("good", [("clima.engagement_score", "global", 4.2), ("segmentation.global_score", "global", 4.2)]),
+        ("bad", [("clima.engagement_score", "global", 4.2), ("segmentation.global_score", "global", 3.9)]),
+    ]
+    arrays, tenant_ids, keys = consistency.collect(results)
+    lhs = arrays["segmentation.global_score"]
+    rhs = arrays["clima.engagement_score"]
+    bad_t, _, _, _ = consistency.check_invariant("equal", lhs, rhs, consistency.SCORE_TOL,
+                                                 len(tenant_ids), len(keys))
+    assert [tenant_ids[t] for t in bad_t] == ["bad"]
+
+
+def test_every_invariant_has_a_known_kind():
+    assert {kind for _, kind, *_ in consistency.INVARIANTS} <= {"equal", "sum", "subset"}
@@ -0,0 +1,58 @@
+import warnings
+
+import numpy as np
+
+import early_alerts
+
+NAN = np.nan
+
+
+def test_flat_series_do_not_trigger():
+    Y = np.array([[4.0, 4.01, 3.99, 4.0, 4.02, 4.0, 3.99, 4.0]])
+    found = early_alerts.detect(Y)
+    assert not found["triggered"][0] and not found["change_point"][0]
+
+
+def test_cusum_catches_a_small_persistent_shift():
+    # One step of -0.1 then flat: too small for a sudden drop, too short for a run
+    Y = np.array([[4.0, 4.0, 4.0, 4.0, 3.9, 3.9, 3.9, 3.85]])
+    found = early_alerts.detect(Y)
+    assert found["run"][0] == 1 and not found["sudden"][0]
+    assert found["change_point"][0] and found["triggered"][0]
+
+
+def test_sudden_drop_and_decline_run():
+    Y = np.array([[4.0, 4.0, 4.0, 3.8],
+                  [4.3, 4.2, 4.1, 4.0]])
+    found = early_alerts.detect(Y)
+    assert found["sudden"].tolist() == [True, False]
+    assert found["run"].tolist() == [1, 3]
+    assert found["triggered"].all()
+    np.testing.assert_allclose(found["change"], [-0.2, -0.3])
+
+
+def test_gaps_are_not_drops_and_empty_rows_are_quiet():
+    Y = np.array([[4.0, NAN, 4.0, NAN],
+                  [NAN, NAN, NAN, NAN],
+                  [NAN, NAN, 4.0, 3.5]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        found = early_alerts.detect(Y)
+    assert found["triggered"].tolist() == [False, False, True]
+    assert not found["change_point"][1]
+
+
+def test_alert_describes_the_series_that_set_its_severity():
+    Y = np.array([[4.0, 4.0, 4.0, 3.95],     # company: low
+                  [4.2, 4.1, 4.0, 3.8],      # area A: high
+                  [4.0, 4.0, 4.0, 3.8]])     # area B: medium
+    keys = [("liderazgo", None), ("liderazgo", "A"), ("liderazgo", "B")]
+    found = early_alerts.detect(Y)
+    assert found["severity"].tolist() == ["low", "high", "medium"]
+
+    (alert,) = early_alerts.build_alerts(Y, keys, ["2026-01", "2026-02", "2026-03", "2026-04"],
+                                         {"liderazgo": "Liderazgo"}, "2026-04-30")
+    assert alert["severity"] == "high"
+    assert (alert["previous_score"], alert["current_score"], alert["change"]) == (4.2, 3.8, -0.4)
+    assert alert["affected_areas"] == ["A", "B"]
+    assert [p["score"] for p in alert["trend_data"]] == [4.2, 4.1, 4.0, 3.8]
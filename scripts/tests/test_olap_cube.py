@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import olap_cube
+
+LABELS = {"year": ["2025", "2026"], "department": ["ops", "ventas"], "tenure": ["<1", "1-3"],
+          "gender": ["F", "M"], "generation": ["millennial"]}
+DIMS = ["liderazgo", "compensacion"]
+
+
+@pytest.fixture
+def cube():
+    codes = np.array([[0, 0, 0, 0, 0], [0, 0, 1, 1, 0], [1, 1, 0, 0, 0], [1, 1, 0, 0, 0]])
+    scores = np.array([[4.5, 3.0], [3.5, np.nan], [4.0, 2.0], [5.0, 4.0]])
+    return olap_cube.build_cube(LABELS, codes, scores, DIMS)
+
+
+def test_build_counts_and_favorable(cube):
+    assert cube["counts"].shape == (2, 2, 2, 2, 1, 2)
+    assert cube["counts"][..., 1].sum() == 3                     # one compensacion answer is missing
+    assert cube["favorable"][1, 1, 0, 0, 0].tolist() == [2, 1]   # >= 4.0 is favorable
+    assert cube["sums"][1, 1, 0, 0, 0].tolist() == [9.0, 6.0]
+
+
+def test_encode_decode_round_trip(cube):
+    header, blob = olap_cube.encode_cube(cube)
+    assert header["synthetic"] is True
+    decoded = olap_cube.decode_cube(header, blob)
+    assert decoded["axes"] == cube["axes"]
+    for name in ("sums", "favorable", "counts"):
+        np.testing.assert_array_equal(decoded[name], cube[name])
+
+
+def test_write_read(cube, tmp_path):
+    olap_cube.write_cube(cube, tmp_path)
+    np.testing.assert_array_equal(olap_cube.read_cube(tmp_path)["counts"], cube["counts"])
+
+
+def test_rollup_and_scores(cube):
+    by_year = olap_cube.rollup(cube, keep=("year",))
+    assert list(by_year["axes"]) == ["year", "dimension"]
+    avg, fav, n = olap_cube.cube_scores(by_year)
+    np.testing.assert_allclose(avg, [[4.0, 3.0], [4.5, 3.0]])
+    np.testing.assert_allclose(fav, [[50.0, 0.0], [100.0, 50.0]])
+    assert n.tolist() == [[2, 1], [2, 2]]
+
+
+def test_slice(cube):
+    one_year = olap_cube.slice_cube(cube, year="2026", department=["ventas"])
+    assert "year" not in one_year["axes"] and one_year["axes"]["department"] == ["ventas"]
+    assert one_year["counts"].sum() == 4
+
+
+def test_empty_cells_score_nan(cube):
+    avg, _, _ = olap_cube.cube_scores(olap_cube.rollup(cube, keep=("year", "department")))
+    assert np.isnan(avg[0, 1]).all() and np.isnan(avg[1, 0]).all()
@@ -0,0 +1,49 @@
+import numpy as np
+
+import org_tree
+
+TREE = {"id": "acme", "name": "Acme", "children": [
+    {"id": "ops", "name": "Operaciones", "children": [
+        {"id": "ops-a", "respondents": 12}, {"id": "ops-b", "respondents": 3}]},
+    {"id": "ventas", "name": "Ventas", "children": [{"id": "ventas-a"}, {"id": "ventas-b"}]},
+]}
+GLOBAL = np.array([4.0, 3.5, 4.2])
+
+
+def test_flatten_is_breadth_first():
+    ids, _, parent, level, leaf_resp = org_tree.flatten_tree(TREE)
+    assert ids == ["acme", "ops", "ventas", "ops-a", "ops-b", "ventas-a", "ventas-b"]
+    assert parent.tolist() == [-1, 0, 0, 1, 1, 2, 2]
+    assert level.tolist() == [0, 1, 1, 2, 2, 2, 2]
+    assert leaf_resp.tolist() == [0, 0, 0, 12, 3, -1, -1]
+
+
+def test_rollup_adds_up_and_suppresses_small_nodes():
+    tree = org_tree.rollup_org_tree(TREE, GLOBAL, 100, np.random.default_rng(1), min_n=5)
+    n = dict(zip(tree["ids"], tree["respondents"].tolist()))
+    assert n["acme"] == 100 and n["ops"] == 15 and n["ventas"] == 85
+    assert tree["suppressed"].tolist()[tree["ids"].index("ops-b")]
+    # Parents are respondent-weighted means of their children (before rounding)
+    children = [tree["ids"].index(c) for c in ("ops", "ventas")]
+    weighted = (tree["scores"][children] * tree["respondents"][children, None]).sum(axis=0) / 100
+    np.testing.assert_allclose(tree["scores"][0], weighted, atol=0.01)
+
+
+def test_anchored_departments_reproduce_their_scores():
+    anchors = {"ops": (40, [3.2, 4.8, 4.0]), "ventas": (60, [4.6, 1.1, 3.9])}
+    tree = org_tree.rollup_org_tree(TREE, GLOBAL, 100, np.random.default_rng(2), anchors=anchors)
+    for node, (n, scores) in anchors.items():
+        i = tree["ids"].index(node)
+        assert tree["respondents"][i] == n
+        np.testing.assert_allclose(tree["scores"][i], scores, atol=0.01)
+    leaves = tree["scores"][3:]
+    assert ((leaves >= 1) & (leaves <= 5)).all()
+
+
+def test_level_documents_hide_suppressed_scores():
+    tree = org_tree.rollup_org_tree(TREE, GLOBAL, 100, np.random.default_rng(3), min_n=5)
+    manifest, documents = org_tree.org_level_documents(tree, ["a", "b", "c"], GLOBAL)
+    assert [level["node_count"] for level in manifest["levels"]] == [1, 2, 4]
+    nodes = {node["node_id"]: node for _, doc in documents for node in doc["nodes"]}
+    assert nodes["ops-b"]["suppressed"] and nodes["ops-b"]["scores"] is None
+    assert nodes["ops"]["parent_id"] == "acme" and nodes["acme"]["parent_id"] is None
@@ -0,0 +1,85 @@
+import copy
+
+import pytest
+
+import payload_codec
+
+# Rules as they appear in payload_fields.json; derive() must agree with src/lib/payload-codec.ts
+WIDTH = {"path": "edges[]", "field": "width", "rule": "affine", "of": "weight",
+         "scale": 0.5, "offset": 0.5, "max": 4, "digits": 2}
+SEGMENT = {"path": "cells[]", "field": "segment", "rule": "bins", "of": "score",
+           "thresholds": [3.5, 4.0], "labels": ["crisis", "atencion", "fortaleza"]}
+
+
+@pytest.mark.parametrize("weight, width", [
+    (0.25, 0.63),     # 0.625 is a tie: Math.round goes up, Python's round() would give 0.62
+    (0.75, 0.88),     # 0.875 likewise
+    (-2.75, -0.87),   # -0.875: ties go toward +infinity, round() would give -0.88
+    (1.0, 1),         # whole numbers come back as int, like JSON numbers in TS
+    (20, 4),          # clamped to max
+])
+def test_affine_rounds_like_math_round(weight, width):
+    value = payload_codec.derive(WIDTH, {"weight": weight})
+    assert value == width and type(value) is type(width)
+
+
+@pytest.mark.parametrize("score, label", [(3.49, "crisis"), (3.5, "atencion"), (4.0, "fortaleza")])
+def test_bins_include_the_threshold(score, label):
+    assert payload_codec.derive(SEGMENT, {"score": score}) == label
+
+
+def test_lookup_and_missing_source():
+    rule = {"rule": "lookup", "key": "sentiment", "table": {"positive": "#22c55e"}}
+    assert payload_codec.derive(rule, {"sentiment": "positive"}) == "#22c55e"
+    assert payload_codec.derive(rule, {"sentiment": 1}) is None
+    assert payload_codec.derive(WIDTH, {"weight": True}) is None
+
+
+def clustering_doc():
+    return {
+        "nodes": [
+            {"id": "P1", "type": "participant", "profile": "promotor", "department": "ops", "color": "#1",
+             "border_color": "#a", "comment_count": 2, "size": 16},
+            {"id": "P2", "type": "participant", "profile": "promotor", "department": "ops", "color": "#1",
+             "border_color": "#a", "comment_count": 9, "size": 30},
+            {"id": "T1", "type": "theme", "sentiment": "positive", "color": "#22c55e"},
+        ],
+        "edges": [
+            {"id": "e1", "type": "participant_participant", "source": "P1", "target": "P2", "weight": 0.25,
+             "sentiment": "positive", "color": "#22c55e", "width": 0.63},
+            {"id": "e2", "type": "participant_participant", "source": "P2", "target": "P1", "weight": 0.25,
+             "sentiment": "positive", "color": "#22c55e", "width": 0.62},
+        ],
+    }
+
+
+def test_encode_drops_only_what_decode_restores():
+    doc = clustering_doc()
+    encoded = payload_codec.encode_document("clustering_data.json", copy.deepcopy(doc))
+    assert payload_codec.is_encoded(encoded)
+    e1, e2 = encoded["edges"]
+    assert "width" not in e1 and e2["width"] == 0.62      # half-up 0.63 is derivable, 0.62 is not
+    assert "size" not in encoded["nodes"][0] and "size" not in encoded["nodes"][1]
+    assert payload_codec.decode_document(encoded) == doc
+
+
+def test_string_table_round_trip():
+    doc = clustering_doc()
+    encoded = payload_codec.encode_document("clustering_data.json", copy.deepcopy(doc))
+    header = encoded[payload_codec.HEADER_KEY]
+    assert "sentiment" in header["string_keys"]
+    assert isinstance(encoded["edges"][0]["sentiment"], int)
+    assert payload_codec.loads(payload_codec.dumps(encoded)) == doc
+
+
+def test_plain_documents_pass_through():
+    doc = {"generated_at": "2026-01-01"}
+    assert payload_codec.decode_document(doc) is doc
+    assert payload_codec.encode_document("no_rules_for_this.json", doc) is doc
+
+
+def test_newer_version_is_rejected():
+    doc = {payload_codec.HEADER_KEY: {"version": payload_codec.CODEC_VERSION + 1, "derived": [],
+                                      "strings": [], "string_keys": []}}
+    with pytest.raises(ValueError):
+        payload_codec.decode_document(doc)
@@ -0,0 +1,67 @@
+import pytest
+
+import tenant_pack
+
+
+@pytest.fixture
+def pack_path(tmp_path):
+    return tenant_pack.fanout_path(tmp_path, "acme")
+
+
+def write(path, docs, mode="w"):
+    pack = tenant_pack.open_pack(path, mode)
+    for name, data in docs.items():
+        tenant_pack.add_document(pack, name, data)
+    return tenant_pack.close_pack(pack)
+
+
+def test_round_trip(pack_path):
+    docs = {"clima_v2_data.json": b'{"years": {}}', "text_analysis/comments_0000.json": b"[]", "empty.json": b""}
+    index = write(pack_path, docs)
+    assert tenant_pack.read_index(pack_path) == index
+    for name, data in docs.items():
+        assert tenant_pack.read_document(pack_path, name) == data
+    with pytest.raises(KeyError):
+        tenant_pack.read_document(pack_path, "missing.json")
+
+
+def test_fanout_path_is_stable(tmp_path):
+    path = tenant_pack.fanout_path(tmp_path, "acme")
+    assert path == tenant_pack.fanout_path(tmp_path, "acme")
+    assert path.name == "acme.pack" and len(path.relative_to(tmp_path).parts) == 3
+
+
+def test_append_replaces_and_keeps_documents(pack_path):
+    write(pack_path, {"a.json": b"old", "b.json": b"bee"})
+    write(pack_path, {"a.json": b"new", "c.json": b"sea"}, mode="a")
+    assert {name: tenant_pack.read_document(pack_path, name) for name in ("a.json", "b.json", "c.json")} == \
+        {"a.json": b"new", "b.json": b"bee", "c.json": b"sea"}
+
+
+def test_torn_append_recovers_last_index(pack_path):
+    write(pack_path, {"a.json": b"alpha"})
+    pack = tenant_pack.open_pack(pack_path, "a")
+    tenant_pack.add_document(pack, "b.json", b"never indexed")
+    pack["file"].close()                                   # writer died before close_pack
+    with pytest.raises(ValueError):
+        tenant_pack.read_index(pack_path)
+
+    write(pack_path, {"c.json": b"gamma"}, mode="a")
+    assert set(tenant_pack.read_index(pack_path)) == {"a.json", "c.json"}
+    assert tenant_pack.read_document(pack_path, "a.json") == b"alpha"
+    assert tenant_pack.read_document(pack_path, "c.json") == b"gamma"
+
+
+def test_export_tree(pack_path, tmp_path):
+    docs = {"x.json": b"1", "cube/olap_cube.bin": b"\x00\x01"}
+    write(pack_path, docs)
+    out = tmp_path / "tree"
+    assert tenant_pack.export_tree(pack_path, out) == 2
+    assert {name: (out / name).read_bytes() for name in docs} == docs
+
+
+def test_rejects_non_pack(tmp_path):
+    path = tmp_path / "junk.pack"
+    path.write_bytes(b"not a pack at all, just some bytes")
+    with pytest.raises(ValueError):
+        tenant_pack.read_index(path)
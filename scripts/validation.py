@@ -0,0 +1,485 @@
+"""
+In-memory validation of generated documents, before anything is written.
+
+Schemas mirror the interfaces in src/types and are written as plain Python
+literals:
+
+    str / int / bool / NUM          NUM is any non-bool int or float (TS number)
+    {"key": spec, "opt?": spec}     object; extra keys are allowed, as in TS
+    [spec]                          array
+    enum("a", "b")                  string literal union
+    record(spec)                    Record<string, spec>
+    nullable(spec)                  spec | null
+    tagged("type", {tag: spec})     discriminated union (ClusterNode)
+    ANY                             not checked
+
+Each schema is compiled once per process into nested closures, so checking a
+document is one walk with no spec interpretation. Invariants then check the
+numbers a document restates about itself (demographic counts summing to
+sample_n, engagement profiles summing to the respondent count, ranks being
+1..n, summary counts matching the lists they summarize, ...).
+
+regenerate_all_data.py stages a tenant's writes, runs validate_tenant on the
+in-memory objects inside the worker, and only writes the tenant if there are
+no errors.
+"""
+
+NUM = "number"
+ANY = "any"
+MAX_ERRORS = 20            # per document; the rest are counted, not listed
+PCT_TOLERANCE = 0.6        # rounded percentages may sum to 100 ± this
+
+
+def enum(*values):
+    return ("enum", frozenset(values))
+
+
+def record(spec):
+    return ("record", spec)
+
+
+def nullable(spec):
+    return ("nullable", spec)
+
+
+def tagged(key, variants):
+    return ("tagged", key, variants)
+
+
+# ─── Schemas (src/types) ─────────────────────────────────────────────────────
+
+SENTIMENT = enum("positive", "neutral", "negative")
+SENTIMENT_MIXED = enum("positive", "neutral", "negative", "mixed")
+PROFILE = enum("Embajadores", "Comprometidos Pragmáticos", "Neutrales", "Desvinculados")
+TREND = enum("up", "down", "stable")
+MEDAL = enum("gold", "silver", "bronze", "none")
+RANK_TREND = enum("up", "down", "stable", "new")
+SEGMENT = enum("fortaleza_excepcional", "fortaleza_solida", "aceptable", "atencion", "crisis")
+
+# clima-v2.ts
+DIMENSION_STAT = {
+    "dimension_code": str, "dimension_name": str, "year": int, "avg_score": NUM, "std_score": NUM,
+    "favorability_pct": NUM, "segment": SEGMENT, "item_count": int, "respondent_count": int,
+    "benchmark": NUM, "gap_vs_benchmark": NUM, "rank": int,
+    "percentile_rank?": NUM, "benchmark_scope?": enum("industry", "all", "template"), "benchmark_peers?": int,
+}
+CLIMA = {
+    "generated_at": str, "model_version": str,
+    "years": record({
+        "year": int, "respondent_count": int, "dimensions": [DIMENSION_STAT],
+        "engagement?": {"engagement_score": NUM, "engagement_pct": NUM, "respondent_count": int,
+                        "profiles": record({"n": int, "pct": NUM})},
+    }),
+}
+
+# demographics.ts
+EVALUATED_ITEM = {"item": str, "question": str, "avg_score": NUM, "favorability": NUM, "n": int}
+DEMOGRAPHICS = {
+    "generated_at": str, "model_version": str,
+    "years": record({
+        "year": int,
+        "ficha_tecnica": {"population_n": int, "sample_n": int, "response_rate": NUM, "margin_of_error": NUM,
+                          "confidence_level": NUM},
+        "demographics": {"departments": record(int), "genders": record(int), "tenures": record(int),
+                         "generations": record(int)},
+        "enps": {"enps": NUM},
+        "top_5_items": [EVALUATED_ITEM], "bottom_5_items": [EVALUATED_ITEM],
+    }),
+}
+
+# segmentation.ts
+SEGMENT_STATS = {
+    "segment_id": str, "segment_name": str, "segment_type": enum("department", "tenure", "gender"),
+    "respondent_count": int, "engagement_score": NUM, "engagement_pct": NUM,
+    "dimensions": [{"dimension_code": str, "dimension_name": str, "avg_score": NUM, "favorability_pct": NUM,
+                    "gap_vs_global": NUM}],
+}
+SEGMENTATION = {
+    "generated_at": str, "global_engagement": NUM, "global_score": NUM, "total_respondents": int,
+    "by_department": [SEGMENT_STATS], "by_tenure": [SEGMENT_STATS], "by_gender": [SEGMENT_STATS],
+    "by_hierarchy": [SEGMENT_STATS], "by_location": [SEGMENT_STATS],
+    # Raw shape; useRiskGroups() maps it onto RiskGroup
+    "risk_groups": [{"group_name": str, "description": str, "count": int, "percentage": NUM, "avg_engagement": NUM,
+                     "key_factors": [str]}],
+    # Dense form; the segmentation hook expands it into HeatmapData cells
+    "heatmap": {"departments": [str], "department_keys": [str], "dimensions": [str], "dimension_keys": [str],
+                "scores": [[nullable(NUM)]],
+                "segment_bins": {"thresholds": [NUM], "labels": [SEGMENT]}},
+    "org_tree?": {"min_n": int, "dimension_codes": [str],
+                  "levels": [{"level": int, "name": str, "path": str, "node_count": int, "suppressed_count": int}]},
+}
+ORG_LEVEL = {
+    "level": int, "name": str, "dimension_codes": [str],
+    "nodes": [{"node_id": str, "name": str, "parent_id": nullable(str), "respondent_count": int,
+               "suppressed": bool, "scores": nullable([nullable(NUM)]), "gap_vs_global": nullable([nullable(NUM)])}],
+}
+
+# predictions.ts
+PREDICTIONS = {
+    "rotation_risk": {
+        "overall_index": NUM, "trend": TREND,
+        "risk_factors": [{"id": str, "factor": str, "impact_score": NUM, "affected_percentage": NUM, "dimension": str}],
+        "high_risk_areas": [{"area": str, "risk_level": NUM, "engagement_score": NUM, "headcount": int,
+                             "key_issues": [str]}],
+        "engagement_rotation_correlation": [{"engagement": NUM, "rotation": NUM}],
+    },
+    "projections": {
+        "overall": {"current_score": NUM, "historical": [{"month": str, "score": NUM}],
+                    "forecast": [{"month": str, "optimistic": NUM, "expected": NUM, "pessimistic": NUM}]},
+        "by_dimension": [{"dimension": str, "label": str, "current_score": NUM, "projected_6m": NUM,
+                          "projected_12m": NUM, "trend": TREND, "change_rate": NUM, "confidence?": NUM}],
+        "by_department?": {"departments": [str], "dimension_codes": [str], "current": [[nullable(NUM)]],
+                           "projected_6m": [[nullable(NUM)]], "projected_12m": [[nullable(NUM)]],
+                           "trend": [[TREND]]},
+    },
+    "early_alerts": [{
+        "id": str, "dimension": str, "label": str, "severity": enum("high", "medium", "low"),
+        "current_score": NUM, "previous_score": NUM, "change": NUM,
+        "change_velocity": enum("rapid", "moderate", "slow"), "months_declining": int,
+        "trend_data": [{"month": str, "score": NUM}], "recommendation": str, "affected_areas": [str],
+        "created_at": str, "is_new": bool,
+    }],
+    "summary": {"total_alerts": int, "new_alerts": int, "high_severity_alerts": int, "dimensions_improving": int,
+                "dimensions_declining": int, "overall_trend": TREND, "last_updated": str},
+}
+
+# correlations.ts
+CORRELATIONS = {
+    "generated_at": str,
+    "dimensions": [{"code": str, "name": str, "short": str}],
+    "correlation_matrix": [[NUM]],
+    "business_indicators": {"indicators": [{"code": str, "name": str}], "monthly_data": [ANY],
+                            "correlations_with_dimensions": [ANY]},
+    "engagement_drivers": [{"dimension": str, "name": str, "correlation": NUM}],
+    "scatter_data": {"dimension_scores": [ANY], "months": [str]},
+    "insights": ANY,
+    "detailed_correlations?": [{
+        "dim1": str, "dim2": str, "dim1_name": str, "dim2_name": str, "r": NUM, "adjusted_r": NUM,
+        "partial_r": NUM, "spearman": NUM, "p_value": NUM, "r_squared": NUM, "ci_lower": NUM, "ci_upper": NUM,
+        "effect_size": str, "n": int, "is_significant": bool,
+    }],
+}
+
+# clustering.ts
+BASE_NODE = {"id": str, "label": str, "color": str, "size": NUM, "sentiment": SENTIMENT_MIXED,
+             "sentiment_score": NUM}
+DEPARTMENT_DISTRIBUTION = [{"department": str, "count": int}]
+CLUSTERING = {
+    "generated_at": str, "source": str, "total_comments_processed": int,
+    "nodes": [tagged("type", {
+        "participant": {**BASE_NODE, "department": str, "department_name": str, "profile": PROFILE,
+                        "comment_count": int, "themes": [str], "theme_count": int, "comment_ids": [str]},
+        "theme": {**BASE_NODE, "theme_id": str, "frequency": NUM, "keywords": [str], "dimensions": [str],
+                  "participant_count": int},
+    })],
+    "edges": [{"id": str, "source": str, "target": str, "type": enum("participant_theme", "participant_participant"),
+               "weight": NUM, "sentiment": SENTIMENT_MIXED, "color": str, "width": NUM}],
+    "metrics": {"total_nodes": int, "participant_count": int, "theme_count": int, "total_edges": int,
+                "participant_edges": int, "theme_edges": int, "density": NUM, "avg_degree": NUM, "max_degree": NUM,
+                "influencers": [ANY], "bridges": [ANY], "isolated_count": int, "isolated_participants": [ANY],
+                "department_distribution": DEPARTMENT_DISTRIBUTION,
+                "profile_distribution": [{"profile": PROFILE, "count": int, "color": str}]},
+    "clusters": [{"id": str, "name": str, "keywords": [str], "sentiment": SENTIMENT_MIXED, "sentiment_score": NUM,
+                  "participant_count": int, "department_distribution": DEPARTMENT_DISTRIBUTION,
+                  "dimensions": [str], "recommendations": [str]}],
+    "filters": {"departments": [ANY], "profiles": [ANY], "sentiments": [ANY], "themes": [ANY]},
+}
+
+# recognition.ts
+BADGE = {"id": str, "name": str, "description": str, "icon": str, "color": str}
+AREA_RANKING = {"area": str, "engagement": NUM, "respondents": int, "dimensions": record(NUM), "medal": MEDAL,
+                "rank": int, "change": NUM, "trend": RANK_TREND, "badges": [BADGE]}
+RECOGNITION = {
+    "generated_at": str, "rankings": [AREA_RANKING], "podium": [AREA_RANKING],
+    "area_of_month": nullable({"current": {"area": str, "improvement": NUM, "month": str},
+                               "history": [{"month": str, "area": str, "improvement": NUM}]}),
+    "goals_progress": [{"dimension": str, "name": str, "current": NUM, "target": NUM, "progress": NUM,
+                        "status": enum("achieved", "on_track", "needs_attention", "at_risk", "critical"),
+                        "deadline": str}],
+    "achievements": [{"id": str, "type": enum("milestone", "improvement", "dimension", "streak"), "icon": str,
+                      "message": str, "area": str, "value": NUM, "date": str}],
+    "summary": {"total_areas": int, "gold_medals": int, "silver_medals": int, "bronze_medals": int,
+                "average_engagement": NUM, "goals_on_track": int, "goals_at_risk": int},
+    "periods?": [{"period": str, "month": str, "interpolated": bool,
+                  "rankings": [{"area": str, "rank": int, "engagement": NUM, "medal": MEDAL, "change": NUM,
+                                "trend": RANK_TREND, "badges": [str]}]}],
+    "badge_definitions?": [BADGE],
+}
+
+# text-analysis.ts
+COMMENT = {"id": str, "text": str, "dimension": str, "department": str, "sentiment": SENTIMENT,
+           "sentiment_score": NUM, "date": str, "themes": [str]}
+TEXT_ANALYSIS = {
+    "generated_at": str, "total_comments": int,
+    "comments?": [COMMENT],
+    "comment_shards?": {"page_size": int, "total": int, "index?": str,
+                        "pages": [{"index": int, "path": str, "offset": int, "count": int, "first_id": str,
+                                   "last_id": str}]},
+    "word_frequencies": [{"word": str, "count": int, "sentiment": SENTIMENT}],
+    "themes": [{"id": str, "name": str, "frequency": NUM, "sentiment": SENTIMENT_MIXED, "sentiment_score": NUM,
+                "dimensions": [str], "keywords": [str], "example_comments": [str]}],
+    "sentiment_summary": {"positive": int, "neutral": int, "negative": int, "total": int},
+    "sentiment_trend": [{"month": str, "positive": int, "neutral": int, "negative": int, "avg_score": NUM}],
+    "word_cloud?": {"hash": str, "light": str, "dark": str},
+}
+
+# unified-analysis.ts
+KEYWORDS = [{"word": str, "count": int, "frequency": NUM}]
+UNIFIED = {
+    "generated_at": str, "model_version": str, "years_analyzed": [int],
+    "keyword_analysis": record(record({"column_name": str, "response_count": int, "keywords": KEYWORDS})),
+    "historical_trends": {
+        "global_engagement": [{"year": int, "engagement_score": NUM, "engagement_pct": NUM, "respondent_count": int}],
+        "by_dimension": record({"name": str, "data": [{"year": int, "score": NUM, "favorability": NUM,
+                                                       "segment": str}]}),
+    },
+    "year_comparison": [{"dimension_code": str, "dimension_name": str}],
+}
+
+SCHEMAS = {
+    "clima_v2_data.json": CLIMA,
+    "clima_demographics.json": DEMOGRAPHICS,
+    "segmentation_data.json": SEGMENTATION,
+    "predictions_data.json": PREDICTIONS,
+    "correlations_data.json": CORRELATIONS,
+    "clustering_data.json": CLUSTERING,
+    "recognition_data.json": RECOGNITION,
+    "text_analysis_data.json": TEXT_ANALYSIS,
+    "unified_analysis.json": UNIFIED,
+    "comments": [COMMENT],          # the full comment list, before it is split into pages
+    "org_level": ORG_LEVEL,         # segmentation/org_level_*.json
+}
+
+
+# ─── Compiler ────────────────────────────────────────────────────────────────
+
+def _type_name(value):
+    return "null" if value is None else type(value).__name__
+
+
+def compile_schema(spec):
+    """check(value, path, errors) for a spec; errors is a list of "path: message" strings."""
+    if spec is ANY:
+        return lambda value, path, errors: None
+    if spec is NUM:
+        def check_num(value, path, errors):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors.append(f"{path}: expected number, got {_type_name(value)}")
+        return check_num
+    if spec is int:
+        def check_int(value, path, errors):
+            if isinstance(value, bool) or not isinstance(value, int):
+                # Whole floats (e.g. 12.0) pass: TS has one number type
+                if not (isinstance(value, float) and value.is_integer()):
+                    errors.append(f"{path}: expected integer, got {_type_name(value)}")
+        return check_int
+    if spec in (str, bool):
+        name = spec.__name__
+        def check_type(value, path, errors):
+            if type(value) is not spec:
+                errors.append(f"{path}: expected {name}, got {_type_name(value)}")
+        return check_type
+    if isinstance(spec, list):
+        item = compile_schema(spec[0])
+        def check_list(value, path, errors):
+            if not isinstance(value, list):
+                errors.append(f"{path}: expected array, got {_type_name(value)}")
+                return
+            for i, v in enumerate(value):
+                item(v, f"{path}[{i}]", errors)
+        return check_list
+    if isinstance(spec, dict):
+        fields = [(key.rstrip("?"), key.endswith("?"), compile_schema(sub)) for key, sub in spec.items()]
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append(f"{path}: expected object, got {_type_name(value)}")
+                return
+            for key, optional, check in fields:
+                if key in value:
+                    check(value[key], f"{path}.{key}", errors)
+                elif not optional:
+                    errors.append(f"{path}: missing {key}")
+        return check_object
+    kind = spec[0]
+    if kind == "enum":
+        allowed = spec[1]
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{path}: {value!r} is not one of {sorted(allowed)}")
+        return check_enum
+    if kind == "record":
+        item = compile_schema(spec[1])
+        def check_record(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append(f"{path}: expected object, got {_type_name(value)}")
+                return
+            for k, v in value.items():
+                item(v, f"{path}.{k}", errors)
+        return check_record
+    if kind == "nullable":
+        inner = compile_schema(spec[1])
+        return lambda value, path, errors: None if value is None else inner(value, path, errors)
+    if kind == "tagged":
+        key, variants = spec[1], {tag: compile_schema(sub) for tag, sub in spec[2].items()}
+        def check_tagged(value, path, errors):
+            check = variants.get(value.get(key)) if isinstance(value, dict) else None
+            if check is None:
+                errors.append(f"{path}.{key}: expected one of {sorted(variants)}")
+            else:
+                check(value, path, errors)
+        return check_tagged
+    raise ValueError(f"unknown schema spec {spec!r}")
+
+
+_compiled = {}
+
+
+def validate_document(name, data):
+    """Schema errors for one document (empty list when it conforms)."""
+    if name not in _compiled:
+        _compiled[name] = compile_schema(SCHEMAS[name])
+    errors = []
+    _compiled[name](data, "$", errors)
+    return errors
+
+
+# ─── Invariants ──────────────────────────────────────────────────────────────
+
+def _ranks_ok(ranks):
+    return sorted(ranks) == list(range(1, len(ranks) + 1))
+
+
+def clima_invariants(clima):
+    for year, yd in clima["years"].items():
+        dims = yd["dimensions"]
+        if not _ranks_ok([d["rank"] for d in dims]):
+            yield f"{year}: dimension ranks are not 1..{len(dims)}"
+        for d in dims:
+            if not 1.0 <= d["avg_score"] <= 5.0:
+                yield f"{year}.{d['dimension_code']}: avg_score {d['avg_score']} outside 1-5"
+            if not 0.0 <= d["favorability_pct"] <= 100.0:
+                yield f"{year}.{d['dimension_code']}: favorability_pct {d['favorability_pct']} outside 0-100"
+        eng = yd.get("engagement")
+        if eng:
+            profiles = eng["profiles"].values()
+            if sum(p["n"] for p in profiles) != eng["respondent_count"]:
+                yield f"{year}: engagement profile counts do not sum to respondent_count {eng['respondent_count']}"
+            if abs(sum(p["pct"] for p in profiles) - 100) > PCT_TOLERANCE:
+                yield f"{year}: engagement profile percentages do not sum to 100"
+
+
+def demographics_invariants(demo):
+    for year, yd in demo["years"].items():
+        sample_n = yd["ficha_tecnica"]["sample_n"]
+        if sample_n > yd["ficha_tecnica"]["population_n"]:
+            yield f"{year}: sample_n {sample_n} exceeds population_n"
+        for category, counts in yd["demographics"].items():
+            if counts and sum(counts.values()) != sample_n:
+                yield f"{year}: {category} counts sum to {sum(counts.values())}, not sample_n {sample_n}"
+
+
+def segmentation_invariants(seg):
+    for key in ("by_department", "by_tenure", "by_gender"):
+        if seg[key] and sum(s["respondent_count"] for s in seg[key]) != seg["total_respondents"]:
+            yield f"{key}: respondent counts do not sum to total_respondents {seg['total_respondents']}"
+
+
+def predictions_invariants(pred):
+    alerts, summary = pred["early_alerts"], pred["summary"]
+    if summary["total_alerts"] != len(alerts):
+        yield f"summary.total_alerts {summary['total_alerts']} != {len(alerts)} early alerts"
+    high = sum(1 for a in alerts if a["severity"] == "high")
+    if summary["high_severity_alerts"] != high:
+        yield f"summary.high_severity_alerts {summary['high_severity_alerts']} != {high}"
+
+
+def correlations_invariants(corr):
+    n, matrix = len(corr["dimensions"]), corr["correlation_matrix"]
+    if len(matrix) != n or any(len(row) != n for row in matrix):
+        yield f"correlation_matrix is not {n}×{n}"
+        return
+    for i in range(n):
+        if abs(matrix[i][i] - 1.0) > 1e-6:
+            yield f"correlation_matrix[{i}][{i}] is {matrix[i][i]}, not 1"
+        for j in range(i):
+            if abs(matrix[i][j] - matrix[j][i]) > 1e-6:
+                yield f"correlation_matrix is not symmetric at [{i}][{j}]"
+                return
+
+
+def clustering_invariants(clust):
+    nodes, edges, metrics = clust["nodes"], clust["edges"], clust["metrics"]
+    ids = {n["id"] for n in nodes}
+    if metrics["total_nodes"] != len(nodes):
+        yield f"metrics.total_nodes {metrics['total_nodes']} != {len(nodes)} nodes"
+    if metrics["total_edges"] != len(edges):
+        yield f"metrics.total_edges {metrics['total_edges']} != {len(edges)} edges"
+    dangling = sum(1 for e in edges if e["source"] not in ids or e["target"] not in ids)
+    if dangling:
+        yield f"{dangling} edges reference missing nodes"
+
+
+def recognition_invariants(recog):
+    rankings, summary = recog["rankings"], recog["summary"]
+    if not _ranks_ok([r["rank"] for r in rankings]):
+        yield f"rankings: ranks are not 1..{len(rankings)}"
+    if summary["total_areas"] != len(rankings):
+        yield f"summary.total_areas {summary['total_areas']} != {len(rankings)} rankings"
+    for medal in ("gold", "silver", "bronze"):
+        n = sum(1 for r in rankings if r["medal"] == medal)
+        if summary[f"{medal}_medals"] != n:
+            yield f"summary.{medal}_medals {summary[f'{medal}_medals']} != {n}"
+    for period in recog.get("periods", []):
+        if not _ranks_ok([r["rank"] for r in period["rankings"]]):
+            yield f"periods.{period['period']}: ranks are not 1..{len(period['rankings'])}"
+
+
+def text_invariants(text):
+    # total_comments is the organisation-wide count; the summary and pages cover the shipped sample
+    summary, total = text["sentiment_summary"], text["total_comments"]
+    if summary["positive"] + summary["neutral"] + summary["negative"] != summary["total"]:
+        yield "sentiment_summary: positive + neutral + negative != total"
+    if summary["total"] > total:
+        yield f"sentiment_summary.total {summary['total']} exceeds total_comments {total}"
+    shards = text.get("comment_shards")
+    if shards and not shards["total"] == sum(p["count"] for p in shards["pages"]) == summary["total"]:
+        yield f"comment_shards do not add up to sentiment_summary.total {summary['total']}"
+
+
+INVARIANTS = {
+    "clima_v2_data.json": clima_invariants,
+    "clima_demographics.json": demographics_invariants,
+    "segmentation_data.json": segmentation_invariants,
+    "predictions_data.json": predictions_invariants,
+    "correlations_data.json": correlations_invariants,
+    "clustering_data.json": clustering_invariants,
+    "recognition_data.json": recognition_invariants,
+    "text_analysis_data.json": text_invariants,
+}
+
+
+def validate_tenant(docs):
+    """{document name: [errors]} for every failing document; empty when the tenant is valid.
+
+    docs maps SCHEMAS names to in-memory objects; "org_level" may be a list
+    of level documents. Invariants only run on documents that match their
+    schema, so they can index fields without guarding.
+    """
+    failures = {}
+    for name, data in docs.items():
+        items = data if name == "org_level" else [data]
+        errors = []
+        for item in items:
+            errors += validate_document(name, item)
+        if not errors and name in INVARIANTS:
+            errors = list(INVARIANTS[name](data))
+        if errors:
+            extra = len(errors) - MAX_ERRORS
+            failures[name] = errors[:MAX_ERRORS] + ([f"... and {extra} more"] if extra > 0 else [])
+    return failures
+
+
+def leftover_template_refs(data, markers=(b"towerbank", b'"tower"')):
+    """Template company names still present in serialized bytes (case-insensitive)."""
+    lowered = data.lower()
+    return [m.decode() for m in markers if m in lowered]
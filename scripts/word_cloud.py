@@ -0,0 +1,181 @@
+"""
+Per-tenant word clouds: deterministic spiral packing over an occupancy grid.
+
+Every tenant used to share public/images/wordcloud.png. This stage renders
+a light and a dark cloud from each tenant's ``word_frequencies``:
+
+- words are placed largest first, each at the first free spot along an
+  Archimedean spiral out from the centre; there is no randomness, so the
+  same table always gives the same image
+- the canvas is a boolean occupancy grid of CELL-pixel cells; for each word
+  a summed-area table of the grid is built once, and every spiral candidate
+  is tested in one vectorized pass (four lookups per candidate rectangle)
+  instead of checking the word against every placed word
+- images are SVG (text boxes are estimated from the font size, with
+  padding), so no imaging library is needed and the browser does the
+  typesetting
+
+Images are cached under a hash of the frequency table (plus LAYOUT_VERSION),
+``<cache>/ab/<hash>-light.svg``; a tenant whose frequencies did not change
+is copied from the cache, never laid out again.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+LAYOUT_VERSION = 1         # bump when layout or rendering changes, to invalidate the cache
+WIDTH, HEIGHT = 1200, 600
+CELL = 4                   # occupancy grid resolution in pixels
+MIN_FONT, MAX_FONT = 14, 96
+CHAR_WIDTH = 0.58          # average glyph advance as a fraction of the font size
+LINE_HEIGHT = 1.1
+PADDING = 1                # free cells kept around every word
+SPIRAL_PITCH = 0.5         # cells the spiral moves outward per radian (~3 cells between turns)
+FILL_RATIO = 0.45          # target share of the canvas covered by word boxes
+FONT_FAMILY = "Inter, 'Segoe UI', Helvetica, Arial, sans-serif"
+THEMES = {
+    "light": {"background": "#FFFFFF",
+              "colors": {"positive": "#16A34A", "neutral": "#64748B", "negative": "#DC2626", "mixed": "#D97706"}},
+    "dark": {"background": "#1E293B",
+             "colors": {"positive": "#4ADE80", "neutral": "#CBD5E1", "negative": "#F87171", "mixed": "#FBBF24"}},
+}
+IMAGE_FILES = {"light": "wordcloud.svg", "dark": "wordcloud-dark.svg"}
+
+
+def frequency_hash(word_frequencies):
+    """Stable hash of the table (word, count, sentiment), order-independent."""
+    rows = sorted((w["word"], w["count"], w.get("sentiment", "neutral")) for w in word_frequencies)
+    raw = json.dumps([LAYOUT_VERSION, WIDTH, HEIGHT, rows], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# ─── Layout ──────────────────────────────────────────────────────────────────
+
+def spiral_offsets(rows, cols):
+    """(dy, dx) cell offsets along the spiral, centre first, wide enough to cover the canvas."""
+    max_r = np.hypot(rows, cols) / 2
+    # Arc length of r = pitch·t is ~pitch·t²/2, so t = sqrt(2s / pitch) samples about one cell apart
+    t_max = max_r / SPIRAL_PITCH
+    t = np.sqrt(2.0 * np.arange(int(SPIRAL_PITCH * t_max ** 2 / 2) + 1) / SPIRAL_PITCH)
+    r = SPIRAL_PITCH * t
+    # Stretch horizontally so the cloud follows the canvas aspect ratio
+    dx = np.round(r * np.cos(t) * cols / rows).astype(np.int64)
+    dy = np.round(r * np.sin(t)).astype(np.int64)
+    offsets = np.stack([dy, dx], axis=1)
+    _, first = np.unique(offsets, axis=0, return_index=True)
+    return offsets[np.sort(first)]
+
+
+def font_sizes(words, width=WIDTH, height=HEIGHT):
+    """Font size per word, by square root of the count so big words do not crowd out the rest.
+
+    Sizes are then scaled down (never below MIN_FONT) until the estimated
+    text area fits FILL_RATIO of the canvas.
+    """
+    counts = np.sqrt(np.asarray([w["count"] for w in words], dtype=np.float64))
+    lengths = np.asarray([len(w["word"]) for w in words], dtype=np.float64)
+    lo, hi = counts.min(), counts.max()
+    scale = (counts - lo) / (hi - lo) if hi > lo else np.ones_like(counts)
+    sizes = MIN_FONT + scale * (MAX_FONT - MIN_FONT)
+    area = (lengths * CHAR_WIDTH * LINE_HEIGHT * sizes ** 2).sum()
+    shrink = min(1.0, np.sqrt(FILL_RATIO * width * height / area))
+    return np.round(np.maximum(MIN_FONT, sizes * shrink)).astype(np.int64)
+
+
+def box_cells(word, size):
+    """(height, width) in cells, padding included."""
+    w = int(np.ceil(len(word) * size * CHAR_WIDTH / CELL)) + 2 * PADDING
+    h = int(np.ceil(size * LINE_HEIGHT / CELL)) + 2 * PADDING
+    return h, w
+
+
+def place(grid, offsets, h, w):
+    """Top-left (row, col) of the first free h×w box along the spiral, or None."""
+    rows, cols = grid.shape
+    top = offsets[:, 0] + (rows - h) // 2
+    left = offsets[:, 1] + (cols - w) // 2
+    inside = (top >= 0) & (left >= 0) & (top + h <= rows) & (left + w <= cols)
+    top, left = top[inside], left[inside]
+    if not len(top):
+        return None
+    # Summed-area table with a zero border: box sum = S[b, r] - S[t, r] - S[b, l] + S[t, l]
+    sat = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+    sat[1:, 1:] = grid.cumsum(0, dtype=np.int32).cumsum(1)
+    bottom, right = top + h, left + w
+    filled = sat[bottom, right] - sat[top, right] - sat[bottom, left] + sat[top, left]
+    free = np.flatnonzero(filled == 0)
+    if not len(free):
+        return None
+    return int(top[free[0]]), int(left[free[0]])
+
+
+def layout(word_frequencies, width=WIDTH, height=HEIGHT):
+    """Placed words as dicts (word, sentiment, size, x, y in pixels); words that do not fit are dropped."""
+    words = sorted(word_frequencies, key=lambda w: (-w["count"], w["word"]))
+    if not words:
+        return []
+    grid = np.zeros((height // CELL, width // CELL), dtype=bool)
+    offsets = spiral_offsets(*grid.shape)
+    placed = []
+    for entry, size in zip(words, font_sizes(words, width, height)):
+        size, spot = int(size), None
+        while size >= MIN_FONT:
+            h, w = box_cells(entry["word"], size)
+            spot = place(grid, offsets, h, w)
+            if spot is not None:
+                break
+            size = int(size * 0.8)  # no room at this size: try smaller before dropping the word
+        if spot is None:
+            continue
+        top, left = spot
+        grid[top + PADDING:top + h - PADDING, left + PADDING:left + w - PADDING] = True
+        placed.append({"word": entry["word"], "sentiment": entry.get("sentiment", "neutral"), "size": size,
+                       "x": (left + PADDING) * CELL, "y": (top + PADDING) * CELL})
+    return placed
+
+
+def render_svg(placed, theme, width=WIDTH, height=HEIGHT):
+    palette = THEMES[theme]
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+           f'width="{width}" height="{height}" role="img" aria-label="Nube de palabras">',
+           f'<rect width="100%" height="100%" fill="{palette["background"]}"/>',
+           f'<g font-family="{escape(FONT_FAMILY)}" font-weight="600">']
+    for p in placed:
+        color = palette["colors"].get(p["sentiment"], palette["colors"]["neutral"])
+        # y is the box top; the baseline sits at ~0.85 of the font size below it
+        baseline = p["y"] + round(p["size"] * 0.85)
+        out.append(f'<text x="{p["x"]}" y="{baseline}" font-size="{p["size"]}" fill="{color}">'
+                   f'{escape(p["word"])}</text>')
+    out.append("</g></svg>\n")
+    return "\n".join(out).encode("utf-8")
+
+
+# ─── Cache ───────────────────────────────────────────────────────────────────
+
+def _cache_path(cache_dir, digest, theme):
+    return Path(cache_dir) / digest[:2] / f"{digest}-{theme}.svg"
+
+
+def word_cloud_images(word_frequencies, cache_dir=None):
+    """(hash, {theme: svg bytes}, rendered?) — laid out only on a cache miss."""
+    digest = frequency_hash(word_frequencies)
+    if cache_dir is not None:
+        paths = {theme: _cache_path(cache_dir, digest, theme) for theme in THEMES}
+        if all(p.is_file() for p in paths.values()):
+            return digest, {theme: p.read_bytes() for theme, p in paths.items()}, False
+    placed = layout(word_frequencies)
+    images = {theme: render_svg(placed, theme) for theme in THEMES}
+    if cache_dir is not None:
+        for theme, data in images.items():
+            path = paths[theme]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Workers may render the same table at once: write aside, then rename
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+    return digest, images, True
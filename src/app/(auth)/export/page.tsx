@@ -15,6 +15,7 @@ import { Label } from "@/components/ui/label";
 import { AVAILABLE_YEARS, DASHBOARD_CONFIG } from "@/lib/constants";
 import { DIMENSION_LABELS_V2, type DimensionCodeV2 } from "@/types/clima-v2";
 import { useClimaDataV2 } from "@/hooks/use-clima-v2";
+import { useCompany } from "@/contexts/company-context";
 import { Download, FileSpreadsheet, FileText, Loader2 } from "lucide-react";
 
 type ExportFormat = "csv" | "json";
@@ -44,7 +45,7 @@ const scopeConfig: Record<ExportScope, { label: string; description: string }> =
     },
   };
 
-function downloadFile(content: string, filename: string, mimeType: string) {
+function downloadFile(content: BlobPart, filename: string, mimeType: string) {
   const blob = new Blob([content], { type: mimeType });
   const url = URL.createObjectURL(blob);
   const a = document.createElement("a");
@@ -79,9 +80,10 @@ export default function ExportPage() {
   const [isExporting, setIsExporting] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
+  const { companyId } = useCompany();
   const { data: climaData, isLoading: isLoadingData } = useClimaDataV2();
 
-  const handleExport = () => {
+  const handleExport = async () => {
     if (!climaData) {
       setError("No hay datos disponibles para exportar");
       return;
@@ -91,6 +93,24 @@ export default function ExportPage() {
     setError(null);
 
     try {
+      const timestamp = new Date().toISOString().split("T")[0];
+      const yearSuffix = year !== "all" ? `_${year}` : "_all";
+      const scopeSuffix = `_${scope}`;
+      const filename = `clima_v2${scopeSuffix}${yearSuffix}_${timestamp}.${formatConfig[format].extension}`;
+      const mimeType = format === "json" ? "application/json" : "text/csv";
+
+      // Exportación precalculada por el pipeline (exports/{scope}_{year}.{ext});
+      // si no existe (datos anteriores), se genera en el navegador
+      if (dimension === "all") {
+        const response = await fetch(
+          `/data/${companyId}/exports/${scope}_${year}.${formatConfig[format].extension}`
+        );
+        if (response.ok) {
+          downloadFile(await response.blob(), filename, mimeType);
+          return;
+        }
+      }
+
       // Filtrar por año
       const yearsToExport =
         year === "all"
@@ -151,19 +171,10 @@ export default function ExportPage() {
       }
 
       // Generar archivo
-      const timestamp = new Date().toISOString().split("T")[0];
-      const yearSuffix = year !== "all" ? `_${year}` : "_all";
-      const scopeSuffix = `_${scope}`;
-      const filename = `clima_v2${scopeSuffix}${yearSuffix}_${timestamp}.${formatConfig[format].extension}`;
-
       if (format === "json") {
-        downloadFile(
-          JSON.stringify(exportData, null, 2),
-          filename,
-          "application/json"
-        );
+        downloadFile(JSON.stringify(exportData, null, 2), filename, mimeType);
       } else {
-        downloadFile(convertToCSV(exportData), filename, "text/csv");
+        downloadFile(convertToCSV(exportData), filename, mimeType);
       }
     } catch (err) {
       setError(
@@ -13,7 +13,7 @@ import {
 import { cn } from "@/lib/utils";
 import type { Theme, Comment } from "@/types/text-analysis";
 import { SENTIMENT_COLORS, SENTIMENT_LABELS } from "@/types/text-analysis";
-import { useTextAnalysisData } from "@/hooks/use-text-analysis";
+import { useCommentsById } from "@/hooks/use-text-analysis";
 import {
   ChevronDown,
   Hash,
@@ -63,12 +63,8 @@ export function RecurringThemes({
 
 function ThemeCard({ theme }: { theme: Theme }) {
   const [isOpen, setIsOpen] = useState(false);
-  const { data: analysisData } = useTextAnalysisData();
-
-  const exampleComments =
-    analysisData?.comments?.filter((c) =>
-      theme.example_comments.includes(c.id)
-    ) || [];
+  // Example comments are fetched the first time the card is opened
+  const exampleComments = useCommentsById(theme.example_comments, isOpen);
 
   const getSentimentIcon = () => {
     if (theme.sentiment === "positive" || theme.sentiment_score > 0.3) {
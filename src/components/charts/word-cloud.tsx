@@ -16,6 +16,7 @@ import {
 import type { WordCloudWord, Comment } from "@/types/text-analysis";
 import { SENTIMENT_COLORS, SENTIMENT_LABELS } from "@/types/text-analysis";
 import { useCommentsByWord, useTextAnalysisData } from "@/hooks/use-text-analysis";
+import { useCompany } from "@/contexts/company-context";
 import { MessageSquare, RefreshCw } from "lucide-react";
 
 interface WordCloudProps {
@@ -32,6 +33,12 @@ export function WordCloud({
   const [selectedWord, setSelectedWord] = useState<string | null>(null);
   const comments = useCommentsByWord(selectedWord);
   const { data: analysisData } = useTextAnalysisData();
+  const { companyId } = useCompany();
+
+  // Imágenes propias del tenant si el pipeline las generó; si no, las compartidas
+  const cloud = analysisData?.word_cloud;
+  const lightSrc = cloud ? `/data/${companyId}/${cloud.light}?v=${cloud.hash}` : "/images/wordcloud.png";
+  const darkSrc = cloud ? `/data/${companyId}/${cloud.dark}?v=${cloud.hash}` : "/images/wordcloud-dark.png";
 
   // Lista de palabras para mostrar debajo de la imagen
   const topWords = data.slice(0, 10);
@@ -53,10 +60,10 @@ export function WordCloud({
             </div>
           ) : (
             <>
-              {/* Imagen generada por Python */}
+              {/* Imagen generada por Python (por tenant, ver scripts/word_cloud.py) */}
               <div className="relative w-full rounded-lg overflow-hidden bg-white dark:hidden">
                 <img
-                  src="/images/wordcloud.png"
+                  src={lightSrc}
                   alt="Nube de palabras"
                   className="w-full h-auto"
                   style={{ maxHeight: "500px", objectFit: "contain" }}
@@ -66,7 +73,7 @@ export function WordCloud({
               {/* Version dark mode */}
               <div className="relative w-full rounded-lg overflow-hidden hidden dark:block bg-slate-800">
                 <img
-                  src="/images/wordcloud-dark.png"
+                  src={darkSrc}
                   alt="Nube de palabras"
                   className="w-full h-auto"
                   style={{ maxHeight: "500px", objectFit: "contain" }}
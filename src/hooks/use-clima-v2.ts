@@ -3,6 +3,7 @@
 import { useQuery } from "@tanstack/react-query";
 import { QUERY_CONFIG, DASHBOARD_CONFIG } from "@/lib/constants";
 import { useCompany } from "@/contexts/company-context";
+import { decodePayload } from "@/lib/payload-codec";
 import type {
   ClimaDataV2,
   YearData,
@@ -29,7 +30,7 @@ export function useClimaDataV2() {
       if (!response.ok) {
         throw new Error(`Error cargando datos: ${response.status}`);
       }
-      return response.json();
+      return decodePayload<ClimaDataV2>(await response.json());
     },
     ...QUERY_CONFIG,
     staleTime: Infinity,
@@ -3,6 +3,7 @@
 import { useQuery } from "@tanstack/react-query";
 import { useMemo, useState, useCallback } from "react";
 import { useCompany } from "@/contexts/company-context";
+import { decodePayload } from "@/lib/payload-codec";
 import type {
   ClusteringData,
   ClusterNode,
@@ -31,7 +32,7 @@ export function useClusteringData() {
       if (!response.ok) {
         throw new Error("Failed to fetch clustering data");
       }
-      return response.json();
+      return decodePayload<ClusteringData>(await response.json());
     },
     staleTime: 5 * 60 * 1000,
   });
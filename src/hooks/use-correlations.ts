@@ -3,6 +3,7 @@
 import { useQuery } from "@tanstack/react-query";
 import { useMemo } from "react";
 import { useCompany } from "@/contexts/company-context";
+import { decodePayload } from "@/lib/payload-codec";
 import type {
   CorrelationsData,
   Dimension,
@@ -22,7 +23,7 @@ export function useCorrelationsData() {
       if (!response.ok) {
         throw new Error("Failed to fetch correlations data");
       }
-      return response.json();
+      return decodePayload<CorrelationsData>(await response.json());
     },
     staleTime: 5 * 60 * 1000,
   });
@@ -3,6 +3,7 @@
 import { useQuery } from "@tanstack/react-query";
 import { QUERY_CONFIG, DASHBOARD_CONFIG } from "@/lib/constants";
 import { useCompany } from "@/contexts/company-context";
+import { decodePayload } from "@/lib/payload-codec";
 import type {
   DemographicsJSON,
   YearDemographicsData,
@@ -29,7 +30,7 @@ export function useDemographicsData() {
       if (!response.ok) {
         throw new Error(`Error cargando datos demográficos: ${response.status}`);
       }
-      return response.json();
+      return decodePayload<DemographicsJSON>(await response.json());
     },
     ...QUERY_CONFIG,
     staleTime: Infinity,
@@ -2,6 +2,7 @@
 
 import { useQuery } from "@tanstack/react-query";
 import { useCompany } from "@/contexts/company-context";
+import { decodePayload } from "@/lib/payload-codec";
 import type {
   PredictionsData,
   RotationRisk,
@@ -23,7 +24,7 @@ export function usePredictionsData() {
       if (!response.ok) {
         throw new Error("Failed to fetch predictions data");
       }
-      return response.json();
+      return decodePayload<PredictionsData>(await response.json());
     },
     staleTime: 5 * 60 * 1000,
   });
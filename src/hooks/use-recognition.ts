@@ -3,13 +3,16 @@
 import { useQuery } from "@tanstack/react-query";
 import { useMemo } from "react";
 import { useCompany } from "@/contexts/company-context";
+import { decodePayload } from "@/lib/payload-codec";
 import type {
   RecognitionData,
   AreaRanking,
+  Badge,
   Achievement,
   GoalProgress,
   AreaOfMonth,
   RecognitionSummary,
+  RecognitionPeriod,
 } from "@/types/recognition";
 
 // Main hook for all recognition data
@@ -23,7 +26,7 @@ export function useRecognitionData() {
       if (!response.ok) {
         throw new Error("Failed to fetch recognition data");
       }
-      return response.json();
+      return decodePayload<RecognitionData>(await response.json());
     },
     staleTime: 5 * 60 * 1000,
   });
@@ -63,6 +66,35 @@ export function useAreaOfMonth() {
   };
 }
 
+// Hook for monthly ranking history (oldest first; empty for single-snapshot data)
+export function useRecognitionPeriods() {
+  const { data, isLoading, error } = useRecognitionData();
+
+  return {
+    data: data?.periods || ([] as RecognitionPeriod[]),
+    isLoading,
+    error,
+  };
+}
+
+// Hook for one period's rankings, resolving badge ids to full badges
+export function useRecognitionPeriod(period: string | null) {
+  const { data } = useRecognitionData();
+
+  return useMemo(() => {
+    const entry = data?.periods?.find((p) => p.period === period);
+    if (!entry) return null;
+    const badges = new Map((data?.badge_definitions || []).map((b) => [b.id, b]));
+    return {
+      ...entry,
+      rankings: entry.rankings.map((r) => ({
+        ...r,
+        badges: r.badges.map((id) => badges.get(id)).filter((b): b is Badge => Boolean(b)),
+      })),
+    };
+  }, [data, period]);
+}
+
 // Hook for goals progress
 export function useGoalsProgress() {
   const { data, isLoading, error } = useRecognitionData();
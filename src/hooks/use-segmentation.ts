@@ -3,6 +3,7 @@
 import { useQuery } from "@tanstack/react-query";
 import { useMemo } from "react";
 import { useCompany } from "@/contexts/company-context";
+import { decodePayload } from "@/lib/payload-codec";
 import { DIMENSION_LABELS_V2 } from "@/types/clima-v2";
 import type { DimensionCodeV2 } from "@/types/clima-v2";
 import type {
@@ -28,7 +29,7 @@ export function useSegmentationData() {
       if (!response.ok) {
         throw new Error("Failed to fetch segmentation data");
       }
-      return response.json();
+      return decodePayload<SegmentationData>(await response.json());
     },
     staleTime: 5 * 60 * 1000,
   });
@@ -88,6 +89,39 @@ function scoreToColor(score: number): string {
   return "#DC2626";
 }
 
+// Colors for the pipeline's segment_bins labels (same palette as scoreToColor)
+const SEGMENT_BIN_COLORS: Record<string, string> = {
+  crisis: "#DC2626",
+  atencion: "#F59E0B",
+  aceptable: "#FCD34D",
+  fortaleza_solida: "#00B4D8",
+  fortaleza_excepcional: "#1dc47c",
+};
+
+// Bin index like numpy.digitize: the number of thresholds at or below the score
+function binIndex(score: number, thresholds: number[]): number {
+  return thresholds.filter((t) => t <= score).length;
+}
+
+// Cell color from the bins the payload ships (color_bins or segment_bins)
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+function heatmapColorFn(raw: any): (score: number) => string {
+  if (raw.color_bins) {
+    const { thresholds, colors } = raw.color_bins as { thresholds: number[]; colors: string[] };
+    return (score) => colors[binIndex(score, thresholds)];
+  }
+  if (raw.segment_bins) {
+    const { thresholds, labels } = raw.segment_bins as { thresholds: number[]; labels: string[] };
+    return (score) => SEGMENT_BIN_COLORS[labels[binIndex(score, thresholds)]] ?? scoreToColor(score);
+  }
+  return scoreToColor;
+}
+
+// Favorability the pipeline derives from a 1-5 score, for payloads without it
+function scoreToFavorability(score: number): number {
+  return Math.min(100, Math.max(0, ((score - 1) / 4) * 100));
+}
+
 // Map dimension codes to display labels
 function dimensionLabel(code: string): string {
   return DIMENSION_LABELS_V2[code as DimensionCodeV2] || code;
@@ -133,6 +167,45 @@ export function useRiskGroups() {
   };
 }
 
+/**
+ * Expand a dense score matrix into HeatmapData cells. Colors are derived
+ * from the scores through the payload's bins, so it only carries labels,
+ * numbers and the bin table.
+ */
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+function expandHeatmapMatrix(raw: any): HeatmapData {
+  const segments: string[] = raw.segments || raw.departments || [];
+  const segmentKeys: string[] = raw.segment_keys || raw.department_keys || segments;
+  const dimensions: string[] = raw.dimensions || [];
+  const dimensionKeys: string[] = raw.dimension_keys || dimensions;
+  const scores: number[][] = raw.scores;
+  const favorability: number[][] | undefined = raw.favorability;
+  const color = heatmapColorFn(raw);
+
+  const cells: HeatmapCell[] = [];
+  scores.forEach((row, i) => {
+    row.forEach((score, j) => {
+      cells.push({
+        segment: segmentKeys[i],
+        segment_name: segments[i],
+        dimension: dimensionKeys[j],
+        dimension_name: dimensions[j],
+        score,
+        favorability: favorability?.[i]?.[j] ?? scoreToFavorability(score),
+        color: color(score),
+      });
+    });
+  });
+
+  return {
+    segments,
+    segment_keys: segmentKeys,
+    dimensions,
+    dimension_keys: dimensionKeys,
+    cells,
+  };
+}
+
 /**
  * Hook to get heatmap data — transforms raw JSON shape to HeatmapData
  */
@@ -143,12 +216,16 @@ export function useHeatmapData() {
   const raw: any = (data as any)?.heatmap;
   if (!raw) return { data: null, ...rest };
 
+  // Dense matrix format: { departments|segments, dimensions, scores[][] }
+  if (raw.scores) return { data: expandHeatmapMatrix(raw), ...rest };
+
   // Already in expected format
   if (raw.segment_keys) return { data: raw as HeatmapData, ...rest };
 
   // Transform from raw format: { dimensions, departments, cells: [{department, dimension, score, segment}] }
   const departments: string[] = raw.departments || [];
   const dimensions: string[] = raw.dimensions || [];
+  const color = heatmapColorFn(raw);
 
   const cells: HeatmapCell[] = (raw.cells || []).map((c: any) => ({
     segment: c.department || c.segment || "",
@@ -156,8 +233,8 @@ export function useHeatmapData() {
     dimension: c.dimension || "",
     dimension_name: c.dimension || c.dimension_name || "",
     score: c.score ?? 0,
-    favorability: c.favorability ?? (c.score ? (c.score / 5) * 100 : 0),
-    color: c.color ?? scoreToColor(c.score ?? 0),
+    favorability: c.favorability ?? (c.score ? scoreToFavorability(c.score) : 0),
+    color: c.color ?? color(c.score ?? 0),
   }));
 
   const heatmap: HeatmapData = {
@@ -1,13 +1,16 @@
 "use client";
 
-import { useQuery } from "@tanstack/react-query";
+import { useQueries, useQuery } from "@tanstack/react-query";
 import { useMemo, useState } from "react";
 import { useCompany } from "@/contexts/company-context";
+import { ordinalPages, queryCommentIndex, wordPostings } from "@/lib/comment-index";
+import { decodePayload } from "@/lib/payload-codec";
 import type {
   TextAnalysisData,
+  CommentIndex,
   Comment,
-  WordFrequency,
-  Theme,
+  CommentShard,
+  CommentShardPage,
   TextAnalysisFilters,
   SentimentType,
   WordCloudWord,
@@ -26,22 +29,173 @@ export function useTextAnalysisData() {
       if (!response.ok) {
         throw new Error("Failed to fetch text analysis data");
       }
+      return decodePayload<TextAnalysisData>(await response.json());
+    },
+    staleTime: 5 * 60 * 1000,
+  });
+}
+
+async function fetchCommentPage(
+  companyId: string,
+  page: CommentShardPage
+): Promise<Comment[]> {
+  const response = await fetch(`/data/${companyId}/${page.path}`);
+  if (!response.ok) {
+    throw new Error("Failed to fetch comment page");
+  }
+  const shard = decodePayload<CommentShard>(await response.json());
+  return shard.comments;
+}
+
+function commentPageCount(analysisData: TextAnalysisData | undefined): number {
+  if (!analysisData) return 0;
+  if (analysisData.comment_shards) return analysisData.comment_shards.pages.length;
+  return analysisData.comments?.length ? 1 : 0;
+}
+
+function commentPageQuery(
+  companyId: string,
+  analysisData: TextAnalysisData | undefined,
+  pageIndex: number,
+  enabled = true
+) {
+  const page = analysisData?.comment_shards?.pages[pageIndex];
+  return {
+    queryKey: ["text-analysis-comments", companyId, pageIndex],
+    queryFn: (): Promise<Comment[]> | Comment[] => {
+      if (analysisData?.comments) {
+        const size = analysisData.comment_shards?.page_size ?? analysisData.comments.length;
+        return analysisData.comments.slice(pageIndex * size, (pageIndex + 1) * size);
+      }
+      return fetchCommentPage(companyId, page as CommentShardPage);
+    },
+    enabled: enabled && !!analysisData && (!!analysisData.comments || !!page),
+    staleTime: 5 * 60 * 1000,
+  };
+}
+
+/**
+ * Hook for a single page of comments, loaded on demand
+ */
+export function useCommentPage(pageIndex: number, enabled = true) {
+  const { companyId } = useCompany();
+  const { data: analysisData } = useTextAnalysisData();
+
+  return useQuery<Comment[]>(commentPageQuery(companyId, analysisData, pageIndex, enabled));
+}
+
+/**
+ * Hook for a set of comment pages (null loads nothing). data holds each
+ * requested page's comments, undefined until every page has arrived.
+ */
+function useCommentPages(pageIndexes: number[] | null) {
+  const { companyId } = useCompany();
+  const { data: analysisData } = useTextAnalysisData();
+
+  return useQueries({
+    queries: (pageIndexes || []).map((i) => commentPageQuery(companyId, analysisData, i)),
+    combine: (results) => ({
+      data:
+        pageIndexes && results.every((r) => r.data)
+          ? results.map((r) => r.data as Comment[])
+          : undefined,
+      isLoading: results.some((r) => r.isLoading),
+    }),
+  });
+}
+
+function allPages(analysisData: TextAnalysisData | undefined): number[] {
+  return Array.from({ length: commentPageCount(analysisData) }, (_, i) => i);
+}
+
+function hasCommentFilters(filters: TextAnalysisFilters): boolean {
+  return !!(filters.dimension || filters.department || filters.sentiment);
+}
+
+/**
+ * Hook for the inverted comment index sidecar (sharded tenants only)
+ */
+export function useCommentIndex(enabled = true) {
+  const { companyId } = useCompany();
+  const { data: analysisData } = useTextAnalysisData();
+  const indexPath = analysisData?.comment_shards?.index;
+
+  return useQuery<CommentIndex>({
+    queryKey: ["text-analysis-index", companyId],
+    queryFn: async () => {
+      const response = await fetch(`/data/${companyId}/${indexPath}`);
+      if (!response.ok) {
+        throw new Error("Failed to fetch comment index");
+      }
       return response.json();
     },
+    enabled: enabled && !!indexPath,
     staleTime: 5 * 60 * 1000,
   });
 }
 
 /**
- * Hook for filtered comments
+ * Pages to fetch for a set of sorted ordinals (every page without an index)
  */
-export function useFilteredComments(filters: TextAnalysisFilters) {
-  const { data, ...rest } = useTextAnalysisData();
+function pagesFor(analysisData: TextAnalysisData | undefined, ordinals: number[] | null): number[] {
+  const pages = analysisData?.comment_shards?.pages;
+  return ordinals && pages ? ordinalPages(ordinals, pages) : allPages(analysisData);
+}
 
-  const filteredComments = useMemo(() => {
-    if (!data?.comments) return [];
+/**
+ * Comments at the given ordinals, looked up in the fetched pages
+ */
+function commentsAt(
+  analysisData: TextAnalysisData | undefined,
+  pageIndexes: number[],
+  loaded: Comment[][],
+  ordinals: number[]
+): Comment[] {
+  const pages = analysisData?.comment_shards?.pages || [];
+  const byPage = new Map(pageIndexes.map((p, i) => [p, loaded[i]]));
+  const out: Comment[] = [];
+  let p = 0;
+  for (const ordinal of ordinals) {
+    while (p < pages.length && ordinal >= pages[p].offset + pages[p].count) p++;
+    const comment = pages[p] && byPage.get(pages[p].index)?.[ordinal - pages[p].offset];
+    if (comment) out.push(comment);
+  }
+  return out;
+}
 
-    return data.comments.filter((comment) => {
+/**
+ * Comments matching the filters; undefined (and nothing fetched) while no
+ * filter is active, so unfiltered views stay on the summary. With the index
+ * sidecar only the pages holding matches are fetched.
+ */
+function useMatchingComments(filters: TextAnalysisFilters) {
+  const active = hasCommentFilters(filters);
+  const { data: analysisData } = useTextAnalysisData();
+  const hasIndex = !!analysisData?.comment_shards?.index;
+  const { data: commentIndex } = useCommentIndex(active);
+
+  const ordinals = useMemo(
+    () =>
+      active && commentIndex
+        ? queryCommentIndex(commentIndex, {
+            dimension: filters.dimension,
+            department: filters.department,
+            sentiment: filters.sentiment,
+          })
+        : null,
+    [active, commentIndex, filters]
+  );
+  const pageIndexes = useMemo(
+    () => (active && (!hasIndex || commentIndex) ? pagesFor(analysisData, ordinals) : null),
+    [active, hasIndex, commentIndex, analysisData, ordinals]
+  );
+  const { data: loaded, isLoading } = useCommentPages(pageIndexes);
+
+  const matching = useMemo(() => {
+    if (!loaded || !pageIndexes) return undefined;
+    if (ordinals) return commentsAt(analysisData, pageIndexes, loaded, ordinals);
+
+    return loaded.flat().filter((comment) => {
       if (filters.dimension && comment.dimension !== filters.dimension) {
         return false;
       }
@@ -53,11 +207,23 @@ export function useFilteredComments(filters: TextAnalysisFilters) {
       }
       return true;
     });
-  }, [data?.comments, filters]);
+  }, [loaded, pageIndexes, ordinals, analysisData, filters]);
+
+  return { data: matching, isLoading };
+}
+
+/**
+ * Hook for filtered comments. Without filters only the first comment page
+ * is loaded, for the comment lists.
+ */
+export function useFilteredComments(filters: TextAnalysisFilters) {
+  const active = hasCommentFilters(filters);
+  const { data: matching, isLoading } = useMatchingComments(filters);
+  const { data: firstPage, isLoading: pageLoading } = useCommentPage(0, !active);
 
   return {
-    data: filteredComments,
-    ...rest,
+    data: (active ? matching : firstPage) || [],
+    isLoading: active ? isLoading : pageLoading,
   };
 }
 
@@ -65,14 +231,14 @@ export function useFilteredComments(filters: TextAnalysisFilters) {
  * Hook for word cloud data
  */
 export function useWordCloudData(filters: TextAnalysisFilters) {
-  const { data: comments } = useFilteredComments(filters);
+  const { data: comments } = useMatchingComments(filters);
   const { data: analysisData } = useTextAnalysisData();
 
   const wordCloudData = useMemo((): WordCloudWord[] => {
     if (!analysisData?.word_frequencies) return [];
 
     // If no filters, return original frequencies
-    if (!filters.dimension && !filters.department && !filters.sentiment) {
+    if (!comments) {
       return analysisData.word_frequencies.map((wf) => ({
         text: wf.word,
         value: wf.count,
@@ -116,24 +282,29 @@ export function useWordCloudData(filters: TextAnalysisFilters) {
       })
       .sort((a, b) => b.value - a.value)
       .slice(0, 30);
-  }, [analysisData?.word_frequencies, comments, filters]);
+  }, [analysisData?.word_frequencies, comments]);
 
   return wordCloudData;
 }
 
 /**
- * Hook for sentiment analysis
+ * Hook for sentiment analysis. Unfiltered figures come from the summary;
+ * the average score is the trend's monthly averages weighted by volume.
  */
 export function useSentimentAnalysis(filters: TextAnalysisFilters) {
-  const { data: comments } = useFilteredComments(filters);
+  const { data: comments } = useMatchingComments(filters);
   const { data: analysisData, ...rest } = useTextAnalysisData();
 
   const sentimentData = useMemo(() => {
-    if (!comments.length) {
+    const trend = analysisData?.sentiment_trend || [];
+
+    if (!comments) {
+      const weights = trend.map((t) => t.positive + t.neutral + t.negative);
+      const total = weights.reduce((sum, w) => sum + w, 0);
       return {
-        summary: { positive: 0, neutral: 0, negative: 0, total: 0 },
-        trend: analysisData?.sentiment_trend || [],
-        avgScore: 0,
+        summary: analysisData?.sentiment_summary || { positive: 0, neutral: 0, negative: 0, total: 0 },
+        trend,
+        avgScore: total ? trend.reduce((sum, t, i) => sum + t.avg_score * weights[i], 0) / total : 0,
       };
     }
 
@@ -146,19 +317,20 @@ export function useSentimentAnalysis(filters: TextAnalysisFilters) {
       { positive: 0, neutral: 0, negative: 0, total: 0 }
     );
 
-    const avgScore =
-      comments.reduce((sum, c) => sum + c.sentiment_score, 0) / comments.length;
+    const avgScore = comments.length
+      ? comments.reduce((sum, c) => sum + c.sentiment_score, 0) / comments.length
+      : 0;
 
     return {
       summary,
-      trend: analysisData?.sentiment_trend || [],
+      trend,
       avgScore,
     };
-  }, [comments, analysisData?.sentiment_trend]);
+  }, [comments, analysisData?.sentiment_summary, analysisData?.sentiment_trend]);
 
   return {
     data: sentimentData,
-    comments,
+    comments: comments || [],
     ...rest,
   };
 }
@@ -168,13 +340,13 @@ export function useSentimentAnalysis(filters: TextAnalysisFilters) {
  */
 export function useThemes(filters: TextAnalysisFilters) {
   const { data: analysisData, ...rest } = useTextAnalysisData();
-  const { data: comments } = useFilteredComments(filters);
+  const { data: comments } = useMatchingComments(filters);
 
   const themes = useMemo(() => {
     if (!analysisData?.themes) return [];
 
     // If no filters, return original themes
-    if (!filters.dimension && !filters.department && !filters.sentiment) {
+    if (!comments) {
       return analysisData.themes;
     }
 
@@ -187,7 +359,7 @@ export function useThemes(filters: TextAnalysisFilters) {
     return analysisData.themes.filter((theme) =>
       theme.keywords.some((kw) => commentThemes.has(kw))
     );
-  }, [analysisData?.themes, comments, filters]);
+  }, [analysisData?.themes, comments]);
 
   return {
     data: themes,
@@ -196,22 +368,54 @@ export function useThemes(filters: TextAnalysisFilters) {
 }
 
 /**
- * Hook for comments by word
+ * Hook for comments by word. Pages are fetched once a word is selected:
+ * with the index only those holding its theme or term postings.
  */
 export function useCommentsByWord(word: string | null) {
   const { data: analysisData } = useTextAnalysisData();
+  const hasIndex = !!analysisData?.comment_shards?.index;
+  const { data: commentIndex } = useCommentIndex(!!word);
 
-  const comments = useMemo(() => {
-    if (!word || !analysisData?.comments) return [];
+  const pageIndexes = useMemo(() => {
+    if (!word || (hasIndex && !commentIndex)) return null;
+    return pagesFor(analysisData, commentIndex ? wordPostings(commentIndex, word) : null);
+  }, [word, hasIndex, commentIndex, analysisData]);
+  const { data: loaded } = useCommentPages(pageIndexes);
+
+  return useMemo(() => {
+    if (!word || !loaded) return [];
 
-    return analysisData.comments.filter(
+    return loaded.flat().filter(
       (comment) =>
         comment.themes.includes(word.toLowerCase()) ||
         comment.text.toLowerCase().includes(word.toLowerCase())
     );
-  }, [word, analysisData?.comments]);
+  }, [word, loaded]);
+}
+
+// Comment ids ("c001" … "c1000") compare numerically within their prefix
+const compareIds = (a: string, b: string) => a.localeCompare(b, undefined, { numeric: true });
 
-  return comments;
+/**
+ * Hook for comments by id; only the pages whose id range holds them are
+ * fetched, and only while enabled
+ */
+export function useCommentsById(ids: string[], enabled = true) {
+  const { data: analysisData } = useTextAnalysisData();
+  const pages = useMemo(() => {
+    if (!enabled || !ids.length || !analysisData) return null;
+    const shardPages = analysisData.comment_shards?.pages;
+    if (!shardPages) return allPages(analysisData);
+    return shardPages
+      .filter((p) => ids.some((id) => compareIds(id, p.first_id) >= 0 && compareIds(id, p.last_id) <= 0))
+      .map((p) => p.index);
+  }, [analysisData, ids, enabled]);
+  const { data: loaded } = useCommentPages(pages);
+
+  return useMemo(
+    () => (loaded ? loaded.flat().filter((c) => ids.includes(c.id)) : []),
+    [loaded, ids]
+  );
 }
 
 /**
@@ -258,10 +462,6 @@ export function useTextAnalysisFilters() {
  * Hook to get comment by ID
  */
 export function useCommentById(id: string) {
-  const { data: analysisData } = useTextAnalysisData();
-
-  return useMemo(() => {
-    if (!analysisData?.comments) return null;
-    return analysisData.comments.find((c) => c.id === id) || null;
-  }, [analysisData?.comments, id]);
+  const ids = useMemo(() => [id], [id]);
+  return useCommentsById(ids)[0] || null;
 }
@@ -2,6 +2,7 @@
 
 import { useQuery } from "@tanstack/react-query";
 import { useCompany } from "@/contexts/company-context";
+import { decodePayload } from "@/lib/payload-codec";
 import type {
   UnifiedAnalysisData,
   YearKeywordAnalysis,
@@ -26,7 +27,7 @@ export function useUnifiedAnalysis() {
       if (!response.ok) {
         throw new Error("Failed to fetch unified analysis data");
       }
-      return response.json();
+      return decodePayload<UnifiedAnalysisData>(await response.json());
     },
     staleTime: 5 * 60 * 1000,
   });
@@ -0,0 +1,102 @@
+import type { CommentIndex, CommentShardPage, PostingList } from "@/types/text-analysis";
+
+type IndexField = keyof CommentIndex["fields"];
+
+export function decodePostings(gaps: PostingList): number[] {
+  const ordinals = new Array<number>(gaps.length);
+  let acc = 0;
+  for (let i = 0; i < gaps.length; i++) {
+    acc += gaps[i];
+    ordinals[i] = acc;
+  }
+  return ordinals;
+}
+
+export function intersectPostings(a: number[], b: number[]): number[] {
+  const out: number[] = [];
+  let i = 0;
+  let j = 0;
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) {
+      out.push(a[i]);
+      i++;
+      j++;
+    } else if (a[i] < b[j]) {
+      i++;
+    } else {
+      j++;
+    }
+  }
+  return out;
+}
+
+/**
+ * Resolve a set of field filters and terms to sorted comment ordinals.
+ * Returns null when nothing is filtered (every comment matches).
+ */
+export function queryCommentIndex(
+  index: CommentIndex,
+  filters: Partial<Record<IndexField, string | null>>,
+  terms: string[] = []
+): number[] | null {
+  const lists: number[][] = [];
+
+  (Object.keys(filters) as IndexField[]).forEach((field) => {
+    const key = filters[field];
+    if (key) lists.push(decodePostings(index.fields[field]?.[key] || []));
+  });
+  terms.forEach((term) => {
+    lists.push(decodePostings(index.terms[term.toLowerCase()] || []));
+  });
+
+  if (!lists.length) return null;
+
+  lists.sort((a, b) => a.length - b.length);
+  return lists.slice(1).reduce(intersectPostings, lists[0]);
+}
+
+export function unionPostings(a: number[], b: number[]): number[] {
+  const out: number[] = [];
+  let i = 0;
+  let j = 0;
+  while (i < a.length || j < b.length) {
+    if (j >= b.length || (i < a.length && a[i] < b[j])) {
+      out.push(a[i++]);
+    } else if (i >= a.length || b[j] < a[i]) {
+      out.push(b[j++]);
+    } else {
+      out.push(a[i]);
+      i++;
+      j++;
+    }
+  }
+  return out;
+}
+
+/**
+ * Comment ordinals matching a word: its theme posting list plus its term
+ * posting list.
+ */
+export function wordPostings(index: CommentIndex, word: string): number[] {
+  const key = word.toLowerCase();
+  return unionPostings(
+    decodePostings(index.fields.themes?.[key] || []),
+    decodePostings(index.terms[key] || [])
+  );
+}
+
+/**
+ * Indexes of the comment pages holding the given sorted ordinals.
+ */
+export function ordinalPages(ordinals: number[], pages: CommentShardPage[]): number[] {
+  const out: number[] = [];
+  let p = 0;
+  for (const ordinal of ordinals) {
+    while (p < pages.length && ordinal >= pages[p].offset + pages[p].count) p++;
+    if (p >= pages.length) break;
+    if (ordinal >= pages[p].offset && out[out.length - 1] !== pages[p].index) {
+      out.push(pages[p].index);
+    }
+  }
+  return out;
+}
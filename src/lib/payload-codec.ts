@@ -0,0 +1,141 @@
+/**
+ * Decoder for documents written by scripts/payload_codec.py.
+ *
+ * Encoded documents drop fields the client can derive (listed with their
+ * rule in the "_payload" header) and store repeated strings as indexes into
+ * a per-file string table. decodePayload restores the plain shape; plain
+ * documents are returned as they are.
+ */
+
+type Json = null | boolean | number | string | Json[] | { [key: string]: Json };
+type JsonObject = { [key: string]: Json };
+
+interface RuleBase {
+  path: string;
+  field: string;
+  where?: Record<string, Json>;
+}
+
+interface LookupRule extends RuleBase {
+  rule: "lookup";
+  key: string;
+  table: Record<string, Json>;
+}
+
+interface AffineRule extends RuleBase {
+  rule: "affine";
+  of: string;
+  scale: number;
+  offset: number;
+  max?: number;
+  digits?: number;
+}
+
+interface BinsRule extends RuleBase {
+  rule: "bins";
+  of: string;
+  thresholds: number[];
+  labels: string[];
+}
+
+export type DerivedRule = LookupRule | AffineRule | BinsRule;
+
+export interface PayloadHeader {
+  version: number;
+  derived: DerivedRule[];
+  strings: string[];
+  string_keys: string[];
+}
+
+export const PAYLOAD_HEADER = "_payload";
+const CODEC_VERSION = 1;
+
+function isObject(value: Json | undefined): value is JsonObject {
+  return typeof value === "object" && value !== null && !Array.isArray(value);
+}
+
+function steps(path: string): string[] {
+  return path.split(".").flatMap((part) => {
+    if (!part.endsWith("[]")) return [part];
+    const name = part.slice(0, -2);
+    return name ? [name, "[]"] : ["[]"];
+  });
+}
+
+function objectsAt(doc: JsonObject, path: string): JsonObject[] {
+  let nodes: Json[] = [doc];
+  for (const step of steps(path)) {
+    const reached: Json[] = [];
+    for (const node of nodes) {
+      if (step === "[]") {
+        if (Array.isArray(node)) reached.push(...node);
+      } else if (step === "*") {
+        if (isObject(node)) reached.push(...Object.values(node));
+      } else if (isObject(node) && step in node) {
+        reached.push(node[step]);
+      }
+    }
+    nodes = reached;
+  }
+  return nodes.filter(isObject);
+}
+
+function derive(rule: DerivedRule, obj: JsonObject): Json | undefined {
+  if (rule.rule === "lookup") {
+    const key = obj[rule.key];
+    return typeof key === "string" ? rule.table[key] : undefined;
+  }
+  const source = obj[rule.of];
+  if (typeof source !== "number") return undefined;
+  if (rule.rule === "bins") {
+    return rule.labels[rule.thresholds.filter((t) => t <= source).length];
+  }
+  let value = rule.offset + rule.scale * source;
+  if (rule.max !== undefined) value = Math.min(rule.max, value);
+  if (rule.digits !== undefined) {
+    const scale = 10 ** rule.digits;
+    value = Math.round(value * scale) / scale;
+  }
+  return value;
+}
+
+function expandStrings(value: Json, strings: string[], keys: Set<string>): void {
+  if (Array.isArray(value)) {
+    value.forEach((item) => expandStrings(item, strings, keys));
+  } else if (isObject(value)) {
+    for (const [key, v] of Object.entries(value)) {
+      if (keys.has(key) && typeof v === "number") {
+        value[key] = strings[v];
+      } else if (keys.has(key) && Array.isArray(v)) {
+        value[key] = v.map((i) => strings[i as number]);
+      } else {
+        expandStrings(v, strings, keys);
+      }
+    }
+  }
+}
+
+/**
+ * Restore an encoded document in place (plain documents pass through).
+ * Use on every fetched document JSON: `decodePayload<T>(await response.json())`.
+ */
+export function decodePayload<T>(doc: unknown): T {
+  if (!isObject(doc as Json) || !(PAYLOAD_HEADER in (doc as JsonObject))) return doc as T;
+  const data = doc as JsonObject;
+  const header = data[PAYLOAD_HEADER] as unknown as PayloadHeader;
+  delete data[PAYLOAD_HEADER];
+  if (header.version > CODEC_VERSION) {
+    throw new Error(`Unsupported payload version ${header.version}`);
+  }
+
+  expandStrings(data, header.strings, new Set(header.string_keys));
+  for (const rule of header.derived) {
+    const where = Object.entries(rule.where || {});
+    for (const obj of objectsAt(data, rule.path)) {
+      if (rule.field in obj || !where.every(([k, v]) => obj[k] === v)) continue;
+      const value = derive(rule, obj);
+      if (value !== undefined) obj[rule.field] = value;
+    }
+  }
+  return data as T;
+}
@@ -50,6 +50,10 @@ export interface DimensionStatV2 {
   benchmark: number;
   gap_vs_benchmark: number;
   rank: number;
+  // Cross-tenant benchmark metadata (absent in template data)
+  percentile_rank?: number;
+  benchmark_scope?: "industry" | "all" | "template";
+  benchmark_peers?: number;
 }
 
 // Perfil de engagement
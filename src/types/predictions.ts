@@ -6,6 +6,7 @@ export interface RiskFactor {
   impact_score: number;
   affected_percentage: number;
   dimension: string;
+  avg_score?: number;
 }
 
 export interface HighRiskArea {
@@ -13,6 +14,7 @@ export interface HighRiskArea {
   risk_level: number;
   engagement_score: number;
   headcount: number;
+  at_risk_percentage?: number;
   key_issues: string[];
 }
 
@@ -23,6 +25,7 @@ export interface EngagementRotationPoint {
 
 export interface RotationRisk {
   overall_index: number;
+  affected_percentage?: number;
   trend: "up" | "down" | "stable";
   risk_factors: RiskFactor[];
   high_risk_areas: HighRiskArea[];
@@ -55,11 +58,25 @@ export interface DimensionProjection {
   projected_12m: number;
   trend: "up" | "down" | "stable";
   change_rate: number;
+  confidence?: number;
+}
+
+// Department × dimension forecasts as dense matrices (rows: departments)
+export interface DepartmentProjections {
+  departments: string[];
+  dimension_codes: string[];
+  current: (number | null)[][];
+  projected_6m: (number | null)[][];
+  projected_12m: (number | null)[][];
+  optimistic_12m: (number | null)[][];
+  pessimistic_12m: (number | null)[][];
+  trend: ("up" | "down" | "stable")[][];
 }
 
 export interface Projections {
   overall: OverallProjection;
   by_dimension: DimensionProjection[];
+  by_department?: DepartmentProjections;
 }
 
 export interface AlertTrendPoint {
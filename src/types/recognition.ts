@@ -75,6 +75,24 @@ export interface RecognitionSummary {
   goals_at_risk: number;
 }
 
+export interface PeriodRanking {
+  area: string;
+  rank: number;
+  engagement: number;
+  medal: "gold" | "silver" | "bronze" | "none";
+  change: number;
+  trend: "up" | "down" | "stable" | "new";
+  badges: string[]; // badge ids, see badge_definitions
+}
+
+export interface RecognitionPeriod {
+  period: string; // "YYYY-MM"
+  month: string;
+  interpolated: boolean; // false only for survey months (December anchors)
+  rankings: PeriodRanking[];
+  area_of_month?: { area: string; improvement: number };
+}
+
 export interface RecognitionData {
   generated_at: string;
   rankings: AreaRanking[];
@@ -83,4 +101,6 @@ export interface RecognitionData {
   goals_progress: GoalProgress[];
   achievements: Achievement[];
   summary: RecognitionSummary;
+  periods?: RecognitionPeriod[];
+  badge_definitions?: Badge[];
 }
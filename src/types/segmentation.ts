@@ -87,6 +87,38 @@ export interface SegmentComparison {
   vs_global: number; // Difference from global average
 }
 
+// Org-tree levels, each written to its own file and loaded on demand
+export interface OrgTreeLevel {
+  level: number;
+  name: string;
+  path: string;
+  node_count: number;
+  suppressed_count: number;
+}
+
+export interface OrgTreeManifest {
+  min_n: number;
+  dimension_codes: string[];
+  levels: OrgTreeLevel[];
+}
+
+export interface OrgTreeNode {
+  node_id: string;
+  name: string;
+  parent_id: string | null;
+  respondent_count: number;
+  suppressed: boolean;
+  scores: number[] | null; // aligned with dimension_codes; null when suppressed
+  gap_vs_global: number[] | null;
+}
+
+export interface OrgTreeLevelData {
+  level: number;
+  name: string;
+  dimension_codes: string[];
+  nodes: OrgTreeNode[];
+}
+
 // Full segmentation data structure
 export interface SegmentationData {
   generated_at: string;
@@ -100,6 +132,7 @@ export interface SegmentationData {
   by_location: SegmentStats[];  // Empty - not available in data
   risk_groups: RiskGroup[];
   heatmap: HeatmapData;
+  org_tree?: OrgTreeManifest;
 }
 
 // Filter context type
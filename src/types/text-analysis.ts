@@ -47,14 +47,64 @@ export interface SentimentTrend {
   avg_score: number;
 }
 
+// Comment pages written next to the summary file
+export interface CommentShardPage {
+  index: number;
+  path: string;
+  offset: number;
+  count: number;
+  first_id: string;
+  last_id: string;
+}
+
+export interface CommentShardManifest {
+  page_size: number;
+  total: number;
+  pages: CommentShardPage[];
+  index?: string;
+}
+
+// Delta-encoded posting lists of comment ordinals
+export type PostingList = number[];
+
+export interface CommentIndex {
+  version: number;
+  encoding: "delta";
+  total: number;
+  fields: {
+    department: Record<string, PostingList>;
+    themes: Record<string, PostingList>;
+    sentiment: Record<string, PostingList>;
+    dimension: Record<string, PostingList>;
+    month: Record<string, PostingList>;
+  };
+  terms: Record<string, PostingList>;
+}
+
+export interface CommentShard {
+  page: number;
+  offset: number;
+  comments: Comment[];
+}
+
 export interface TextAnalysisData {
   generated_at: string;
   total_comments: number;
-  comments: Comment[];
+  // Inline comments (legacy single-file output); sharded tenants use comment_shards
+  comments?: Comment[];
+  comment_shards?: CommentShardManifest;
   word_frequencies: WordFrequency[];
   themes: Theme[];
   sentiment_summary: SentimentSummary;
   sentiment_trend: SentimentTrend[];
+  // Per-tenant word-cloud images, relative to the tenant data directory
+  word_cloud?: WordCloudImages;
+}
+
+export interface WordCloudImages {
+  hash: string;
+  light: string;
+  dark: string;
 }
 
 // Word cloud data format